@@ -1,17 +1,144 @@
 import json
 import os
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
+from utils.llm_cache import cached_completion
 
 # the newest OpenAI model is "gpt-5" which was released August 7, 2025.
 # do not change this unless explicitly requested by the user
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 openai = OpenAI(api_key=OPENAI_API_KEY)
 
-def analyze_document_for_trend(text_content):
+# Long documents are analyzed map-reduce style: split into section-aligned chunks within a
+# token budget, chunks analyzed concurrently, then merged. Documents that fit into one chunk
+# keep the single-pass prompt.
+TREND_CHUNK_TOKENS = int(os.environ.get('TREND_CHUNK_TOKENS', 6000))
+TREND_MAP_WORKERS = int(os.environ.get('TREND_MAP_WORKERS', 4))
+CHARS_PER_TOKEN = 4  # rough estimate for mixed German/English text
+
+# Section boundaries inserted by the document processor (file, sheet and scanned-page markers)
+SECTION_MARKER = re.compile(r'^(--- Content from .* ---|--- Sheet: .* ---|\[Scanned page \d+\])$')
+
+TREND_SYSTEM_PROMPT = "You are an expert food industry analyst specializing in trend identification and market insights. Analyze documents and extract relevant trend information for the food industry."
+
+
+def split_into_chunks(text_content, max_tokens=TREND_CHUNK_TOKENS):
+    """
+    Split text into chunks of at most max_tokens (estimated), cutting at paragraph boundaries
+    and preferring to start a new chunk at section markers
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text_content) <= max_chars:
+        return [text_content]
+    
+    blocks = []
+    marker = ''
+    for block in re.split(r'\n\s*\n', text_content):
+        # A bare section marker stays with the block that follows it
+        if SECTION_MARKER.match(block.strip()):
+            marker += block.strip() + '\n'
+            continue
+        block, marker = marker + block, ''
+        while len(block) > max_chars:
+            # Oversized paragraph (e.g. a table without blank lines): cut at the last line break
+            cut = block.rfind('\n', 0, max_chars)
+            cut = cut if cut > max_chars // 2 else max_chars
+            blocks.append(block[:cut])
+            block = block[cut:].lstrip('\n')
+        if block.strip():
+            blocks.append(block)
+    if marker:
+        blocks.append(marker)
+    
+    chunks = []
+    current = []
+    size = 0
+    for block in blocks:
+        starts_section = bool(SECTION_MARKER.match(block.strip().split('\n', 1)[0]))
+        if current and (size + len(block) + 2 > max_chars or (starts_section and size > max_chars // 2)):
+            chunks.append('\n\n'.join(current))
+            current, size = [], 0
+        current.append(block)
+        size += len(block) + 2
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+def _map_chunks(map_fn, chunks):
+    """Run map_fn(index, chunk) over all chunks with bounded concurrency; failed chunks yield None"""
+    def run(item):
+        index, chunk = item
+        try:
+            return map_fn(index, chunk)
+        except Exception as e:
+            logging.warning(f"Chunk {index + 1}/{len(chunks)} analysis failed: {e}")
+            return None
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(TREND_MAP_WORKERS, len(chunks))),
+                            thread_name_prefix='trend-map') as executor:
+        return list(executor.map(run, enumerate(chunks)))
+
+
+def _json_completion(call_site, system_prompt, prompt, bypass_cache):
+    """gpt-5 JSON-mode call through the LLM cache; returns the parsed object"""
+    messages = [{"role": "user", "content": prompt}]
+    if system_prompt:
+        messages.insert(0, {"role": "system", "content": system_prompt})
+    content = cached_completion(
+        call_site, "gpt-5", system_prompt, prompt,
+        lambda: openai.chat.completions.create(
+            model="gpt-5",
+            messages=messages,
+            response_format={"type": "json_object"}
+        ).choices[0].message.content,
+        params={"response_format": "json_object"},
+        validate=json.loads,
+        bypass=bypass_cache
+    )
+    if content is None:
+        raise Exception("No content received from OpenAI")
+    return json.loads(content)
+
+
+def _analyze_trend_chunk(index, total, chunk, bypass_cache):
+    """Map step: condensed trend notes for one section of a long document"""
+    prompt = f"""
+        You are reading part {index + 1} of {total} of a long food industry document.
+        Extract the information relevant for a food industry trend report from this part only.
+        
+        Return a JSON object with:
+        {{
+            "summary": "what this part is about (max 300 characters)",
+            "trend_signals": ["food industry trends, innovations, health, wellness or sustainability aspects"],
+            "market_data": ["concrete statistics, growth rates, market sizes, revenue or financial figures, with numbers"],
+            "consumer_insights": ["concrete facts on consumer behavior, preferences, demographics or purchasing patterns"],
+            "category_hint": "one of: Health, Sustainability, Innovation",
+            "report_type_hint": "one of: produktentwicklung, marktdaten"
+        }}
+        Use empty lists when this part contains nothing relevant.
+        
+        Document part:
+        {chunk}
+        """
+    return _json_completion("analyze_trend_chunk", TREND_SYSTEM_PROMPT, prompt, bypass_cache)
+
+def analyze_document_for_trend(text_content, bypass_cache=False):
     """
     Analyze document content and extract trend information using OpenAI
     Returns structured JSON with trend suggestions
+    Identical documents are answered from the local LLM cache unless bypass_cache is set
+    Documents longer than TREND_CHUNK_TOKENS are analyzed per chunk and merged (same JSON contract)
     """
+    chunks = split_into_chunks(text_content)
+    if len(chunks) == 1:
+        return _analyze_single_pass(text_content, bypass_cache)
+    return _analyze_map_reduce(chunks, bypass_cache)
+
+def _analyze_single_pass(text_content, bypass_cache=False):
+    """Analyze a document that fits into one prompt"""
     try:
         prompt = """
         Analyze the following document content and extract information for a food industry trend report.
@@ -41,19 +168,21 @@ def analyze_document_for_trend(text_content):
         Document content:
         """ + text_content
         
-        response = openai.chat.completions.create(
-            model="gpt-5",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert food industry analyst specializing in trend identification and market insights. Analyze documents and extract relevant trend information for the food industry."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
+        system_prompt = TREND_SYSTEM_PROMPT
+        content = cached_completion(
+            "analyze_document_for_trend", "gpt-5", system_prompt, prompt,
+            lambda: openai.chat.completions.create(
+                model="gpt-5",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"}
+            ).choices[0].message.content,
+            params={"response_format": "json_object"},
+            validate=json.loads,
+            bypass=bypass_cache
         )
-        
-        content = response.choices[0].message.content
         if content is None:
             raise Exception("No content received from OpenAI")
         result = json.loads(content)
@@ -62,7 +191,42 @@ def analyze_document_for_trend(text_content):
     except Exception as e:
         raise Exception(f"Failed to analyze document: {e}")
 
-def improve_trend_description(title, description, category):
+def _analyze_map_reduce(chunks, bypass_cache=False):
+    """Analyze chunks concurrently, then merge the notes into the trend report JSON"""
+    try:
+        notes = _map_chunks(lambda index, chunk: _analyze_trend_chunk(index, len(chunks), chunk, bypass_cache), chunks)
+        notes = [{"part": index + 1, **note} for index, note in enumerate(notes) if isinstance(note, dict)]
+        if not notes:
+            raise Exception("No chunk of the document could be analyzed")
+        logging.info(f"Trend analysis: {len(notes)} of {len(chunks)} chunks analyzed, reducing")
+        
+        prompt = """
+        The following notes were extracted, part by part, from one long document.
+        Combine them into a single food industry trend report for the whole document.
+        
+        Please provide a JSON response with the following structure:
+        {
+            "title": "suggested title for the trend (max 100 characters)",
+            "description": "detailed description of the trend (max 300 characters)", 
+            "category": "one of: Health, Sustainability, Innovation",
+            "report_type": "one of: produktentwicklung, marktdaten",
+            "market_data": "one concise fact about market data, statistics, growth rates, market size, or financial information (max 150 characters)",
+            "consumer_insights": "one concise fact about consumer behavior, preferences, trends, or demographic insights (max 150 characters)",
+            "confidence": "confidence score from 0.0 to 1.0"
+        }
+        
+        Pick the dominant trend across all parts, and the strongest single market data fact and
+        consumer insight from the notes - do not invent figures that are not in the notes.
+        
+        Notes per document part:
+        """ + json.dumps(notes, ensure_ascii=False, indent=1)
+        
+        return _json_completion("reduce_document_for_trend", TREND_SYSTEM_PROMPT, prompt, bypass_cache)
+        
+    except Exception as e:
+        raise Exception(f"Failed to analyze document: {e}")
+
+def improve_trend_description(title, description, category, bypass_cache=False):
     """
     Use AI to improve and enhance trend descriptions
     """
@@ -83,12 +247,14 @@ def improve_trend_description(title, description, category):
         Return only the improved description text, no additional formatting.
         """
         
-        response = openai.chat.completions.create(
-            model="gpt-5",
-            messages=[{"role": "user", "content": prompt}]
+        content = cached_completion(
+            "improve_trend_description", "gpt-5", None, prompt,
+            lambda: openai.chat.completions.create(
+                model="gpt-5",
+                messages=[{"role": "user", "content": prompt}]
+            ).choices[0].message.content,
+            bypass=bypass_cache
         )
-        
-        content = response.choices[0].message.content
         if content is None:
             return description  # Fallback to original description
         return content.strip()
@@ -96,12 +262,27 @@ def improve_trend_description(title, description, category):
     except Exception as e:
         return description  # Fallback to original description
 
-def extract_key_topics(text_content):
-    """
-    Extract key topics and keywords from document content
-    """
-    try:
-        prompt = f"""
+def _merge_topic_lists(results, limits):
+    """Merge per-chunk topic lists locally: case-insensitive dedupe, ranked by how many chunks mention them"""
+    merged = {}
+    for field, limit in limits.items():
+        counts = {}
+        first_seen = {}
+        for result in results:
+            for position, item in enumerate(result.get(field) or []):
+                if not isinstance(item, str) or not item.strip():
+                    continue
+                key = item.strip().lower()
+                if key not in counts:
+                    counts[key] = 0
+                    first_seen[key] = (len(first_seen), item.strip())
+                counts[key] += 1
+        ranked = sorted(counts, key=lambda key: (-counts[key], first_seen[key][0]))
+        merged[field] = [first_seen[key][1] for key in ranked[:limit]]
+    return merged
+
+def _extract_topics_from_chunk(chunk, bypass_cache=False):
+    prompt = f"""
         Extract the main topics and keywords from this food industry document.
         
         Return a JSON object with:
@@ -112,23 +293,26 @@ def extract_key_topics(text_content):
         }}
         
         Document content:
-        {text_content[:2000]}...
+        {chunk}
         """
-        
-        response = openai.chat.completions.create(
-            model="gpt-5",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
-        
-        content = response.choices[0].message.content
-        if content is None:
-            return {"main_topics": [], "keywords": [], "industry_segments": []}
-        return json.loads(content)
+    return _json_completion("extract_key_topics", None, prompt, bypass_cache)
+
+def extract_key_topics(text_content, bypass_cache=False):
+    """
+    Extract key topics and keywords from document content
+    Long documents are processed per chunk and the lists merged locally
+    """
+    try:
+        chunks = split_into_chunks(text_content)
+        if len(chunks) == 1:
+            return _extract_topics_from_chunk(text_content, bypass_cache)
+        results = _map_chunks(lambda index, chunk: _extract_topics_from_chunk(chunk, bypass_cache), chunks)
+        results = [result for result in results if isinstance(result, dict)]
+        return _merge_topic_lists(results, {"main_topics": 8, "keywords": 15, "industry_segments": 10})
         
     except Exception as e:
         return {
             "main_topics": [],
             "keywords": [],
             "industry_segments": []
-        }
\ No newline at end of file
+        }
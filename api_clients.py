@@ -5,20 +5,379 @@ Implementiert echte API-Calls für:
 - 2 AI Deep Research APIs
 - 33 Statistische Datenbanken
 - 5 Industry Websites
+
+HTTP-Infrastruktur (prozessweit geteilt):
+- Eine gepoolte requests.Session pro Host (warme Verbindungen über Jobs hinweg)
+- Token-Bucket Rate-Limiting pro Host, konfigurierbar pro Quelle
+- Retries mit exponentiellem Backoff bei 429/5xx unter Beachtung von Retry-After
+- Latenz- und Durchsatz-Metriken pro Host (get_host_metrics)
+- Conditional GETs (ETag/Last-Modified) und Parse-Zeiten pro Website für die Scraper
+- Record/Replay über RESEARCH_REPLAY_MODE (siehe utils/research_replay.py)
 """
 
 import requests
 import logging
+import re
 import time
-from typing import Dict, List, Any
-from bs4 import BeautifulSoup
+import threading
+import importlib.util
+from collections import deque, OrderedDict
+from typing import Dict, List, Any, Optional
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 import json
+import math
 import os
 
+from utils.research_replay import replay_mode, replay_server_url, http_key, save_http, load_http, replay_delay, replay_llm
+
 # Rate-Limiting - OPTIMIERT für max 10 Minuten Gesamtdauer
-REQUEST_DELAY = 0.1  # Sekunden zwischen Requests (reduziert für Performance)
 REQUEST_TIMEOUT = 5  # Timeout pro Request in Sekunden
 
+# Connection-Pooling pro Host
+POOL_CONNECTIONS = 4   # Anzahl gecachter Connection-Pools pro Session
+POOL_MAXSIZE = 16      # Max. parallele Verbindungen pro Host
+
+# Retries bei 429/5xx mit exponentiellem Backoff (0.5s, 1s, 2s, ...)
+MAX_RETRIES = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+RETRY_AFTER_MAX = 30  # Obergrenze für Retry-After Header in Sekunden
+
+# Token-Bucket pro Host: (Requests pro Sekunde, Burst-Kapazität)
+DEFAULT_RATE_LIMIT = (5.0, 5)
+SOURCE_RATE_LIMITS = {
+    "PubMed": (3.0, 3),                 # NCBI erlaubt 3 req/s ohne API-Key
+    "USDA FoodData Central": (1.0, 2),  # DEMO_KEY ist stark limitiert
+    "Perplexity API": (1.0, 1),
+    "Open Food Facts": (2.0, 2),
+}
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'BruggenInnovation/1.0 Research Bot'
+}
+
+# Anzahl Latenz-Samples pro Host für Perzentile
+HOST_METRICS_SAMPLES = 500
+
+# Web-Scraper: lxml ist deutlich schneller als der eingebaute Parser (Fallback, falls nicht installiert)
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+SCRAPE_SCAN_LIMIT = 100       # Max. ausgewertete Links bzw. Artikel pro Seite
+PAGE_CACHE_MAX_ENTRIES = 256  # Seiten mit gespeicherten Validatoren und Extraktion
+ARTICLE_CLASS_RE = re.compile('article|post', re.IGNORECASE)
+
+
+class CappedRetry(Retry):
+    """Retry-Strategie, die Retry-After respektiert, aber auf RETRY_AFTER_MAX begrenzt"""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, RETRY_AFTER_MAX)
+
+
+class TokenBucket:
+    """Thread-sicherer Token-Bucket für das Rate-Limiting eines Hosts"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserviert ein Token und gibt die nötige Wartezeit in Sekunden zurück"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self) -> float:
+        """Blockiert, bis ein Token verfügbar ist. Gibt die Wartezeit zurück."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class HostMetrics:
+    """Sammelt Latenz, Bytes und Durchsatz für einen Host"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.total_latency = 0.0
+        self.total_wait = 0.0
+        self.first_request_at = None
+        self.last_request_at = None
+        self.latencies = deque(maxlen=HOST_METRICS_SAMPLES)
+
+    def record(self, latency: float, bytes_received: int, error: bool, wait: float):
+        with self.lock:
+            now = time.time()
+            if self.first_request_at is None:
+                self.first_request_at = now - latency
+            self.last_request_at = now
+            self.requests += 1
+            self.errors += 1 if error else 0
+            self.bytes_received += bytes_received
+            self.total_latency += latency
+            self.total_wait += wait
+            self.latencies.append(latency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            samples = sorted(self.latencies)
+            window = (self.last_request_at - self.first_request_at) if self.requests else 0
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'bytes_received': self.bytes_received,
+                'avg_latency_ms': round(self.total_latency / self.requests * 1000, 1) if self.requests else 0,
+                'p50_latency_ms': round(_percentile(samples, 50) * 1000, 1),
+                'p95_latency_ms': round(_percentile(samples, 95) * 1000, 1),
+                'throttle_wait_s': round(self.total_wait, 2),
+                'requests_per_second': round(self.requests / window, 2) if window > 0 else 0,
+                'kb_per_second': round(self.bytes_received / 1024 / window, 1) if window > 0 else 0
+            }
+
+
+class ParseMetrics:
+    """Sammelt HTML-Parse-Zeiten und 304-Treffer für eine gescrapte Website"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.parses = 0
+        self.not_modified = 0
+        self.total_duration = 0.0
+        self.durations = deque(maxlen=HOST_METRICS_SAMPLES)
+
+    def record(self, duration: float):
+        with self.lock:
+            self.parses += 1
+            self.total_duration += duration
+            self.durations.append(duration)
+
+    def record_not_modified(self):
+        with self.lock:
+            self.not_modified += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            samples = sorted(self.durations)
+            return {
+                'parses': self.parses,
+                'not_modified': self.not_modified,
+                'avg_parse_ms': round(self.total_duration / self.parses * 1000, 1) if self.parses else 0,
+                'p95_parse_ms': round(_percentile(samples, 95) * 1000, 1),
+                'max_parse_ms': round(samples[-1] * 1000, 1) if samples else 0
+            }
+
+
+class PageCache:
+    """Validatoren (ETag/Last-Modified) und keyword-unabhängige Extraktion pro Seite (LRU)"""
+
+    def __init__(self, max_entries: int):
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Header für einen Conditional GET (leer, wenn die Seite unbekannt ist)"""
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return {}
+            headers = {}
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+            return headers
+
+    def extraction(self, url: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            self.entries.move_to_end(url)
+            return entry['extraction']
+
+    def store(self, url: str, headers, extraction: Dict[str, Any]):
+        """Speichert die Extraktion - nur sinnvoll, wenn der Server Validatoren liefert"""
+        etag = _header(headers, 'ETag')
+        last_modified = _header(headers, 'Last-Modified')
+        with self.lock:
+            if not etag and not last_modified:
+                self.entries.pop(url, None)
+                return
+            self.entries[url] = {'etag': etag, 'last_modified': last_modified, 'extraction': extraction}
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+def _header(headers, name: str) -> Optional[str]:
+    """Header case-insensitiv lesen (requests- und aiohttp-Antworten)"""
+    for key, value in (headers or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def _is_link_or_article(tag, attrs=None) -> bool:
+    """
+    SoupStrainer-Filter: Links sowie article/div-Container mit Artikel-Klasse.
+    bs4 übergibt je nach Version (name, attrs) oder das Tag-Objekt.
+    """
+    if hasattr(tag, 'name'):
+        name, attrs = tag.name, tag.attrs
+    else:
+        name = tag
+    if name == 'a':
+        return True
+    if name not in ('article', 'div'):
+        return False
+    if attrs is None:
+        return True  # Ohne Attribute nicht entscheidbar - Container behalten
+    classes = attrs.get('class') or ''
+    if not isinstance(classes, str):
+        classes = ' '.join(classes)
+    return bool(ARTICLE_CLASS_RE.search(classes))
+
+
+# Parser nur für die benötigten Knoten - der Rest der Seite wird gar nicht erst als Baum aufgebaut
+LINK_STRAINER = SoupStrainer('a', href=True)
+ARTICLE_STRAINER = SoupStrainer(_is_link_or_article)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-Rank Perzentil einer sortierten Liste"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+_registry_lock = threading.Lock()
+_sessions: Dict[str, requests.Session] = {}
+_rate_limiters: Dict[str, TokenBucket] = {}
+_host_metrics: Dict[str, HostMetrics] = {}
+_parse_metrics: Dict[str, ParseMetrics] = {}
+_page_cache = PageCache(PAGE_CACHE_MAX_ENTRIES)
+_gemini_client = None
+
+
+def _host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def _get_gemini_client():
+    """Gemini SDK-Client einmal pro Prozess erstellen (hält eigenen Connection-Pool)"""
+    global _gemini_client
+    with _registry_lock:
+        if _gemini_client is None:
+            from google import genai
+            _gemini_client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+        return _gemini_client
+
+
+def get_session(host: str) -> requests.Session:
+    """Gibt die prozessweit geteilte, gepoolte Session für einen Host zurück"""
+    with _registry_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            retry = CappedRetry(
+                total=MAX_RETRIES,
+                backoff_factor=RETRY_BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUS_CODES,
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                                  max_retries=retry)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[host] = session
+        return session
+
+
+def get_rate_limiter(host: str, source_name: str = '') -> TokenBucket:
+    """Gibt den Token-Bucket eines Hosts zurück (Limit aus SOURCE_RATE_LIMITS der ersten Quelle)"""
+    with _registry_lock:
+        limiter = _rate_limiters.get(host)
+        if limiter is None:
+            rate, capacity = SOURCE_RATE_LIMITS.get(source_name, DEFAULT_RATE_LIMIT)
+            limiter = TokenBucket(rate, capacity)
+            _rate_limiters[host] = limiter
+        return limiter
+
+
+def record_host_request(host: str, latency: float, bytes_received: int, error: bool = False, wait: float = 0.0):
+    """Erfasst Latenz und Bytes eines Requests für die Host-Metriken"""
+    with _registry_lock:
+        metrics = _host_metrics.get(host)
+        if metrics is None:
+            metrics = HostMetrics()
+            _host_metrics[host] = metrics
+    metrics.record(latency, bytes_received, error, wait)
+
+
+def get_host_metrics() -> Dict[str, Dict[str, Any]]:
+    """Liefert Latenz- und Durchsatz-Metriken aller bisher kontaktierten Hosts"""
+    with _registry_lock:
+        hosts = dict(_host_metrics)
+    return {host: metrics.snapshot() for host, metrics in sorted(hosts.items())}
+
+
+def _get_parse_metrics(site: str) -> ParseMetrics:
+    with _registry_lock:
+        metrics = _parse_metrics.get(site)
+        if metrics is None:
+            metrics = ParseMetrics()
+            _parse_metrics[site] = metrics
+        return metrics
+
+
+def record_parse_time(site: str, duration: float):
+    """Erfasst die HTML-Parse-Dauer einer gescrapten Website"""
+    _get_parse_metrics(site).record(duration)
+
+
+def record_not_modified(site: str):
+    """Erfasst einen 304-Treffer (Extraktion wiederverwendet, kein Parsing)"""
+    _get_parse_metrics(site).record_not_modified()
+
+
+def get_parse_metrics() -> Dict[str, Dict[str, Any]]:
+    """Liefert Parse-Zeiten und 304-Treffer aller gescrapten Websites"""
+    with _registry_lock:
+        sites = dict(_parse_metrics)
+    return {site: metrics.snapshot() for site, metrics in sorted(sites.items())}
+
+
+def log_host_metrics():
+    """Schreibt eine Zusammenfassung der Host- und Parse-Metriken ins Log"""
+    for host, stats in get_host_metrics().items():
+        logging.info(f"  🌐 {host}: {stats['requests']} Requests, Ø {stats['avg_latency_ms']}ms, "
+                     f"p95 {stats['p95_latency_ms']}ms, {stats['kb_per_second']} KB/s, "
+                     f"{stats['errors']} Fehler, {stats['throttle_wait_s']}s gedrosselt")
+    for site, stats in get_parse_metrics().items():
+        logging.info(f"  🧩 {site}: {stats['parses']}x geparst, Ø {stats['avg_parse_ms']}ms, "
+                     f"p95 {stats['p95_parse_ms']}ms, {stats['not_modified']}x unverändert (304)")
+
 
 class APIClientBase:
     """Basis-Klasse für alle API-Clients"""
@@ -26,14 +385,67 @@ class APIClientBase:
     def __init__(self, source_name: str, base_url: str):
         self.source_name = source_name
         self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'BruggenInnovation/1.0 Research Bot'
-        })
+        self.headers: Dict[str, str] = {}  # Client-spezifische Header (z.B. Authorization)
+        self.bytes_received = 0  # Summe der empfangenen Bytes (für Research-Telemetrie)
     
-    def _delay(self):
-        """Rate-Limiting zwischen Requests"""
-        time.sleep(REQUEST_DELAY)
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Führt einen Request über die gepoolte Host-Session aus (mit Rate-Limit und Metriken)"""
+        host = _host_of(url)
+        session = get_session(host)
+        wait = get_rate_limiter(host, self.source_name).acquire()
+        
+        headers = dict(self.headers)
+        headers.update(kwargs.pop('headers', None) or {})
+        kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+        
+        mode = replay_mode()
+        if mode != 'off':
+            key = http_key(method, url, kwargs.get('params'), kwargs.get('json') or kwargs.get('data'))
+        
+        start = time.perf_counter()
+        try:
+            if mode == 'replay':
+                response = self._replay_response(key, url, session, kwargs.get('timeout'))
+            else:
+                response = session.request(method, url, headers=headers, **kwargs)
+        except requests.RequestException:
+            record_host_request(host, time.perf_counter() - start, 0, error=True, wait=wait)
+            raise
+        
+        if mode == 'record':
+            save_http(key, method, url, kwargs.get('params'), response.status_code, dict(response.headers),
+                      response.content, time.perf_counter() - start)
+        
+        self.bytes_received += len(response.content)
+        record_host_request(host, time.perf_counter() - start, len(response.content),
+                            error=response.status_code >= 400, wait=wait)
+        return response
+    
+    def _replay_response(self, key: str, url: str, session: requests.Session, timeout) -> requests.Response:
+        """Antwort aus der Cassette - über den lokalen Replay-Server oder direkt aus der Datei"""
+        server = replay_server_url()
+        if server:
+            return session.get(f"{server}/cassette/{key}", timeout=timeout)
+        
+        response = requests.Response()
+        response.url = url
+        cassette = load_http(key)
+        if cassette is None:
+            response.status_code = 404
+            response._content = b''
+            return response
+        status, headers, body, latency = cassette
+        time.sleep(replay_delay(latency))
+        response.status_code = status
+        response.headers.update(headers)
+        response._content = body
+        return response
+    
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        return self._request('GET', url, **kwargs)
+    
+    def _post(self, url: str, **kwargs) -> requests.Response:
+        return self._request('POST', url, **kwargs)
     
     def search(self, keywords: List[str], limit: int = 25) -> List[Dict]:
         """Muss von Subklassen implementiert werden"""
@@ -48,38 +460,42 @@ class OpenFoodFactsClient(APIClientBase):
     def __init__(self):
         super().__init__("Open Food Facts", "https://world.openfoodfacts.org")
     
+    def _search_request(self, keywords: List[str], limit: int):
+        """URL und Parameter der Produktsuche"""
+        params = {
+            'search_terms': " ".join(keywords[:2]),
+            'json': 1,
+            'page_size': min(limit, 15),  # Max 15 für Performance
+            'action': 'process'
+        }
+        return f"{self.base_url}/cgi/search.pl", params
+    
+    def _parse_products(self, data: Dict, limit: int) -> List[Dict]:
+        results = []
+        for product in data.get('products', [])[:limit]:
+            results.append({
+                'title': product.get('product_name', 'Unknown Product'),
+                'description': f"{product.get('brands', '')} - {product.get('categories', '')}",
+                'url': f"{self.base_url}/product/{product.get('code', '')}",
+                'data': {
+                    'ingredients': product.get('ingredients_text', ''),
+                    'nutrition_grade': product.get('nutrition_grade_fr', ''),
+                    'categories': product.get('categories', '')
+                }
+            })
+        return results
+    
     def search(self, keywords: List[str], limit: int = 25) -> List[Dict]:
         results = []
         start_time = time.time()
         try:
-            search_term = " ".join(keywords[:2])
-            url = f"{self.base_url}/cgi/search.pl"
-            params = {
-                'search_terms': search_term,
-                'json': 1,
-                'page_size': min(limit, 15),  # Max 15 für Performance
-                'action': 'process'
-            }
+            url, params = self._search_request(keywords, limit)
             
-            logging.info(f"🔎 Open Food Facts: Suche nach '{search_term}'...")
-            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
-            self._delay()
+            logging.info(f"🔎 Open Food Facts: Suche nach '{params['search_terms']}'...")
+            response = self._get(url, params=params, timeout=REQUEST_TIMEOUT)
             
             if response.status_code == 200:
-                data = response.json()
-                products = data.get('products', [])
-                
-                for product in products[:limit]:
-                    results.append({
-                        'title': product.get('product_name', 'Unknown Product'),
-                        'description': f"{product.get('brands', '')} - {product.get('categories', '')}",
-                        'url': f"{self.base_url}/product/{product.get('code', '')}",
-                        'data': {
-                            'ingredients': product.get('ingredients_text', ''),
-                            'nutrition_grade': product.get('nutrition_grade_fr', ''),
-                            'categories': product.get('categories', '')
-                        }
-                    })
+                results = self._parse_products(response.json(), limit)
                 
                 elapsed = time.time() - start_time
                 logging.info(f"✓ Open Food Facts: {len(results)} Produkte gefunden in {elapsed:.1f}s")
@@ -99,56 +515,60 @@ class PubMedClient(APIClientBase):
     def __init__(self):
         super().__init__("PubMed", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
     
+    def _esearch_request(self, keywords: List[str], limit: int):
+        """Schritt 1: Suche nach IDs"""
+        params = {
+            'db': 'pubmed',
+            'term': " AND ".join([f"{kw}[Title/Abstract]" for kw in keywords[:3]]),
+            'retmax': limit,
+            'retmode': 'json',
+            'sort': 'relevance'
+        }
+        return f"{self.base_url}/esearch.fcgi", params
+    
+    def _esummary_request(self, id_list: List[str], limit: int):
+        """Schritt 2: Hole Details für IDs"""
+        params = {
+            'db': 'pubmed',
+            'id': ','.join(id_list[:limit]),
+            'retmode': 'json'
+        }
+        return f"{self.base_url}/esummary.fcgi", params
+    
+    def _parse_summaries(self, data: Dict, id_list: List[str], limit: int) -> List[Dict]:
+        results = []
+        articles = data.get('result', {})
+        for pmid in id_list[:limit]:
+            article = articles.get(pmid, {})
+            if article:
+                results.append({
+                    'title': article.get('title', 'Unknown Title'),
+                    'description': article.get('source', ''),
+                    'url': f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
+                    'data': {
+                        'authors': ', '.join([a.get('name', '') for a in article.get('authors', [])[:3]]),
+                        'pubdate': article.get('pubdate', ''),
+                        'source': article.get('source', '')
+                    }
+                })
+        return results
+    
     def search(self, keywords: List[str], limit: int = 25) -> List[Dict]:
         results = []
         try:
-            # Schritt 1: Suche nach IDs
-            search_term = " AND ".join([f"{kw}[Title/Abstract]" for kw in keywords[:3]])
-            search_url = f"{self.base_url}/esearch.fcgi"
-            search_params = {
-                'db': 'pubmed',
-                'term': search_term,
-                'retmax': limit,
-                'retmode': 'json',
-                'sort': 'relevance'
-            }
-            
-            search_response = self.session.get(search_url, params=search_params, timeout=10)
-            self._delay()
+            search_url, search_params = self._esearch_request(keywords, limit)
+            search_response = self._get(search_url, params=search_params, timeout=10)
             
             if search_response.status_code == 200:
                 search_data = search_response.json()
                 id_list = search_data.get('esearchresult', {}).get('idlist', [])
                 
                 if id_list:
-                    # Schritt 2: Hole Details für IDs
-                    fetch_url = f"{self.base_url}/esummary.fcgi"
-                    fetch_params = {
-                        'db': 'pubmed',
-                        'id': ','.join(id_list[:limit]),
-                        'retmode': 'json'
-                    }
-                    
-                    fetch_response = self.session.get(fetch_url, params=fetch_params, timeout=10)
-                    self._delay()
+                    fetch_url, fetch_params = self._esummary_request(id_list, limit)
+                    fetch_response = self._get(fetch_url, params=fetch_params, timeout=10)
                     
                     if fetch_response.status_code == 200:
-                        fetch_data = fetch_response.json()
-                        articles = fetch_data.get('result', {})
-                        
-                        for pmid in id_list[:limit]:
-                            article = articles.get(pmid, {})
-                            if article:
-                                results.append({
-                                    'title': article.get('title', 'Unknown Title'),
-                                    'description': article.get('source', ''),
-                                    'url': f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
-                                    'data': {
-                                        'authors': ', '.join([a.get('name', '') for a in article.get('authors', [])[:3]]),
-                                        'pubdate': article.get('pubdate', ''),
-                                        'source': article.get('source', '')
-                                    }
-                                })
+                        results = self._parse_summaries(fetch_response.json(), id_list, limit)
                 
                 logging.info(f"✓ PubMed: {len(results)} Publikationen gefunden")
             else:
@@ -159,7 +579,6 @@ class PubMedClient(APIClientBase):
         
         return results
 
-
 class GoogleTrendsClient(APIClientBase):
     """Google Trends - Scraping via pytrends oder Web"""
     
@@ -198,7 +617,7 @@ class PerplexityClient(APIClientBase):
         super().__init__("Perplexity API", "https://api.perplexity.ai")
         self.api_key = os.environ.get("PERPLEXITY_API_KEY", "")
         if self.api_key:
-            self.session.headers.update({'Authorization': f'Bearer {self.api_key}'})
+            self.headers['Authorization'] = f'Bearer {self.api_key}'
     
     def search(self, keywords: List[str], limit: int = 25) -> List[Dict]:
         results = []
@@ -219,12 +638,11 @@ class PerplexityClient(APIClientBase):
                 ]
             }
             
-            response = self.session.post(
+            response = self._post(
                 f"{self.base_url}/chat/completions",
                 json=payload,
                 timeout=30
             )
-            self._delay()
             
             if response.status_code == 200:
                 data = response.json()
@@ -257,21 +675,21 @@ class GeminiDeepResearchClient(APIClientBase):
     
     def __init__(self):
         super().__init__("Gemini API", "https://generativelanguage.googleapis.com")
-        from google import genai
-        self.gemini_client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+        self.gemini_client = _get_gemini_client()
     
     def search(self, keywords: List[str], limit: int = 25) -> List[Dict]:
         results = []
         try:
             query = f"Conduct deep research on food industry trends related to: {', '.join(keywords[:3])}. Include latest market data, consumer insights, and scientific research."
             
-            response = self.gemini_client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=query
+            content = replay_llm(
+                "gemini_deep_research", "gemini-2.5-flash", None, query, None,
+                lambda: self.gemini_client.models.generate_content(
+                    model="gemini-2.5-flash",
+                    contents=query
+                ).text
             )
             
-            content = response.text
-            
             results.append({
                 'title': f"Gemini Deep Research: {', '.join(keywords[:2])}",
                 'description': content[:300] + '...' if len(content) > 300 else content,
@@ -298,34 +716,36 @@ class EurostatClient(APIClientBase):
     def __init__(self):
         super().__init__("Eurostat", "https://ec.europa.eu/eurostat/api/dissemination")
     
+    def _search_request(self, keywords: List[str], limit: int):
+        """Suche nach relevanten Datensätzen"""
+        params = {
+            'query': ' '.join(keywords[:2]),
+            'lang': 'en'
+        }
+        return f"{self.base_url}/catalogue/search", params
+    
+    def _parse_datasets(self, data: Dict, limit: int) -> List[Dict]:
+        results = []
+        for dataset in data.get('datasets', [])[:limit]:
+            results.append({
+                'title': dataset.get('title', 'Unknown Dataset'),
+                'description': dataset.get('description', ''),
+                'url': f"https://ec.europa.eu/eurostat/databrowser/view/{dataset.get('code', '')}",
+                'data': {
+                    'code': dataset.get('code', ''),
+                    'last_update': dataset.get('lastUpdate', '')
+                }
+            })
+        return results
+    
     def search(self, keywords: List[str], limit: int = 25) -> List[Dict]:
         results = []
         try:
-            # Suche nach relevanten Datensätzen
-            search_url = f"{self.base_url}/catalogue/search"
-            params = {
-                'query': ' '.join(keywords[:2]),
-                'lang': 'en'
-            }
-            
-            response = self.session.get(search_url, params=params, timeout=10)
-            self._delay()
+            search_url, params = self._search_request(keywords, limit)
+            response = self._get(search_url, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                datasets = data.get('datasets', [])
-                
-                for dataset in datasets[:limit]:
-                    results.append({
-                        'title': dataset.get('title', 'Unknown Dataset'),
-                        'description': dataset.get('description', ''),
-                        'url': f"https://ec.europa.eu/eurostat/databrowser/view/{dataset.get('code', '')}",
-                        'data': {
-                            'code': dataset.get('code', ''),
-                            'last_update': dataset.get('lastUpdate', '')
-                        }
-                    })
-                
+                results = self._parse_datasets(response.json(), limit)
                 logging.info(f"✓ Eurostat: {len(results)} Datensätze gefunden")
             else:
                 logging.warning(f"Eurostat API error: {response.status_code}")
@@ -343,35 +763,37 @@ class USDAClient(APIClientBase):
         super().__init__("USDA FoodData Central", "https://api.nal.usda.gov/fdc/v1")
         self.api_key = os.environ.get("USDA_API_KEY", "DEMO_KEY")
     
+    def _search_request(self, keywords: List[str], limit: int):
+        params = {
+            'query': ' '.join(keywords[:2]),
+            'pageSize': limit,
+            'api_key': self.api_key
+        }
+        return f"{self.base_url}/foods/search", params
+    
+    def _parse_foods(self, data: Dict, limit: int) -> List[Dict]:
+        results = []
+        for food in data.get('foods', [])[:limit]:
+            results.append({
+                'title': food.get('description', 'Unknown Food'),
+                'description': f"{food.get('brandOwner', '')} - {food.get('dataType', '')}",
+                'url': f"https://fdc.nal.usda.gov/fdc-app.html#/food-details/{food.get('fdcId', '')}",
+                'data': {
+                    'fdcId': food.get('fdcId', ''),
+                    'dataType': food.get('dataType', ''),
+                    'nutrients': food.get('foodNutrients', [])[:5]
+                }
+            })
+        return results
+    
     def search(self, keywords: List[str], limit: int = 25) -> List[Dict]:
         results = []
         try:
-            search_url = f"{self.base_url}/foods/search"
-            params = {
-                'query': ' '.join(keywords[:2]),
-                'pageSize': limit,
-                'api_key': self.api_key
-            }
-            
-            response = self.session.get(search_url, params=params, timeout=10)
-            self._delay()
+            search_url, params = self._search_request(keywords, limit)
+            response = self._get(search_url, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                foods = data.get('foods', [])
-                
-                for food in foods[:limit]:
-                    results.append({
-                        'title': food.get('description', 'Unknown Food'),
-                        'description': f"{food.get('brandOwner', '')} - {food.get('dataType', '')}",
-                        'url': f"https://fdc.nal.usda.gov/fdc-app.html#/food-details/{food.get('fdcId', '')}",
-                        'data': {
-                            'fdcId': food.get('fdcId', ''),
-                            'dataType': food.get('dataType', ''),
-                            'nutrients': food.get('foodNutrients', [])[:5]
-                        }
-                    })
-                
+                results = self._parse_foods(response.json(), limit)
                 logging.info(f"✓ USDA: {len(results)} Lebensmittel gefunden")
             else:
                 logging.warning(f"USDA API error: {response.status_code}")
@@ -382,55 +804,100 @@ class USDAClient(APIClientBase):
         return results
 
 
-class StatisticalDBGenericClient(APIClientBase):
+class ScrapingClientBase(APIClientBase):
+    """
+    Basis für Web-Scraper: Conditional GET auf die Hauptseite und Wiederverwendung der
+    keyword-unabhängigen Extraktion bei 304 Not Modified
+    """
+    
+    def _parse_page(self, content: bytes) -> Dict[str, Any]:
+        """Keyword-unabhängige Extraktion der Seite - muss von Subklassen implementiert werden"""
+        raise NotImplementedError
+    
+    def _page_headers(self) -> Dict[str, str]:
+        return _page_cache.validators(self.base_url)
+    
+    def _page_extraction(self, response) -> Optional[Dict[str, Any]]:
+        """Extraktion aus einer 200- oder 304-Antwort (None bei Fehlern oder verdrängtem Cache-Eintrag)"""
+        if response.status_code == 304:
+            extraction = _page_cache.extraction(self.base_url)
+            if extraction is not None:
+                record_not_modified(self.source_name)
+            return extraction
+        if response.status_code != 200:
+            return None
+        
+        start = time.perf_counter()
+        extraction = self._parse_page(response.content)
+        record_parse_time(self.source_name, time.perf_counter() - start)
+        _page_cache.store(self.base_url, response.headers, extraction)
+        return extraction
+    
+    def _fetch_extraction(self):
+        """Lädt die Hauptseite (conditional) und gibt (extraction, status_code) zurück"""
+        response = self._get(self.base_url, headers=self._page_headers(), timeout=10)
+        extraction = self._page_extraction(response)
+        if extraction is None and response.status_code == 304:
+            # Eintrag zwischenzeitlich verdrängt - ohne Validatoren neu laden
+            response = self._get(self.base_url, timeout=10)
+            extraction = self._page_extraction(response)
+        return extraction, response.status_code
+    
+    def _absolute_url(self, href: str) -> str:
+        return href if href.startswith('http') else self.base_url + href
+    
+    def _matching_links(self, links: List[Dict[str, str]], keywords: List[str], limit: int) -> List[Dict[str, str]]:
+        """Links, deren Text eines der Keywords enthält"""
+        keyword_lower = [k.lower() for k in keywords]
+        matches = []
+        for link in links:
+            text_lower = link['text'].lower()
+            if link['href'] and any(kw in text_lower for kw in keyword_lower):
+                matches.append({'title': link['text'], 'url': self._absolute_url(link['href'])})
+                if len(matches) >= limit:
+                    break
+        return matches
+
+
+def _parse_links(soup: BeautifulSoup) -> List[Dict[str, str]]:
+    return [{'text': link.get_text().strip(), 'href': link.get('href', '')}
+            for link in soup.find_all('a', href=True, limit=SCRAPE_SCAN_LIMIT)]
+
+
+class StatisticalDBGenericClient(ScrapingClientBase):
     """Generic Client für statistische Datenbanken mit Web-Scraping Fallback"""
     
+    def _parse_page(self, content: bytes) -> Dict[str, Any]:
+        """Sammelt die ersten Links der Hauptseite"""
+        soup = BeautifulSoup(content, HTML_PARSER, parse_only=LINK_STRAINER)
+        return {'links': _parse_links(soup)}
+    
+    def _select_links(self, extraction: Dict[str, Any], keywords: List[str], limit: int) -> List[Dict]:
+        """Sucht relevante Links/Daten in der Extraktion der Hauptseite"""
+        results = []
+        for link_data in self._matching_links(extraction['links'], keywords, limit):
+            results.append({
+                'title': f"{self.source_name}: {link_data['title']}",
+                'description': f"Statistical data from {self.source_name}",
+                'url': link_data['url'],
+                'data': {
+                    'source': self.source_name,
+                    'method': 'web_scraping'
+                }
+            })
+        return results
+    
     def search(self, keywords: List[str], limit: int = 25) -> List[Dict]:
         results = []
         try:
             # Versuche, die Hauptseite zu scrapen
-            response = self.session.get(self.base_url, timeout=10)
-            self._delay()
+            extraction, status_code = self._fetch_extraction()
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Suche nach relevanten Links/Daten
-                links = soup.find_all('a', href=True)
-                
-                keyword_lower = [k.lower() for k in keywords]
-                relevant_links = []
-                
-                for link in links[:100]:
-                    link_text = link.get_text().lower()
-                    href = link.get('href', '')
-                    
-                    # Prüfe, ob Keywords im Link-Text vorkommen
-                    if any(kw in link_text for kw in keyword_lower) and href:
-                        if not href.startswith('http'):
-                            href = self.base_url + href
-                        relevant_links.append({
-                            'title': link.get_text().strip(),
-                            'url': href
-                        })
-                    
-                    if len(relevant_links) >= limit:
-                        break
-                
-                for link_data in relevant_links[:limit]:
-                    results.append({
-                        'title': f"{self.source_name}: {link_data['title']}",
-                        'description': f"Statistical data from {self.source_name}",
-                        'url': link_data['url'],
-                        'data': {
-                            'source': self.source_name,
-                            'method': 'web_scraping'
-                        }
-                    })
-                
+            if extraction is not None:
+                results = self._select_links(extraction, keywords, limit)
                 logging.info(f"✓ {self.source_name}: {len(results)} Datenpunkte gefunden")
             else:
-                logging.warning(f"{self.source_name} web request error: {response.status_code}")
+                logging.warning(f"{self.source_name} web request error: {status_code}")
         
         except Exception as e:
             logging.error(f"{self.source_name} error: {e}")
@@ -440,77 +907,70 @@ class StatisticalDBGenericClient(APIClientBase):
 
 # ==================== INDUSTRY WEBSITES ====================
 
-class IndustryWebsiteClient(APIClientBase):
+class IndustryWebsiteClient(ScrapingClientBase):
     """Generic Client für Industry Websites mit Scraping"""
     
+    def _parse_page(self, content: bytes) -> Dict[str, Any]:
+        """Sammelt Artikel-Container der Startseite, Fallback: alle Links"""
+        soup = BeautifulSoup(content, HTML_PARSER, parse_only=ARTICLE_STRAINER)
+        
+        articles = []
+        for article in soup.find_all(['article', 'div'], class_=ARTICLE_CLASS_RE, limit=SCRAPE_SCAN_LIMIT):
+            title_elem = article.find(['h1', 'h2', 'h3', 'h4'])
+            link_elem = article.find('a', href=True)
+            articles.append({
+                'title': title_elem.get_text().strip() if title_elem else None,
+                'href': link_elem.get('href', '') if link_elem else None
+            })
+        
+        return {'articles': articles, 'links': [] if articles else _parse_links(soup)}
+    
+    def _select_articles(self, extraction: Dict[str, Any], keywords: List[str], limit: int) -> List[Dict]:
+        """Artikel der Startseite, Fallback: Links mit Keywords"""
+        results = []
+        
+        if not extraction['articles']:
+            for link_data in self._matching_links(extraction['links'], keywords, limit):
+                results.append({
+                    'title': link_data['title'],
+                    'description': f"Industry news from {self.source_name}",
+                    'url': link_data['url'],
+                    'data': {
+                        'source': self.source_name,
+                        'type': 'news_article'
+                    }
+                })
+        else:
+            for article in extraction['articles'][:limit]:
+                if article['title'] is not None and article['href'] is not None:
+                    results.append({
+                        'title': article['title'],
+                        'description': f"Industry article from {self.source_name}",
+                        'url': self._absolute_url(article['href']),
+                        'data': {
+                            'source': self.source_name,
+                            'type': 'news_article'
+                        }
+                    })
+        return results
+    
     def search(self, keywords: List[str], limit: int = 25) -> List[Dict]:
         results = []
         try:
             # Versuche RSS Feed oder Scraping
-            response = self.session.get(self.base_url, timeout=10)
-            self._delay()
+            extraction, status_code = self._fetch_extraction()
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Suche nach Artikeln
-                articles = soup.find_all(['article', 'div'], class_=lambda x: x and ('article' in x.lower() or 'post' in x.lower()))
-                
-                if not articles:
-                    # Fallback: Suche nach Links mit Keywords
-                    links = soup.find_all('a', href=True)
-                    keyword_lower = [k.lower() for k in keywords]
-                    
-                    for link in links[:100]:
-                        link_text = link.get_text().lower()
-                        href = link.get('href', '')
-                        
-                        if any(kw in link_text for kw in keyword_lower) and href:
-                            if not href.startswith('http'):
-                                href = self.base_url + href
-                            
-                            results.append({
-                                'title': link.get_text().strip(),
-                                'description': f"Industry news from {self.source_name}",
-                                'url': href,
-                                'data': {
-                                    'source': self.source_name,
-                                    'type': 'news_article'
-                                }
-                            })
-                            
-                            if len(results) >= limit:
-                                break
-                else:
-                    for article in articles[:limit]:
-                        title_elem = article.find(['h1', 'h2', 'h3', 'h4'])
-                        link_elem = article.find('a', href=True)
-                        
-                        if title_elem and link_elem:
-                            href = link_elem.get('href', '')
-                            if not href.startswith('http'):
-                                href = self.base_url + href
-                            
-                            results.append({
-                                'title': title_elem.get_text().strip(),
-                                'description': f"Industry article from {self.source_name}",
-                                'url': href,
-                                'data': {
-                                    'source': self.source_name,
-                                    'type': 'news_article'
-                                }
-                            })
-                
+            if extraction is not None:
+                results = self._select_articles(extraction, keywords, limit)
                 logging.info(f"✓ {self.source_name}: {len(results)} Artikel gefunden")
             else:
-                logging.warning(f"{self.source_name} web request error: {response.status_code}")
+                logging.warning(f"{self.source_name} web request error: {status_code}")
         
         except Exception as e:
             logging.error(f"{self.source_name} error: {e}")
         
         return results
 
-
 # ==================== CLIENT FACTORY ====================
 
 def get_api_client(source: Dict) -> APIClientBase:
@@ -549,14 +1009,18 @@ def get_api_client(source: Dict) -> APIClientBase:
         return StatisticalDBGenericClient(source_name, source_url)
 
 
-def fetch_data_from_source(source: Dict, keywords: List[str], limit: int = 25) -> List[Dict]:
+def fetch_data_from_source(source: Dict, keywords: List[str], limit: int = 25,
+                           stats: Optional[Dict[str, Any]] = None) -> List[Dict]:
     """
     Hauptfunktion zum Abrufen von Daten aus einer Quelle
     Verwendet den passenden API-Client für die Quelle
+    Optional: stats-Dict wird mit 'bytes_received' befüllt
     """
     try:
         client = get_api_client(source)
         results = client.search(keywords, limit)
+        if stats is not None:
+            stats['bytes_received'] = client.bytes_received
         return results
     except Exception as e:
         logging.error(f"Error fetching data from {source.get('name', 'Unknown')}: {e}")
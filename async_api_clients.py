@@ -0,0 +1,382 @@
+"""
+Asynchrone API-Clients für das Deep Research System (aiohttp)
+Spiegelt die blockierenden Clients aus api_clients.py:
+- Open Food Facts, PubMed, Eurostat, USDA
+- Statistische Datenbanken (Web-Scraping)
+- Industry Websites (Web-Scraping)
+
+fetch_many() ruft alle Quellen eines Plans parallel ab - mit globalem
+Concurrency-Limit und Timeout pro Quelle. Die Gesamtdauer entspricht damit
+ungefähr der langsamsten Quelle statt der Summe aller Quellen.
+Rate-Limits und Host-Metriken werden mit den synchronen Clients geteilt.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Any, Optional
+
+import aiohttp
+
+from api_clients import (
+    OpenFoodFactsClient, PubMedClient, EurostatClient, USDAClient,
+    StatisticalDBGenericClient, IndustryWebsiteClient,
+    get_api_client, fetch_data_from_source, get_rate_limiter, record_host_request, _host_of,
+    REQUEST_TIMEOUT, POOL_MAXSIZE, MAX_RETRIES, RETRY_BACKOFF_FACTOR, RETRY_STATUS_CODES,
+    RETRY_AFTER_MAX, DEFAULT_HEADERS
+)
+from utils.research_replay import replay_mode, replay_server_url, http_key, save_http, load_http, replay_delay
+
+# Max. gleichzeitig laufende Quellen und Timeout pro Quelle (inkl. Retries)
+MAX_CONCURRENCY = 12
+SOURCE_TIMEOUT = 20
+STOP_POLL_INTERVAL = 0.5  # Sekunden zwischen Prüfungen des Abbruch-Signals
+
+
+class AsyncResponse:
+    """Gepufferte Antwort mit der von den Parse-Helfern erwarteten Schnittstelle"""
+
+    def __init__(self, status_code: int, content: bytes, headers: Dict[str, str]):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+def _retry_delay(attempt: int, response: Optional[AsyncResponse]) -> float:
+    """Wartezeit vor dem nächsten Versuch: Retry-After (begrenzt) oder exponentieller Backoff"""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), RETRY_AFTER_MAX)
+    return RETRY_BACKOFF_FACTOR * (2 ** attempt)
+
+
+class AsyncRequestMixin:
+    """Async-Gegenstück zu APIClientBase._request (gleiche Rate-Limits, Retries und Metriken)"""
+
+    session: aiohttp.ClientSession = None
+
+    def bind(self, session: aiohttp.ClientSession) -> 'AsyncRequestMixin':
+        self.session = session
+        return self
+
+    async def _arequest(self, method: str, url: str, **kwargs) -> AsyncResponse:
+        host = _host_of(url)
+        limiter = get_rate_limiter(host, self.source_name)
+
+        headers = dict(self.headers)
+        headers.update(kwargs.pop('headers', None) or {})
+        timeout = aiohttp.ClientTimeout(total=kwargs.pop('timeout', REQUEST_TIMEOUT))
+
+        mode = replay_mode()
+        if mode != 'off':
+            key = http_key(method, url, kwargs.get('params'), kwargs.get('json') or kwargs.get('data'))
+            if mode == 'replay':
+                start = time.perf_counter()
+                response = await self._areplay_response(key, timeout)
+                self.bytes_received += len(response.content)
+                record_host_request(host, time.perf_counter() - start, len(response.content),
+                                    error=response.status_code >= 400)
+                return response
+
+        for attempt in range(MAX_RETRIES + 1):
+            wait = limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            start = time.perf_counter()
+            try:
+                async with self.session.request(method, url, headers=headers, timeout=timeout, **kwargs) as resp:
+                    body = await resp.read()
+                    response = AsyncResponse(resp.status, body, dict(resp.headers))
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                record_host_request(host, time.perf_counter() - start, 0, error=True, wait=wait)
+                if attempt >= MAX_RETRIES:
+                    raise
+                await asyncio.sleep(_retry_delay(attempt, None))
+                continue
+
+            self.bytes_received += len(response.content)
+            record_host_request(host, time.perf_counter() - start, len(response.content),
+                                error=response.status_code >= 400, wait=wait)
+            if response.status_code in RETRY_STATUS_CODES and attempt < MAX_RETRIES:
+                await asyncio.sleep(_retry_delay(attempt, response))
+                continue
+            if mode == 'record':
+                save_http(key, method, url, kwargs.get('params'), response.status_code, response.headers,
+                          response.content, time.perf_counter() - start)
+            return response
+
+    async def _areplay_response(self, key: str, timeout) -> AsyncResponse:
+        """Antwort aus der Cassette - über den lokalen Replay-Server oder direkt aus der Datei"""
+        server = replay_server_url()
+        if server:
+            async with self.session.get(f"{server}/cassette/{key}", timeout=timeout) as resp:
+                return AsyncResponse(resp.status, await resp.read(), dict(resp.headers))
+
+        cassette = load_http(key)
+        if cassette is None:
+            return AsyncResponse(404, b'', {})
+        status, headers, body, latency = cassette
+        await asyncio.sleep(replay_delay(latency))
+        return AsyncResponse(status, body, headers)
+
+    async def _aget(self, url: str, **kwargs) -> AsyncResponse:
+        return await self._arequest('GET', url, **kwargs)
+
+    async def asearch(self, keywords: List[str], limit: int = 25) -> List[Dict]:
+        """Muss von Subklassen implementiert werden"""
+        raise NotImplementedError
+
+
+# ==================== ALLGEMEINE QUELLEN ====================
+
+class AsyncOpenFoodFactsClient(AsyncRequestMixin, OpenFoodFactsClient):
+
+    async def asearch(self, keywords: List[str], limit: int = 25) -> List[Dict]:
+        results = []
+        try:
+            url, params = self._search_request(keywords, limit)
+            response = await self._aget(url, params=params, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 200:
+                results = self._parse_products(response.json(), limit)
+                logging.info(f"✓ Open Food Facts (async): {len(results)} Produkte gefunden")
+            else:
+                logging.warning(f"Open Food Facts API error: {response.status_code}")
+        except Exception as e:
+            logging.error(f"❌ Open Food Facts error: {e}")
+        return results
+
+
+class AsyncPubMedClient(AsyncRequestMixin, PubMedClient):
+
+    async def asearch(self, keywords: List[str], limit: int = 25) -> List[Dict]:
+        results = []
+        try:
+            search_url, search_params = self._esearch_request(keywords, limit)
+            search_response = await self._aget(search_url, params=search_params, timeout=10)
+
+            if search_response.status_code == 200:
+                id_list = search_response.json().get('esearchresult', {}).get('idlist', [])
+                if id_list:
+                    fetch_url, fetch_params = self._esummary_request(id_list, limit)
+                    fetch_response = await self._aget(fetch_url, params=fetch_params, timeout=10)
+                    if fetch_response.status_code == 200:
+                        results = self._parse_summaries(fetch_response.json(), id_list, limit)
+                logging.info(f"✓ PubMed (async): {len(results)} Publikationen gefunden")
+            else:
+                logging.warning(f"PubMed API error: {search_response.status_code}")
+        except Exception as e:
+            logging.error(f"PubMed error: {e}")
+        return results
+
+
+# ==================== STATISTISCHE DATENBANKEN ====================
+
+class AsyncEurostatClient(AsyncRequestMixin, EurostatClient):
+
+    async def asearch(self, keywords: List[str], limit: int = 25) -> List[Dict]:
+        results = []
+        try:
+            search_url, params = self._search_request(keywords, limit)
+            response = await self._aget(search_url, params=params, timeout=10)
+            if response.status_code == 200:
+                results = self._parse_datasets(response.json(), limit)
+                logging.info(f"✓ Eurostat (async): {len(results)} Datensätze gefunden")
+            else:
+                logging.warning(f"Eurostat API error: {response.status_code}")
+        except Exception as e:
+            logging.error(f"Eurostat error: {e}")
+        return results
+
+
+class AsyncUSDAClient(AsyncRequestMixin, USDAClient):
+
+    async def asearch(self, keywords: List[str], limit: int = 25) -> List[Dict]:
+        results = []
+        try:
+            search_url, params = self._search_request(keywords, limit)
+            response = await self._aget(search_url, params=params, timeout=10)
+            if response.status_code == 200:
+                results = self._parse_foods(response.json(), limit)
+                logging.info(f"✓ USDA (async): {len(results)} Lebensmittel gefunden")
+            else:
+                logging.warning(f"USDA API error: {response.status_code}")
+        except Exception as e:
+            logging.error(f"USDA error: {e}")
+        return results
+
+
+class AsyncScrapingMixin(AsyncRequestMixin):
+    """Conditional GET der Hauptseite für die Scraper (siehe ScrapingClientBase)"""
+
+    async def _afetch_extraction(self):
+        response = await self._aget(self.base_url, headers=self._page_headers(), timeout=10)
+        # HTML-Parsing ist CPU-gebunden und läuft daher im Thread-Pool
+        extraction = await asyncio.to_thread(self._page_extraction, response)
+        if extraction is None and response.status_code == 304:
+            response = await self._aget(self.base_url, timeout=10)
+            extraction = await asyncio.to_thread(self._page_extraction, response)
+        return extraction, response.status_code
+
+
+class AsyncStatisticalDBGenericClient(AsyncScrapingMixin, StatisticalDBGenericClient):
+
+    async def asearch(self, keywords: List[str], limit: int = 25) -> List[Dict]:
+        results = []
+        try:
+            extraction, status_code = await self._afetch_extraction()
+            if extraction is not None:
+                results = self._select_links(extraction, keywords, limit)
+                logging.info(f"✓ {self.source_name} (async): {len(results)} Datenpunkte gefunden")
+            else:
+                logging.warning(f"{self.source_name} web request error: {status_code}")
+        except Exception as e:
+            logging.error(f"{self.source_name} error: {e}")
+        return results
+
+
+# ==================== INDUSTRY WEBSITES ====================
+
+class AsyncIndustryWebsiteClient(AsyncScrapingMixin, IndustryWebsiteClient):
+
+    async def asearch(self, keywords: List[str], limit: int = 25) -> List[Dict]:
+        results = []
+        try:
+            extraction, status_code = await self._afetch_extraction()
+            if extraction is not None:
+                results = self._select_articles(extraction, keywords, limit)
+                logging.info(f"✓ {self.source_name} (async): {len(results)} Artikel gefunden")
+            else:
+                logging.warning(f"{self.source_name} web request error: {status_code}")
+        except Exception as e:
+            logging.error(f"{self.source_name} error: {e}")
+        return results
+
+
+# ==================== CLIENT FACTORY ====================
+
+ASYNC_CLIENT_CLASSES = {
+    OpenFoodFactsClient: AsyncOpenFoodFactsClient,
+    PubMedClient: AsyncPubMedClient,
+    EurostatClient: AsyncEurostatClient,
+    USDAClient: AsyncUSDAClient,
+    StatisticalDBGenericClient: AsyncStatisticalDBGenericClient,
+    IndustryWebsiteClient: AsyncIndustryWebsiteClient,
+}
+
+
+def get_async_client(source: Dict, session: aiohttp.ClientSession) -> Optional[AsyncRequestMixin]:
+    """
+    Liefert den Async-Client für eine Quelle (gleiche Auswahl wie get_api_client)
+    oder None, wenn es für die Quelle keine Async-Variante gibt
+    """
+    client_cls = ASYNC_CLIENT_CLASSES.get(type(get_api_client(source)))
+    if client_cls is None:
+        return None
+
+    if issubclass(client_cls, (StatisticalDBGenericClient, IndustryWebsiteClient)):
+        client = client_cls(source.get('name', ''), source.get('url', ''))
+    else:
+        client = client_cls()
+    return client.bind(session)
+
+
+async def _fetch_one(session: aiohttp.ClientSession, source: Dict, keywords: List[str], limit: int,
+                     stats: Dict[str, Any]) -> List[Dict]:
+    client = get_async_client(source, session)
+    if client is None:
+        # Quellen ohne Async-Client (z.B. Perplexity, Gemini) laufen im Thread-Pool
+        return await asyncio.to_thread(fetch_data_from_source, source, keywords, limit, stats)
+    stats['client'] = client
+    return await client.asearch(keywords, limit)
+
+
+async def fetch_many(sources: List[Dict], keywords: List[str], limit: int = 10,
+                     max_concurrency: int = MAX_CONCURRENCY,
+                     source_timeout: float = SOURCE_TIMEOUT,
+                     total_timeout: Optional[float] = None,
+                     stop_event: Optional[threading.Event] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Ruft alle Quellen parallel ab
+
+    total_timeout: Gesamt-Zeitbudget; danach werden offene Quellen abgebrochen
+    stop_event: Abbruch-Signal (z.B. Job-Cancel); offene Quellen werden abgebrochen, sobald es gesetzt ist
+
+    Returns:
+        Dict Quellenname -> {'results': [...], 'error': str|None, 'elapsed': Sekunden, 'bytes_received': int,
+                             'skipped': True bei Abbruch durch Zeitbudget/Stop-Signal}
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=POOL_MAXSIZE, ttl_dns_cache=300)
+
+    async with aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS) as session:
+
+        async def run(source: Dict):
+            source_name = source.get('name', 'Unknown')
+            async with semaphore:
+                start = time.perf_counter()
+                error = None
+                stats: Dict[str, Any] = {}
+                try:
+                    results = await asyncio.wait_for(_fetch_one(session, source, keywords, limit, stats),
+                                                     timeout=source_timeout)
+                except asyncio.TimeoutError:
+                    results = []
+                    error = f"Timeout nach {source_timeout}s"
+                    logging.warning(f"⏱️ {source_name}: {error}")
+                except Exception as e:
+                    results = []
+                    error = str(e)
+                    logging.error(f"Error fetching data from {source_name}: {e}")
+                elapsed = time.perf_counter() - start
+            client = stats.get('client')
+            bytes_received = client.bytes_received if client is not None else stats.get('bytes_received', 0)
+            return source_name, {'results': results, 'error': error, 'elapsed': elapsed,
+                                 'bytes_received': bytes_received}
+
+        start_all = time.perf_counter()
+        tasks = [(source, asyncio.ensure_future(run(source))) for source in sources]
+        pending = {task for _, task in tasks}
+        deadline = start_all + total_timeout if total_timeout is not None else None
+
+        while pending:
+            timeout = STOP_POLL_INTERVAL if stop_event is not None else None
+            if deadline is not None:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                timeout = min(timeout, remaining) if timeout is not None else remaining
+            _, pending = await asyncio.wait(pending, timeout=timeout)
+            if stop_event is not None and stop_event.is_set():
+                break
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        fetched = {}
+        for source, task in tasks:
+            if task in pending:
+                fetched[source.get('name', 'Unknown')] = {
+                    'results': [], 'error': 'Abgebrochen (Zeitbudget/Stop)', 'skipped': True,
+                    'elapsed': time.perf_counter() - start_all, 'bytes_received': 0
+                }
+            else:
+                source_name, result = task.result()
+                fetched[source_name] = result
+
+    logging.info(f"⚡ fetch_many: {len(sources)} Quellen in {time.perf_counter() - start_all:.1f}s "
+                 f"(max. {max_concurrency} parallel, {len(pending)} abgebrochen)")
+    return fetched
+
+
+def fetch_many_sync(sources: List[Dict], keywords: List[str], **kwargs) -> Dict[str, Dict[str, Any]]:
+    """Blockierender Wrapper für fetch_many (für Worker-Threads ohne Event-Loop)"""
+    return asyncio.run(fetch_many(sources, keywords, **kwargs))
@@ -0,0 +1,153 @@
+"""
+Offline-Benchmark für Deep Research Jobs (Record/Replay)
+
+Aufnahme (einmalig, mit echten API-Keys):
+    python benchmark_research.py --record --keywords "protein,snack"
+Wiedergabe (offline, reproduzierbar):
+    python benchmark_research.py --runs 5 --latency-scale 1.0
+
+Im Replay laufen alle HTTP-Aufrufe der Datenquellen über einen lokalen Stand-in-Server,
+LLM-Antworten kommen direkt aus den Cassettes. Ausgegeben werden die Phasen-Timings
+(plan, scrape, synthesis, finalize, pdf) pro Lauf und der Median sowie die langsamsten Quellen.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import logging
+import tempfile
+import statistics
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Deep Research Benchmark mit Record/Replay")
+    parser.add_argument('--record', action='store_true', help="Echte Aufrufe ausführen und als Cassettes speichern")
+    parser.add_argument('--runs', type=int, default=3, help="Anzahl Replay-Läufe")
+    parser.add_argument('--latency', type=float, default=0.0, help="Fixe Zusatzlatenz pro Aufruf (Sekunden)")
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help="Faktor auf die aufgezeichnete Latenz (0 = so schnell wie möglich)")
+    parser.add_argument('--cassettes', default='cassettes', help="Verzeichnis der Cassettes")
+    parser.add_argument('--description', default="Pflanzliche Proteinsnacks für den europäischen Markt")
+    parser.add_argument('--keywords', default="plant protein,snack,high protein")
+    parser.add_argument('--categories', default="Bars")
+    parser.add_argument('--in-process', action='store_true',
+                        help="HTTP-Replay direkt aus den Dateien statt über den lokalen Server")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Muss vor dem Import von app/deep_research_worker laufen"""
+    os.environ['RESEARCH_REPLAY_MODE'] = 'record' if args.record else 'replay'
+    os.environ['RESEARCH_CASSETTE_DIR'] = os.path.abspath(args.cassettes)
+    os.environ['RESEARCH_REPLAY_LATENCY'] = str(args.latency)
+    os.environ['RESEARCH_REPLAY_LATENCY_SCALE'] = str(args.latency_scale)
+    os.environ['LLM_CACHE_DISABLED'] = '1'  # Jeder Lauf soll die volle LLM-Latenz messen
+
+    # Eigene Wegwerf-Datenbank - die Produktions-DB wird nie berührt
+    db_path = os.path.join(tempfile.mkdtemp(prefix='research_bench_'), 'bench.db')
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_path}"
+    os.environ.setdefault('SESSION_SECRET', 'benchmark')
+    if not args.record:
+        os.environ.setdefault('GEMINI_API_KEY', 'replay')
+
+
+def run_job(description, keywords, categories):
+    """Führt einen kompletten Job aus und gibt (job_id, Status, Dauer) zurück"""
+    from app import app, db
+    from models import ResearchJob
+    from deep_research_worker import process_research_job, get_default_research_plan
+
+    job_id = str(uuid.uuid4())
+    with app.app_context():
+        db.session.add(ResearchJob(
+            job_id=job_id,
+            description=description,
+            keywords=json.dumps(keywords),
+            categories=json.dumps(categories),
+            research_plan=json.dumps(get_default_research_plan(description, keywords, categories)),
+            plan_approved=True,
+            status='queued'
+        ))
+        db.session.commit()
+
+    start = time.perf_counter()
+    status = 'unknown'
+    for event in process_research_job(job_id, description, keywords, categories):
+        event_type = json.loads(event).get('type')
+        if event_type in ('complete', 'error', 'cancelled'):
+            status = event_type
+    return job_id, status, time.perf_counter() - start
+
+
+def collect_timings(job_id):
+    from app import app
+    from models import ResearchMetric
+
+    with app.app_context():
+        metrics = ResearchMetric.query.filter_by(job_id=job_id).all()
+        phases = {m.name: m.duration_ms for m in metrics if m.kind == 'phase'}
+        sources = {m.name: m.duration_ms for m in metrics if m.kind == 'source'}
+    return phases, sources
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    logging.basicConfig(level=logging.WARNING)
+
+    from utils.research_replay import ReplayServer
+    from research_metrics import RESEARCH_PHASES
+
+    server = None
+    if not args.record and not args.in_process:
+        server = ReplayServer().start()
+        os.environ['RESEARCH_REPLAY_SERVER'] = server.url
+        print(f"🎞️  Replay-Server läuft auf {server.url}")
+
+    from app import app, db
+    with app.app_context():
+        db.create_all()
+
+    keywords = [k.strip() for k in args.keywords.split(',') if k.strip()]
+    categories = [c.strip() for c in args.categories.split(',') if c.strip()]
+    runs = 1 if args.record else args.runs
+
+    results = []
+    try:
+        for run in range(1, runs + 1):
+            job_id, status, total = run_job(args.description, keywords, categories)
+            phases, sources = collect_timings(job_id)
+            results.append((total, phases, sources))
+            phase_info = '  '.join(f"{name}={phases[name] / 1000:.2f}s" for name in RESEARCH_PHASES if name in phases)
+            print(f"Lauf {run}/{runs} [{status}]: gesamt {total:.2f}s  {phase_info}")
+    finally:
+        if server:
+            server.stop()
+
+    if args.record:
+        print(f"✓ Cassettes gespeichert in {os.environ['RESEARCH_CASSETTE_DIR']}")
+
+    print("\nMedian pro Phase:")
+    print(f"  {'gesamt':<10} {statistics.median(r[0] for r in results):8.2f}s")
+    for name in RESEARCH_PHASES:
+        values = [r[1][name] / 1000 for r in results if name in r[1]]
+        if values:
+            print(f"  {name:<10} {statistics.median(values):8.2f}s")
+
+    source_medians = {}
+    for _, _, sources in results:
+        for name, duration in sources.items():
+            source_medians.setdefault(name, []).append(duration / 1000)
+    slowest = sorted(((statistics.median(v), n) for n, v in source_medians.items()), reverse=True)[:5]
+    if slowest:
+        print("\nLangsamste Quellen (Median):")
+        for duration, name in slowest:
+            print(f"  {name:<40} {duration:6.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
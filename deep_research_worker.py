@@ -12,13 +12,21 @@ Führt asynchrone Research-Jobs aus mit folgenden Phasen:
 import json
 import time
 import logging
+import threading
 import uuid
 from datetime import datetime
 from typing import Dict, List, Any, Generator
 import os
 from google import genai
 from google.genai import types
-from api_clients import fetch_data_from_source
+from api_clients import fetch_data_from_source, log_host_metrics
+from async_api_clients import fetch_many_sync
+from utils.llm_cache import cached_completion, lookup_completion, store_completion
+from utils.research_replay import replay_mode
+from utils.pdf_generator import generate_research_report_pdf
+from utils.pdf_render_service import render as render_pdf
+from research_metrics import record_research_metric
+from research_ranking import rank_research_items, item_text
 
 # Initialize Gemini client (using blueprint:python_gemini)
 gemini_client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
@@ -26,6 +34,20 @@ gemini_client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
 # Verwende Gemini 2.5 Flash - Bestes Preis-Leistungs-Verhältnis mit gutem Rate Limit
 GEMINI_MODEL = "gemini-2.5-flash"
 
+# Alle Quellen eines Plans parallel abrufen (async_api_clients.fetch_many) statt nacheinander
+RESEARCH_CONCURRENT_FETCH = os.environ.get("RESEARCH_CONCURRENT_FETCH", "1") == "1"
+
+# Gesamt-Zeitbudget pro Job (Ziel: max 10 Minuten) und Reserve für Synthese/Finalisierung/PDF
+RESEARCH_TIME_BUDGET = int(os.environ.get("RESEARCH_TIME_BUDGET", 600))
+RESEARCH_SYNTHESIS_RESERVE = int(os.environ.get("RESEARCH_SYNTHESIS_RESERVE", 120))
+
+# Streaming der Synthese/Finalisierung: min. Abstand zwischen 'partial'-Events und erwartete Antwortlänge (für Progress)
+PARTIAL_EVENT_INTERVAL = 0.5
+EXPECTED_RESPONSE_CHARS = 4000
+
+# ResearchSource-Zeilen werden gepuffert und alle N Quellen bzw. an Phasengrenzen geschrieben
+RESEARCH_SOURCE_FLUSH_EVERY = int(os.environ.get("RESEARCH_SOURCE_FLUSH_EVERY", 10))
+
 # Definierte Datenquellen (erweiterte Liste)
 DATA_SOURCES = {
     "general": [
@@ -83,6 +105,98 @@ DATA_SOURCES = {
 }
 
 
+class ResearchCancelled(Exception):
+    """Wird ausgelöst, wenn ein laufender Job abgebrochen wurde"""
+
+
+# Cancellation-Tokens der laufenden Jobs (in-process)
+_cancel_events: Dict[str, threading.Event] = {}
+_cancel_lock = threading.Lock()
+
+
+def get_cancel_event(job_id: str) -> threading.Event:
+    with _cancel_lock:
+        return _cancel_events.setdefault(job_id, threading.Event())
+
+
+def request_cancel(job_id: str):
+    """Signalisiert einem laufenden Job im selben Prozess den Abbruch"""
+    get_cancel_event(job_id).set()
+
+
+def check_cancelled(job_id: str):
+    """Prüft Cancellation-Token und DB-Status (für Abbrüche aus anderen Prozessen)"""
+    from app import db
+    from models import ResearchJob
+    
+    cancel_event = get_cancel_event(job_id)
+    if not cancel_event.is_set():
+        # Kein Autoflush: gepufferte Metriken sollen keine Schreib-Transaktion öffnen
+        with db.session.no_autoflush:
+            status = db.session.query(ResearchJob.status).filter_by(job_id=job_id).scalar()
+        if status == 'cancelled':
+            cancel_event.set()
+    if cancel_event.is_set():
+        raise ResearchCancelled(job_id)
+
+
+def set_job_status(job_id: str, status: str, **fields):
+    """
+    Setzt den Job-Status bedingt (nur solange der Job nicht abgebrochen wurde) und committet.
+    Ein Abbruch zwischen check_cancelled und diesem Commit wird so nicht überschrieben -
+    0 aktualisierte Zeilen bedeuten: abgebrochen.
+    """
+    from app import db
+    from models import ResearchJob
+    
+    updated = ResearchJob.query.filter(
+        ResearchJob.job_id == job_id, ResearchJob.status != 'cancelled'
+    ).update(dict(fields, status=status), synchronize_session=False)
+    if not updated:
+        db.session.rollback()
+        get_cancel_event(job_id).set()
+        raise ResearchCancelled(job_id)
+    db.session.commit()
+
+
+class ResearchSourceWriter:
+    """
+    Puffert die Ergebnisse der Datensammlung und schreibt ResearchSource-Zeilen gesammelt
+    (alle `flush_every` Quellen und an Phasengrenzen) statt zwei Commits pro Quelle.
+    Status-Wechsel wie 'processing' laufen nur über den Event-Stream.
+    """
+    
+    def __init__(self, job_id: str, existing: Dict[str, Any], flush_every: int = RESEARCH_SOURCE_FLUSH_EVERY):
+        self.job_id = job_id
+        self.existing = existing  # source_name -> ResearchSource aus früheren Läufen
+        self.flush_every = max(1, flush_every)
+        self.buffer: Dict[str, Dict[str, Any]] = {}
+    
+    def record(self, source_name: str, **fields):
+        self.buffer[source_name] = fields
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+    
+    def flush(self):
+        """Schreibt alle gepufferten Quellen (und offene Metriken) in einem Commit"""
+        if not self.buffer:
+            return
+        from app import db
+        from models import ResearchSource
+        
+        for source_name, fields in self.buffer.items():
+            research_source = self.existing.get(source_name)
+            if research_source is None:
+                research_source = ResearchSource(job_id=self.job_id, source_name=source_name)
+                db.session.add(research_source)
+                self.existing[source_name] = research_source
+            for field, value in fields.items():
+                setattr(research_source, field, value)
+        db.session.commit()
+        logging.info(f"  💾 {len(self.buffer)} Quellen gespeichert")
+        self.buffer.clear()
+
+
 def process_research_job(job_id: str, description: str, keywords: List[str], categories: List[str]) -> Generator:
     """
     Hauptfunktion für die Verarbeitung eines Research Jobs
@@ -92,6 +206,13 @@ def process_research_job(job_id: str, description: str, keywords: List[str], cat
     from models import ResearchJob, ResearchSource, Trend
     
     job_start_time = time.time()
+    deadline = job_start_time + RESEARCH_TIME_BUDGET
+    
+    # Alte Tokens (z.B. vor einem Resume) verwerfen - frühe Abbrüche erkennt check_cancelled über den DB-Status
+    with _cancel_lock:
+        _cancel_events.pop(job_id, None)
+    
+    source_writer = None
     
     with app.app_context():
         try:
@@ -117,13 +238,14 @@ def process_research_job(job_id: str, description: str, keywords: List[str], cat
                     "progress": 2
                 })
                 
-                job.status = 'generating_plan'
-                db.session.commit()
+                set_job_status(job_id, 'generating_plan')
                 
+                check_cancelled(job_id)
+                start_plan = time.time()
                 research_plan = generate_research_plan(description, keywords, categories)
+                record_research_metric(job_id, 'phase', 'plan', start_plan, time.time() - start_plan)
                 job.research_plan = json.dumps(research_plan, ensure_ascii=False)
-                job.status = 'waiting_approval'
-                db.session.commit()
+                set_job_status(job_id, 'waiting_approval')
                 
                 logging.info(f"✓ Research-Plan erstellt, warte auf Nutzerbestätigung")
                 yield json.dumps({
@@ -148,161 +270,285 @@ def process_research_job(job_id: str, description: str, keywords: List[str], cat
                 "progress": 15
             })
             
-            # Phase 2: Datensammlung (15% - 65% Progress) - Optimiert auf 50-100 Datenpunkte
-            logging.info("🔍 Phase 2: Starte fokussierte Datensammlung (Ziel: 50-100 Datenpunkte)...")
-            yield json.dumps({
-                "type": "info",
-                "message": "🔍 Phase 2: Sammle Daten aus 10-15 relevanten Quellen (Ziel: 50-100 Datenpunkte)...",
-                "progress": 15
-            })
+            # Checkpoints eines früheren Laufs (Worker-Absturz, manueller Resume)
+            synthesized_report = json.loads(job.synthesized_report) if job.synthesized_report else None
+            final_report = json.loads(job.final_report) if job.final_report else None
+            checkpoint_sources = {s.source_name: s for s in ResearchSource.query.filter_by(job_id=job_id).all()}
             
-            job.status = 'scraping_data'
-            db.session.commit()
+            if synthesized_report is None and final_report is None:
+                # Phase 2: Datensammlung (15% - 65% Progress) - Optimiert auf 50-100 Datenpunkte
+                logging.info("🔍 Phase 2: Starte fokussierte Datensammlung (Ziel: 50-100 Datenpunkte)...")
+                yield json.dumps({
+                    "type": "info",
+                    "message": "🔍 Phase 2: Sammle Daten aus 10-15 relevanten Quellen (Ziel: 50-100 Datenpunkte)...",
+                    "progress": 15
+                })
+            
+                set_job_status(job_id, 'scraping_data')
+                start_scrape = time.time()
             
-            collected_data = []
-            sources_to_check = determine_sources_from_plan(approved_plan, keywords)
-            logging.info(f"📊 Identifizierte {len(sources_to_check)} Quellen aus Plan für Datensammlung")
+                collected_data = []
+                sources_to_check = determine_sources_from_plan(approved_plan, keywords)
+                logging.info(f"📊 Identifizierte {len(sources_to_check)} Quellen aus Plan für Datensammlung")
             
-            progress_per_source = 50 / len(sources_to_check) if sources_to_check else 0
-            current_progress = 15
-            total_items_found = 0
+                progress_per_source = 50 / len(sources_to_check) if sources_to_check else 0
+                current_progress = 15
+                total_items_found = 0
             
-            for idx, source in enumerate(sources_to_check, 1):
-                source_name = source['name']
-                source_url = source.get('url', '')
+                source_writer = ResearchSourceWriter(job_id, checkpoint_sources)
                 
-                logging.info(f"🔎 [{idx}/{len(sources_to_check)}] Durchsuche Quelle: {source_name}")
+                # Scraping endet spätestens so, dass die Reserve für Synthese & Co. bleibt
+                scrape_deadline = deadline - RESEARCH_SYNTHESIS_RESERVE
+                skipped_sources = []
+            
+                # Bereits erfolgreich abgerufene Quellen werden aus dem Checkpoint übernommen
+                done_sources = {name for name, s in checkpoint_sources.items()
+                                if s.status == 'success' and s.cleaned_content}
+                pending_sources = [s for s in sources_to_check if s['name'] not in done_sources]
+                if done_sources:
+                    logging.info(f"♻️ Resume: {len(sources_to_check) - len(pending_sources)} Quellen aus Checkpoint, "
+                                 f"{len(pending_sources)} offen")
+            
+                # Parallel-Abruf: alle Quellen gleichzeitig, die Schleife verarbeitet danach nur noch die Ergebnisse
+                prefetched = None
+                if RESEARCH_CONCURRENT_FETCH and pending_sources:
+                    yield json.dumps({
+                        "type": "info",
+                        "message": f"⚡ Rufe {len(pending_sources)} Quellen parallel ab...",
+                        "progress": 15
+                    })
+                    try:
+                        prefetched = fetch_many_sync(pending_sources, keywords, limit=10,
+                                                     total_timeout=max(1, scrape_deadline - time.time()),
+                                                     stop_event=get_cancel_event(job_id))
+                    except Exception as e:
+                        logging.error(f"⚠️ Parallel-Abruf fehlgeschlagen, sequenzieller Fallback: {e}")
+            
+                for idx, source in enumerate(sources_to_check, 1):
+                    source_name = source['name']
+                    source_url = source.get('url', '')
                 
-                # Source-Eintrag in DB erstellen
-                research_source = ResearchSource(
-                    job_id=job_id,
-                    source_name=source_name,
-                    source_url=source_url,
-                    status='processing'
-                )
-                db.session.add(research_source)
-                db.session.commit()
+                    if source_name in done_sources:
+                        research_source = checkpoint_sources[source_name]
+                        source_data = json.loads(research_source.cleaned_content)
+                        collected_data.append(source_data)
+                        total_items_found += research_source.found_items or 0
+                        current_progress += progress_per_source
+                    
+                        yield json.dumps({
+                            "type": "success",
+                            "message": f"♻️ {source_name}: {research_source.found_items or 0} Datenpunkte aus Checkpoint | Gesamt: {total_items_found}",
+                            "source": source_name,
+                            "status": "success",
+                            "foundItems": research_source.found_items or 0,
+                            "totalItems": total_items_found,
+                            "progress": int(current_progress)
+                        })
+                        continue
                 
-                yield json.dumps({
-                    "type": "info",
-                    "message": f"🔍 Durchsuche: {source_name} [{idx}/{len(sources_to_check)}]",
-                    "source": source_name,
-                    "status": "processing",
-                    "progress": int(current_progress)
-                })
+                    check_cancelled(job_id)
+                    if prefetched is not None:
+                        over_budget = prefetched.get(source_name, {}).get('skipped', False)
+                    else:
+                        over_budget = time.time() > scrape_deadline
+                    if over_budget:
+                        skipped_sources.append(source_name)
+                        continue
+                    
+                    logging.info(f"🔎 [{idx}/{len(sources_to_check)}] Durchsuche Quelle: {source_name}")
                 
-                # ECHTE API-CALLS - keine Mock-Daten mehr!
-                start_time = time.time()
-                try:
-                    logging.info(f"  🌐 Starte API-Call für {source_name}...")
+                    yield json.dumps({
+                        "type": "info",
+                        "message": f"🔍 Durchsuche: {source_name} [{idx}/{len(sources_to_check)}]",
+                        "source": source_name,
+                        "status": "processing",
+                        "progress": int(current_progress)
+                    })
+                
+                    # ECHTE API-CALLS - keine Mock-Daten mehr!
+                    start_time = time.time()
+                    bytes_received = 0
+                    try:
+                        logging.info(f"  🌐 Starte API-Call für {source_name}...")
                     
-                    # Hole echte Daten über die API-Clients (reduziertes Limit für Performance)
-                    api_results = fetch_data_from_source(source, keywords, limit=10)
-                    found_items = len(api_results)
-                    elapsed = time.time() - start_time
+                        if prefetched is not None:
+                            fetched = prefetched.get(source_name, {})
+                            if fetched.get('error'):
+                                raise RuntimeError(fetched['error'])
+                            api_results = fetched.get('results', [])
+                            elapsed = fetched.get('elapsed', 0.0)
+                            bytes_received = fetched.get('bytes_received', 0)
+                        else:
+                            # Hole echte Daten über die API-Clients (reduziertes Limit für Performance)
+                            fetch_stats = {}
+                            api_results = fetch_data_from_source(source, keywords, limit=10, stats=fetch_stats)
+                            elapsed = time.time() - start_time
+                            bytes_received = fetch_stats.get('bytes_received', 0)
+                        found_items = len(api_results)
                     
-                    logging.info(f"  ✓ {source_name}: {found_items} Datenpunkte in {elapsed:.1f}s")
+                        logging.info(f"  ✓ {source_name}: {found_items} Datenpunkte in {elapsed:.1f}s")
                     
-                    # Konvertiere API-Ergebnisse in unser Format
-                    findings = []
-                    for result in api_results[:8]:  # Top 8 für Summary
-                        findings.append(result.get('title', 'Unknown'))
+                        # Konvertiere API-Ergebnisse in unser Format
+                        findings = []
+                        for result in api_results[:8]:  # Top 8 für Summary
+                            findings.append(result.get('title', 'Unknown'))
                     
-                    source_data = {
-                        "source": source_name,
-                        "url": source_url,
-                        "findings": findings,
-                        "summary": f"Relevante Daten aus {source_name}: {', '.join(findings[:3])}..." if findings else f"Daten aus {source_name}",
-                        "data_points": found_items,
-                        "raw_results": api_results  # Komplette API-Antworten für Synthese
-                    }
+                        source_data = {
+                            "source": source_name,
+                            "url": source_url,
+                            "findings": findings,
+                            "summary": f"Relevante Daten aus {source_name}: {', '.join(findings[:3])}..." if findings else f"Daten aus {source_name}",
+                            "data_points": found_items,
+                            "raw_results": api_results  # Komplette API-Antworten für Synthese
+                        }
                     
-                    research_source.status = 'success'
-                    research_source.found_items = found_items
-                    research_source.cleaned_content = json.dumps(source_data, ensure_ascii=False)
-                    db.session.commit()
+                        record_research_metric(job_id, 'source', source_name, start_time, elapsed,
+                                               bytes_received=bytes_received, item_count=found_items)
+                        source_writer.record(source_name, source_url=source_url, status='success',
+                                             found_items=found_items,
+                                             cleaned_content=json.dumps(source_data, ensure_ascii=False))
                     
-                    collected_data.append(source_data)
-                    total_items_found += found_items
+                        collected_data.append(source_data)
+                        total_items_found += found_items
                     
-                except Exception as e:
-                    elapsed = time.time() - start_time
-                    logging.error(f"  ❌ {source_name}: Fehler nach {elapsed:.1f}s - {str(e)[:100]}")
-                    research_source.status = 'error'
-                    research_source.found_items = 0
-                    db.session.commit()
+                    except Exception as e:
+                        if prefetched is not None:
+                            elapsed = prefetched.get(source_name, {}).get('elapsed', 0.0)
+                        else:
+                            elapsed = time.time() - start_time
+                        logging.error(f"  ❌ {source_name}: Fehler nach {elapsed:.1f}s - {str(e)[:100]}")
+                        record_research_metric(job_id, 'source', source_name, start_time, elapsed, status='error')
+                        source_writer.record(source_name, source_url=source_url, status='error',
+                                             found_items=0, error_message=str(e)[:500])
                     
+                        yield json.dumps({
+                            "type": "warning",
+                            "message": f"⚠️ {source_name}: Fehler beim Abrufen ({str(e)[:50]}...)",
+                            "source": source_name,
+                            "status": "error"
+                        })
+                        continue
+                
+                    logging.info(f"  💾 Gespeichert: {source_name} mit {found_items} Datenpunkten")
+                
                     yield json.dumps({
-                        "type": "warning",
-                        "message": f"⚠️ {source_name}: Fehler beim Abrufen ({str(e)[:50]}...)",
+                        "type": "success",
+                        "message": f"✅ {source_name}: {found_items} Datenpunkte | Gesamt: {total_items_found}",
                         "source": source_name,
-                        "status": "error"
+                        "status": "success",
+                        "foundItems": found_items,
+                        "totalItems": total_items_found,
+                        "progress": int(current_progress + progress_per_source)
                     })
-                    continue
                 
-                logging.info(f"  💾 Gespeichert: {source_name} mit {found_items} Datenpunkten")
+                    current_progress += progress_per_source
+            
+                if skipped_sources:
+                    logging.warning(f"⏱️ Zeitbudget für Datensammlung erreicht - {len(skipped_sources)} Quellen übersprungen")
+                    yield json.dumps({
+                        "type": "warning",
+                        "message": f"⏱️ Zeitbudget erreicht: {len(skipped_sources)} Quellen übersprungen - Synthese mit vorhandenen Daten",
+                        "budget_exhausted": True,
+                        "skipped_sources": skipped_sources,
+                        "progress": 65
+                    })
                 
+                logging.info(f"✅ Datensammlung abgeschlossen: {total_items_found} Datenpunkte aus {len(sources_to_check)} Quellen")
+                log_host_metrics()
+                record_research_metric(job_id, 'phase', 'scrape', start_scrape, time.time() - start_scrape,
+                                       item_count=total_items_found)
+                source_writer.flush()  # Phasengrenze
+            else:
+                collected_data = []
+                total_items_found = sum(s.found_items or 0 for s in checkpoint_sources.values() if s.status == 'success')
+                logging.info("♻️ Resume: Datensammlung übersprungen (Report-Checkpoint vorhanden)")
+            
+            if synthesized_report is None and final_report is None:
+                # Phase 3: Synthese (65% - 75% Progress)
+                start_synthesis = time.time()
+                logging.info(f"🧠 Phase 3: Starte KI-Synthese mit {total_items_found} Datenpunkten...")
+                logging.info(f"  📊 Daten aus {len(collected_data)} Quellen werden analysiert")
                 yield json.dumps({
-                    "type": "success",
-                    "message": f"✅ {source_name}: {found_items} Datenpunkte | Gesamt: {total_items_found}",
-                    "source": source_name,
-                    "status": "success",
-                    "foundItems": found_items,
-                    "totalItems": total_items_found,
-                    "progress": int(current_progress + progress_per_source)
+                    "type": "info",
+                    "message": f"🧠 Phase 3: KI analysiert {total_items_found} Datenpunkte und synthetisiert Report...",
+                    "progress": 67
                 })
-                
-                current_progress += progress_per_source
             
-            logging.info(f"✅ Datensammlung abgeschlossen: {total_items_found} Datenpunkte aus {len(sources_to_check)} Quellen")
+                check_cancelled(job_id)
+                set_job_status(job_id, 'synthesizing_report')
             
-            # Phase 3: Synthese (65% - 75% Progress)
-            start_synthesis = time.time()
-            logging.info(f"🧠 Phase 3: Starte KI-Synthese mit {total_items_found} Datenpunkten...")
-            logging.info(f"  📊 Daten aus {len(collected_data)} Quellen werden analysiert")
-            yield json.dumps({
-                "type": "info",
-                "message": f"🧠 Phase 3: KI analysiert {total_items_found} Datenpunkte und synthetisiert Report...",
-                "progress": 67
-            })
+                logging.info("  🤖 Rufe Gemini 2.5 Pro für Synthese auf...")
+                synthesized_report = yield from synthesize_data_with_ai_streaming(description, collected_data,
+                                                                                  keywords, categories)
+                elapsed_synthesis = time.time() - start_synthesis
+                logging.info(f"  ✓ Synthese abgeschlossen in {elapsed_synthesis:.1f}s")
+                record_research_metric(job_id, 'phase', 'synthesis', start_synthesis, elapsed_synthesis,
+                                       item_count=len(collected_data))
+                logging.info(f"  ✓ Synthese abgeschlossen: {len(synthesized_report.get('introduction', ''))} Zeichen Einleitung")
             
-            job.status = 'synthesizing_report'
-            db.session.commit()
+                # Checkpoint: Synthese persistieren, damit ein Resume sie nicht wiederholt
+                job.synthesized_report = json.dumps(synthesized_report, ensure_ascii=False)
+                db.session.commit()
             
-            logging.info("  🤖 Rufe Gemini 2.5 Pro für Synthese auf...")
-            synthesized_report = synthesize_data_with_ai(description, collected_data, keywords, categories)
-            elapsed_synthesis = time.time() - start_synthesis
-            logging.info(f"  ✓ Synthese abgeschlossen in {elapsed_synthesis:.1f}s")
-            logging.info(f"  ✓ Synthese abgeschlossen: {len(synthesized_report.get('introduction', ''))} Zeichen Einleitung")
+                yield json.dumps({
+                    "type": "info",
+                    "message": "✓ Daten erfolgreich synthetisiert - Report-Struktur erstellt",
+                    "progress": 75
+                })
+            elif final_report is None:
+                logging.info("♻️ Resume: Synthese aus Checkpoint übernommen")
+                yield json.dumps({
+                    "type": "info",
+                    "message": "♻️ Synthese aus Checkpoint übernommen",
+                    "progress": 75
+                })
             
-            yield json.dumps({
-                "type": "info",
-                "message": "✓ Daten erfolgreich synthetisiert - Report-Struktur erstellt",
-                "progress": 75
-            })
+            if final_report is None and time.time() > deadline:
+                # Zeitbudget aufgebraucht: Synthese wird ohne Finalisierung übernommen
+                logging.warning("⏱️ Zeitbudget erreicht - überspringe Finalisierung")
+                final_report = synthesized_report
+                yield json.dumps({
+                    "type": "warning",
+                    "message": "⏱️ Zeitbudget erreicht - Report wird ohne Finalisierung erstellt",
+                    "budget_exhausted": True,
+                    "progress": 85
+                })
             
-            # Phase 4: Finalisierung (75% - 85% Progress)
-            start_finalize = time.time()
-            logging.info("📝 Phase 4: Starte Report-Finalisierung...")
-            yield json.dumps({
-                "type": "info",
-                "message": "📝 Phase 4: Finalisiere Report-Struktur und optimiere Texte...",
-                "progress": 77
-            })
+            if final_report is None:
+                # Phase 4: Finalisierung (75% - 85% Progress)
+                start_finalize = time.time()
+                logging.info("📝 Phase 4: Starte Report-Finalisierung...")
+                yield json.dumps({
+                    "type": "info",
+                    "message": "📝 Phase 4: Finalisiere Report-Struktur und optimiere Texte...",
+                    "progress": 77
+                })
             
-            job.status = 'finalizing_report'
-            db.session.commit()
+                check_cancelled(job_id)
+                set_job_status(job_id, 'finalizing_report')
             
-            logging.info("  🤖 Rufe Gemini 2.5 Pro für Finalisierung auf...")
-            final_report = finalize_report_with_ai(synthesized_report)
-            elapsed_finalize = time.time() - start_finalize
-            logging.info(f"  ✓ Finalisierung in {elapsed_finalize:.1f}s: {len(final_report.get('footnotes', []))} Fußnoten")
+                logging.info("  🤖 Rufe Gemini 2.5 Pro für Finalisierung auf...")
+                final_report = yield from finalize_report_with_ai_streaming(synthesized_report)
+                elapsed_finalize = time.time() - start_finalize
+                record_research_metric(job_id, 'phase', 'finalize', start_finalize, elapsed_finalize)
+                logging.info(f"  ✓ Finalisierung in {elapsed_finalize:.1f}s: {len(final_report.get('footnotes', []))} Fußnoten")
             
-            yield json.dumps({
-                "type": "info",
-                "message": f"✓ Report finalisiert mit {len(final_report.get('footnotes', []))} Fußnoten",
-                "progress": 85
-            })
+                # Checkpoint: finalen Report vor der PDF-Generierung persistieren
+                job.final_report = json.dumps(final_report, ensure_ascii=False)
+                db.session.commit()
+            
+                yield json.dumps({
+                    "type": "info",
+                    "message": f"✓ Report finalisiert mit {len(final_report.get('footnotes', []))} Fußnoten",
+                    "progress": 85
+                })
+            else:
+                logging.info("♻️ Resume: finaler Report aus Checkpoint übernommen")
+                yield json.dumps({
+                    "type": "info",
+                    "message": "♻️ Finaler Report aus Checkpoint übernommen",
+                    "progress": 85
+                })
             
             # Phase 5: PDF-Generierung (85% - 92% Progress)
             start_pdf = time.time()
@@ -313,12 +559,13 @@ def process_research_job(job_id: str, description: str, keywords: List[str], cat
                 "progress": 87
             })
             
-            job.status = 'generating_pdf'
-            db.session.commit()
+            check_cancelled(job_id)
+            set_job_status(job_id, 'generating_pdf')
             
             logging.info("  📝 Erstelle PDF-Dokument mit ReportLab...")
             pdf_path = generate_pdf_report(final_report, job_id)
             elapsed_pdf = time.time() - start_pdf
+            record_research_metric(job_id, 'phase', 'pdf', start_pdf, elapsed_pdf)
             logging.info(f"  ✓ PDF erstellt in {elapsed_pdf:.1f}s: {pdf_path}")
             
             yield json.dumps({
@@ -340,15 +587,13 @@ def process_research_job(job_id: str, description: str, keywords: List[str], cat
                 pdf_path=pdf_path
             )
             db.session.add(new_trend)
-            db.session.commit()
-            logging.info(f"  ✓ Report gespeichert mit ID: {new_trend.id}")
+            db.session.flush()
             
-            # Job als abgeschlossen markieren
-            job.status = 'completed'
-            job.progress = 100
-            job.result_trend_id = new_trend.id
-            job.completed_at = datetime.utcnow()
-            db.session.commit()
+            # Job im selben Commit als abgeschlossen markieren - ein Abbruch während der
+            # PDF-Generierung verwirft den Trend, statt mit 'completed' überschrieben zu werden
+            set_job_status(job_id, 'completed', progress=100, result_trend_id=new_trend.id,
+                           completed_at=datetime.utcnow())
+            logging.info(f"  ✓ Report gespeichert mit ID: {new_trend.id}")
             
             total_duration = time.time() - job_start_time
             minutes = int(total_duration // 60)
@@ -371,9 +616,32 @@ def process_research_job(job_id: str, description: str, keywords: List[str], cat
                 "total_data_points": total_items_found
             })
             
+        except ResearchCancelled:
+            logging.warning(f"⛔ Research Job {job_id} wurde abgebrochen")
+            db.session.rollback()
+            if source_writer:
+                source_writer.flush()  # Bereits abgerufene Quellen für einen Resume sichern
+            job = ResearchJob.query.filter_by(job_id=job_id).first()
+            if job:
+                job.status = 'cancelled'
+                db.session.commit()
+            
+            yield json.dumps({
+                "type": "cancelled",
+                "message": "⛔ Research wurde abgebrochen"
+            })
+            
         except Exception as e:
             logging.error(f"Error in research job {job_id}: {str(e)}")
             
+            # Gepufferte Quellen sichern, damit ein Resume sie nicht erneut abruft
+            try:
+                db.session.rollback()
+                if source_writer:
+                    source_writer.flush()
+            except Exception as flush_error:
+                logging.error(f"⚠️ Gepufferte Quellen konnten nicht gespeichert werden: {flush_error}")
+            
             with app.app_context():
                 job = ResearchJob.query.filter_by(job_id=job_id).first()
                 if job:
@@ -385,6 +653,10 @@ def process_research_job(job_id: str, description: str, keywords: List[str], cat
                 "type": "error",
                 "message": f"Fehler bei der Verarbeitung: {str(e)}"
             })
+        
+        finally:
+            with _cancel_lock:
+                _cancel_events.pop(job_id, None)
 
 
 def generate_research_plan(description: str, keywords: List[str], categories: List[str]) -> Dict:
@@ -485,17 +757,22 @@ Ziel: Maximale Relevanz bei 5-10 Minuten Laufzeit."""
     
     try:
         logging.info(f"📋 Generiere intelligenten Research-Plan mit {GEMINI_MODEL}...")
-        response = gemini_client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=user_prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                response_mime_type="application/json",
-                temperature=0.7
-            )
+        response_text = cached_completion(
+            "research_plan", GEMINI_MODEL, system_instruction, user_prompt,
+            lambda: gemini_client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=user_prompt,
+                config=types.GenerateContentConfig(
+                    system_instruction=system_instruction,
+                    response_mime_type="application/json",
+                    temperature=0.7
+                )
+            ).text,
+            params={"temperature": 0.7},
+            validate=json.loads
         )
         
-        plan = json.loads(response.text)
+        plan = json.loads(response_text)
         logging.info(f"🔍 DEBUG: Gemini Response: {json.dumps(plan, indent=2, ensure_ascii=False)[:500]}...")
         
         # Validiere und korrigiere expected_data_points & estimated_duration (müssen INTEGER sein!)
@@ -672,7 +949,127 @@ def determine_sources_from_plan(research_plan: Dict, keywords: List[str]) -> Lis
     return sources
 
 
+def drain_events(events: Generator) -> Any:
+    """Führt einen Event-Generator ohne SSE-Relay aus und gibt seinen Rückgabewert zurück"""
+    while True:
+        try:
+            next(events)
+        except StopIteration as stop:
+            return stop.value
+
+
+def stream_gemini_json(call_site: str, system_instruction: str, user_prompt: str, temperature: float,
+                       max_output_tokens: int, progress_range: tuple) -> Generator[str, None, str]:
+    """
+    Generiert eine JSON-Antwort per Streaming-API und relayed den Text als 'partial'-Events
+    (gedrosselt auf PARTIAL_EVENT_INTERVAL). Gibt den vollständigen JSON-Text zurück.
+    Bricht der Stream ab oder ist der zusammengesetzte Text kein gültiges JSON,
+    wird einmal nicht-streamend generiert.
+    """
+    params = {"temperature": temperature, "max_output_tokens": max_output_tokens}
+    cached = lookup_completion(call_site, GEMINI_MODEL, system_instruction, user_prompt, params)
+    if cached is not None:
+        return cached
+    
+    config = types.GenerateContentConfig(
+        system_instruction=system_instruction,
+        response_mime_type="application/json",
+        temperature=temperature,
+        max_output_tokens=max_output_tokens
+    )
+    progress_from, progress_to = progress_range
+    
+    # Record/Replay: Aufnahme und Wiedergabe laufen über den nicht-streamenden Aufruf
+    if replay_mode() != 'off':
+        response_text = cached_completion(
+            call_site, GEMINI_MODEL, system_instruction, user_prompt,
+            lambda: gemini_client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=user_prompt,
+                config=config
+            ).text,
+            params=params,
+            validate=json.loads
+        )
+        yield json.dumps({
+            "type": "partial",
+            "phase": call_site,
+            "delta": response_text,
+            "chars": len(response_text),
+            "reset": False,
+            "progress": progress_to - 1
+        })
+        return response_text
+    
+    chunks: List[str] = []
+    pending: List[str] = []
+    received = 0
+    last_emit = 0.0
+    start = time.perf_counter()
+    
+    def partial_event(reset: bool = False) -> str:
+        progress = progress_from + (progress_to - progress_from - 1) * min(1.0, received / EXPECTED_RESPONSE_CHARS)
+        return json.dumps({
+            "type": "partial",
+            "phase": call_site,
+            "delta": ''.join(pending),
+            "chars": received,
+            "reset": reset,
+            "progress": int(progress)
+        })
+    
+    try:
+        for chunk in gemini_client.models.generate_content_stream(model=GEMINI_MODEL, contents=user_prompt,
+                                                                  config=config):
+            text = chunk.text
+            if not text:
+                continue
+            chunks.append(text)
+            pending.append(text)
+            received += len(text)
+            
+            if time.perf_counter() - last_emit >= PARTIAL_EVENT_INTERVAL:
+                yield partial_event()
+                pending.clear()
+                last_emit = time.perf_counter()
+        
+        if pending:
+            yield partial_event()
+            pending.clear()
+        
+        response_text = ''.join(chunks)
+        json.loads(response_text)  # Validierung - Fallback bei unvollständigem JSON
+        store_completion(call_site, GEMINI_MODEL, system_instruction, user_prompt, response_text,
+                         time.perf_counter() - start, params)
+        return response_text
+    
+    except Exception as e:
+        logging.warning(f"⚠️ Streaming [{call_site}] fehlgeschlagen ({str(e)[:100]}) - Fallback ohne Streaming")
+        received = 0
+        yield partial_event(reset=True)
+        yield json.dumps({
+            "type": "info",
+            "message": "↻ Antwort wird ohne Streaming neu generiert..."
+        })
+        return cached_completion(
+            call_site, GEMINI_MODEL, system_instruction, user_prompt,
+            lambda: gemini_client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=user_prompt,
+                config=config
+            ).text,
+            params=params,
+            validate=json.loads
+        )
+
+
 def synthesize_data_with_ai(description: str, collected_data: List[Dict], keywords: List[str], categories: List[str]) -> Dict:
+    """KI-Prompt 2 ohne Event-Relay (siehe synthesize_data_with_ai_streaming)"""
+    return drain_events(synthesize_data_with_ai_streaming(description, collected_data, keywords, categories))
+
+
+def synthesize_data_with_ai_streaming(description: str, collected_data: List[Dict], keywords: List[str],
+                                      categories: List[str], progress_range: tuple = (67, 75)) -> Generator[str, None, Dict]:
     """KI-Prompt 2: Synthetisiert gesammelte Daten zu kohärentem Report mit Fließtext und Fußnoten"""
     
     system_instruction = """Du bist ein professioneller Food-Trend-Analyst und erstellst prägnante Reports.
@@ -692,10 +1089,31 @@ Der Report soll folgende Struktur haben:
 Halte alles SEHR KURZ und prägnant - nur die wichtigsten Facts in jeweils 1-2 Sätzen!
 Antworte in JSON Format."""
     
-    data_summary = "\n\n".join([
-        f"Quelle {i+1}: {d['source']}\nURL: {d['url']}\nErkenntnisse: {', '.join(d['findings'][:3])}"
-        for i, d in enumerate(collected_data[:8])
-    ])
+    # Relevanteste Einträge aller Quellen (dedupliziert, BM25 gegen Keywords, im Token-Budget)
+    ranking = rank_research_items(collected_data, keywords, description)
+    logging.info(f"  🎯 Ranking: {ranking['unique']}/{ranking['total']} eindeutige Einträge, "
+                 f"{len(ranking['items'])} im Prompt (~{ranking['tokens']} Tokens)")
+    
+    # Quellen in Reihenfolge ihres besten Eintrags - die Nummer dient als Fußnoten-Referenz
+    items_by_source: Dict[int, List[Dict]] = {}
+    for item in ranking['items']:
+        items_by_source.setdefault(item['source_index'], []).append(item)
+    
+    # Quellenverzeichnis in derselben Reihenfolge, damit [n] im Text auf den n-ten Eintrag zeigt
+    source_order = list(items_by_source) + [i for i in range(len(collected_data)) if i not in items_by_source]
+    sources = [{"name": collected_data[i]['source'], "url": collected_data[i]['url']} for i in source_order]
+    
+    if items_by_source:
+        data_summary = "\n\n".join([
+            f"Quelle {i+1}: {collected_data[source_index]['source']}\nURL: {collected_data[source_index]['url']}\n"
+            f"Erkenntnisse:\n" + "\n".join(f"- {item_text(item)}" for item in items)
+            for i, (source_index, items) in enumerate(items_by_source.items())
+        ])
+    else:
+        data_summary = "\n\n".join([
+            f"Quelle {i+1}: {d['source']}\nURL: {d['url']}\nErkenntnisse: {', '.join(d['findings'][:3])}"
+            for i, d in enumerate(collected_data[:8])
+        ])
     
     user_prompt = f"""Forschungsfrage: {description}
 
@@ -714,32 +1132,22 @@ WICHTIG: Halte alles sehr kurz und prägnant! Keine langen Texte!
 Füge Fußnoten [1], [2] etc. ein, die auf die oben genannten Quellen verweisen."""
     
     try:
-        response = gemini_client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=user_prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                response_mime_type="application/json",
-                temperature=0.6,
-                max_output_tokens=8000
-            )
+        response_text = yield from stream_gemini_json(
+            "research_synthesis", system_instruction, user_prompt,
+            temperature=0.6, max_output_tokens=8000, progress_range=progress_range
         )
         
-        report = json.loads(response.text)
+        report = json.loads(response_text)
         
         # Füge Quellen-Metadaten hinzu
         if 'sources' not in report:
-            report['sources'] = [
-                {"name": d['source'], "url": d['url']} 
-                for d in collected_data
-            ]
+            report['sources'] = sources
         
         return report
         
     except Exception as e:
         logging.error(f"Synthesis error: {e}")
         # Fallback report - KURZ und prägnant
-        sources = [{"name": d['source'], "url": d['url']} for d in collected_data]
         return {
             "title": f"Trend-Analyse: {description[:100]}",
             "introduction": f"Diese Analyse untersucht {description[:100]}. Basierend auf {len(collected_data)} Quellen zeigen sich signifikante Markttrends in {', '.join(keywords[:2])} [1][2].",
@@ -757,6 +1165,12 @@ Füge Fußnoten [1], [2] etc. ein, die auf die oben genannten Quellen verweisen.
 
 
 def finalize_report_with_ai(synthesized_report: Dict) -> Dict:
+    """KI-Prompt 3 ohne Event-Relay (siehe finalize_report_with_ai_streaming)"""
+    return drain_events(finalize_report_with_ai_streaming(synthesized_report))
+
+
+def finalize_report_with_ai_streaming(synthesized_report: Dict,
+                                      progress_range: tuple = (77, 85)) -> Generator[str, None, Dict]:
     """KI-Prompt 3: Finalisiert und optimiert den Report mit Gemini"""
     
     system_instruction = """Du bist ein professioneller Report-Editor für Food-Trend-Analysen.
@@ -784,18 +1198,12 @@ Erstelle die finale Version mit:
 WICHTIG: Kürze zu lange Texte auf die wichtigsten Facts! Behalte die Fußnoten-Struktur bei."""
     
     try:
-        response = gemini_client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=user_prompt,
-            config=types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                response_mime_type="application/json",
-                temperature=0.5,
-                max_output_tokens=8000
-            )
+        response_text = yield from stream_gemini_json(
+            "research_finalize", system_instruction, user_prompt,
+            temperature=0.5, max_output_tokens=8000, progress_range=progress_range
         )
         
-        final_report = json.loads(response.text)
+        final_report = json.loads(response_text)
         
         # Sicherstellen, dass wichtige Felder vorhanden sind
         required_fields = ['title', 'introduction', 'main_content', 'market_analysis', 
@@ -812,14 +1220,7 @@ WICHTIG: Kürze zu lange Texte auf die wichtigsten Facts! Behalte die Fußnoten-
 
 
 def generate_pdf_report(report_data: Dict, job_id: str) -> str:
-    """Generiert einen professionellen PDF-Report mit Fließtext und Fußnoten"""
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import cm
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-    from reportlab.lib import colors
-    
+    """Generiert einen professionellen PDF-Report mit Fließtext und Fußnoten (im Render-Prozess-Pool)"""
     pdf_dir = 'static/pdfs'
     os.makedirs(pdf_dir, exist_ok=True)
     
@@ -827,216 +1228,6 @@ def generate_pdf_report(report_data: Dict, job_id: str) -> str:
     filename = f'deep_research_{job_id}_{timestamp}.pdf'
     pdf_path = os.path.join(pdf_dir, filename)
     
-    doc = SimpleDocTemplate(pdf_path, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm,
-                           leftMargin=2.5*cm, rightMargin=2.5*cm)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    # Custom Styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#661c31'),
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    company_style = ParagraphStyle(
-        'CompanyStyle',
-        parent=styles['Normal'],
-        fontSize=14,
-        textColor=colors.HexColor('#661c31'),
-        spaceAfter=10,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    header_style = ParagraphStyle(
-        'CustomHeader',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#661c31'),
-        spaceAfter=12,
-        spaceBefore=20,
-        fontName='Helvetica-Bold'
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['BodyText'],
-        fontSize=11,
-        alignment=TA_JUSTIFY,
-        spaceAfter=12,
-        leading=16,
-        fontName='Helvetica'
-    )
-    
-    footnote_style = ParagraphStyle(
-        'FootnoteStyle',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.HexColor('#555555'),
-        spaceAfter=6,
-        leftIndent=20,
-        fontName='Helvetica'
-    )
-    
-    metadata_style = ParagraphStyle(
-        'MetadataStyle',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#666666'),
-        alignment=TA_CENTER,
-        spaceAfter=10
-    )
-    
-    # Header with Company Info
-    story.append(Paragraph("H. & J. Brüggen KG", company_style))
-    story.append(Paragraph("The World of Cereals", metadata_style))
-    story.append(Spacer(1, 0.5*cm))
-    story.append(Paragraph(f"Generiert am: {datetime.now().strftime('%d.%m.%Y')}", metadata_style))
-    story.append(Spacer(1, 1*cm))
-    
-    # Report Title
-    report_title = report_data.get('title', 'Deep Research Report')
-    story.append(Paragraph(report_title, title_style))
-    story.append(Spacer(1, 1*cm))
-    
-    # Introduction
-    if 'introduction' in report_data and report_data['introduction']:
-        story.append(Paragraph("<b>Einleitung</b>", header_style))
-        intro_text = report_data['introduction']
-        story.append(Paragraph(intro_text, body_style))
-        story.append(Spacer(1, 0.5*cm))
-    
-    # Main Content
-    if 'main_content' in report_data and report_data['main_content']:
-        story.append(PageBreak())
-        story.append(Paragraph("<b>Hauptanalyse</b>", header_style))
-        main_text = report_data['main_content']
-        # Split long text into paragraphs if it contains line breaks
-        if '\n\n' in main_text:
-            paragraphs = main_text.split('\n\n')
-            for para in paragraphs:
-                if para.strip():
-                    story.append(Paragraph(para.strip(), body_style))
-        else:
-            story.append(Paragraph(main_text, body_style))
-        story.append(Spacer(1, 0.5*cm))
-    
-    # Market Analysis
-    if 'market_analysis' in report_data and report_data['market_analysis']:
-        story.append(PageBreak())
-        story.append(Paragraph("<b>Marktanalyse</b>", header_style))
-        market_text = report_data['market_analysis']
-        if '\n\n' in market_text:
-            paragraphs = market_text.split('\n\n')
-            for para in paragraphs:
-                if para.strip():
-                    story.append(Paragraph(para.strip(), body_style))
-        else:
-            story.append(Paragraph(market_text, body_style))
-        story.append(Spacer(1, 0.5*cm))
-    
-    # Consumer Insights
-    if 'consumer_insights' in report_data and report_data['consumer_insights']:
-        story.append(PageBreak())
-        story.append(Paragraph("<b>Consumer Insights</b>", header_style))
-        insights_text = report_data['consumer_insights']
-        if isinstance(insights_text, str):
-            if '\n\n' in insights_text:
-                paragraphs = insights_text.split('\n\n')
-                for para in paragraphs:
-                    if para.strip():
-                        story.append(Paragraph(para.strip(), body_style))
-            else:
-                story.append(Paragraph(insights_text, body_style))
-        story.append(Spacer(1, 0.5*cm))
-    
-    # Future Outlook
-    if 'future_outlook' in report_data and report_data['future_outlook']:
-        story.append(PageBreak())
-        story.append(Paragraph("<b>Zukunftsausblick</b>", header_style))
-        future_text = report_data['future_outlook']
-        if '\n\n' in future_text:
-            paragraphs = future_text.split('\n\n')
-            for para in paragraphs:
-                if para.strip():
-                    story.append(Paragraph(para.strip(), body_style))
-        else:
-            story.append(Paragraph(future_text, body_style))
-        story.append(Spacer(1, 0.5*cm))
-    
-    # Conclusion
-    if 'conclusion' in report_data and report_data['conclusion']:
-        story.append(PageBreak())
-        story.append(Paragraph("<b>Fazit</b>", header_style))
-        conclusion_text = report_data['conclusion']
-        if '\n\n' in conclusion_text:
-            paragraphs = conclusion_text.split('\n\n')
-            for para in paragraphs:
-                if para.strip():
-                    story.append(Paragraph(para.strip(), body_style))
-        else:
-            story.append(Paragraph(conclusion_text, body_style))
-        story.append(Spacer(1, 0.5*cm))
-    
-    # Footnotes Section
-    if 'footnotes' in report_data and report_data['footnotes']:
-        story.append(PageBreak())
-        story.append(Paragraph("<b>Fußnoten</b>", header_style))
-        story.append(Spacer(1, 0.3*cm))
-        
-        footnotes = report_data['footnotes']
-        for footnote in footnotes:
-            if isinstance(footnote, dict):
-                num = footnote.get('number', '?')
-                source = footnote.get('source_name', 'Unbekannte Quelle')
-                url = footnote.get('source_url', '')
-                context = footnote.get('context', '')
-                
-                footnote_text = f"<b>[{num}]</b> {source}"
-                if context:
-                    footnote_text += f" - {context}"
-                if url:
-                    footnote_text += f"<br/>&nbsp;&nbsp;&nbsp;&nbsp;<i>{url}</i>"
-                
-                story.append(Paragraph(footnote_text, footnote_style))
-        story.append(Spacer(1, 0.5*cm))
-    
-    # Sources Section
-    story.append(PageBreak())
-    story.append(Paragraph("<b>Quellenverzeichnis</b>", header_style))
-    story.append(Spacer(1, 0.3*cm))
-    
-    sources_list = report_data.get('sources', [])
-    if sources_list:
-        for i, source in enumerate(sources_list, 1):
-            if isinstance(source, dict):
-                source_name = source.get('name', 'Unbekannte Quelle')
-                source_url = source.get('url', '')
-                source_text = f"<b>[{i}]</b> {source_name}"
-                if source_url:
-                    source_text += f"<br/>&nbsp;&nbsp;&nbsp;&nbsp;<i>{source_url}</i>"
-                story.append(Paragraph(source_text, footnote_style))
-    else:
-        story.append(Paragraph("Keine Quellen verfügbar.", body_style))
-    
-    story.append(Spacer(1, 1*cm))
-    
-    # Footer
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.HexColor('#666666'),
-        alignment=TA_CENTER
-    )
-    story.append(Paragraph(f"© {datetime.now().year} H. & J. Brüggen KG - The World of Cereals", footer_style))
-    
-    # Build PDF
-    doc.build(story)
+    render_pdf('research_report', generate_research_report_pdf, report_data, pdf_path)
     
     return f'/static/pdfs/{filename}'
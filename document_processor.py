@@ -1,18 +1,299 @@
+import io
 import os
+import re
+import json
+import time
+import hashlib
 import tempfile
 import zipfile
 import base64
+import threading
+import multiprocessing
 from pathlib import Path
+from collections import Counter
+from werkzeug.utils import secure_filename
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import fitz  # PyMuPDF for PDF processing
 from docx import Document  # python-docx for DOCX processing
 from pptx import Presentation  # python-pptx for PowerPoint processing
 from openpyxl import load_workbook  # openpyxl for Excel processing
+from PIL import Image, ImageOps
 import logging
 from openai import OpenAI
+from utils.upload_cache import save_and_hash, get_cached, set_cached, HASH_CHUNK_SIZE
 
 logger = logging.getLogger(__name__)
 client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
+# Parallel extraction for multi-file uploads: CPU-bound formats on a process pool,
+# Vision API calls (I/O-bound) on a thread pool
+PARALLEL_EXTRACTION = os.environ.get('PARALLEL_EXTRACTION', '1') == '1'
+EXTRACTION_PROCESS_WORKERS = int(os.environ.get('EXTRACTION_PROCESS_WORKERS', min(4, os.cpu_count() or 1)))
+EXTRACTION_THREAD_WORKERS = int(os.environ.get('EXTRACTION_THREAD_WORKERS', 8))
+FILE_PROCESSING_TIMEOUT = int(os.environ.get('FILE_PROCESSING_TIMEOUT', 60))  # seconds per file
+
+# Uploads up to this size stay in memory; larger ones are spilled to a uniquely named temp file
+UPLOAD_DIR = os.environ.get('UPLOAD_DIR', '/tmp/uploads')
+UPLOAD_SPOOL_MAX_BYTES = int(os.environ.get('UPLOAD_SPOOL_MAX_BYTES', 16 * 1024 * 1024))
+
+# Max. characters extracted per file - extraction stops once the prompt limit is reached
+EXTRACTION_CHAR_BUDGET = int(os.environ.get('EXTRACTION_CHAR_BUDGET', 100000))
+
+# Vision API payloads: uploads are downscaled to a maximum long edge and re-encoded,
+# several images of one upload share a single request
+VISION_MAX_EDGE = int(os.environ.get('VISION_MAX_EDGE', 1568))
+VISION_JPEG_QUALITY = int(os.environ.get('VISION_JPEG_QUALITY', 85))
+VISION_BATCH_SIZE = int(os.environ.get('VISION_BATCH_SIZE', 6))
+VISION_MAX_TOKENS_PER_IMAGE = 1000
+
+VISION_PROMPT = (
+    "Analyze this image and extract all text, product information, ingredients, nutritional data, "
+    "or any recipe-related information visible. Provide a detailed description of what you see."
+)
+VISION_BATCH_PROMPT = (
+    "You receive {count} images, each preceded by its label 'Image <index>'. For every image, extract all text, "
+    "product information, ingredients, nutritional data, or any recipe-related information visible and provide "
+    "a detailed description of what you see. Respond with JSON only: "
+    '{{"images": [{{"index": <index>, "text": "<extraction for this image>"}}]}} with one entry per image.'
+)
+
+# PDF pages with less extractable text than this are treated as scanned (if they carry images);
+# only scanned pages are rendered and sent to the Vision API
+PDF_TEXT_MIN_CHARS = int(os.environ.get('PDF_TEXT_MIN_CHARS', 40))
+PDF_VISION_MAX_PAGES = int(os.environ.get('PDF_VISION_MAX_PAGES', 8))
+
+# Running headers/footers: lines among the first/last PDF_MARGIN_LINES lines of a page
+# that repeat on at least PDF_MARGIN_MIN_SHARE of the pages are dropped
+PDF_MARGIN_LINES = 3
+PDF_MARGIN_MIN_SHARE = 0.6
+
+IMAGE_TYPES = ('image/jpeg', 'image/jpg', 'image/png')
+
+CPU_BOUND_TYPES = (
+    'application/pdf',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+)
+
+_process_pool = None
+_process_pool_pid = None
+_thread_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pools():
+    """Create the extraction pools lazily, once per process (gunicorn preloads the app before forking)"""
+    global _process_pool, _process_pool_pid, _thread_pool
+    with _pool_lock:
+        if _process_pool is None or _process_pool_pid != os.getpid():
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _process_pool = ProcessPoolExecutor(max_workers=EXTRACTION_PROCESS_WORKERS, mp_context=context)
+            _process_pool_pid = os.getpid()
+            _thread_pool = ThreadPoolExecutor(max_workers=EXTRACTION_THREAD_WORKERS,
+                                              thread_name_prefix='doc-extract')
+        return _process_pool, _thread_pool
+
+
+def _collect_text(chunks, char_budget):
+    """
+    Join streamed text chunks until the character budget is reached
+
+    Returns:
+        tuple: (text, truncated)
+    """
+    parts = []
+    remaining = char_budget
+    for chunk in chunks:
+        if len(chunk) > remaining:
+            parts.append(chunk[:remaining])
+            return ''.join(parts), True
+        parts.append(chunk)
+        remaining -= len(chunk)
+    return ''.join(parts), False
+
+
+def _encode_for_vision(source, max_edge=VISION_MAX_EDGE, quality=VISION_JPEG_QUALITY):
+    """
+    Downscale an image to max_edge (long side) and re-encode it for the Vision API
+
+    Returns:
+        tuple: (data URL, stats dict)
+    """
+    original_bytes = len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+    with Image.open(_readable(source)) as original:
+        original_size = original.size
+        # Phone photos store their rotation in EXIF, which is lost on re-encode
+        img = ImageOps.exif_transpose(original)
+        if max(img.size) > max_edge:
+            img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        buffer = io.BytesIO()
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            img.save(buffer, format='PNG', optimize=True)
+            mime_type = 'image/png'
+        else:
+            img.convert('RGB').save(buffer, format='JPEG', quality=quality, optimize=True)
+            mime_type = 'image/jpeg'
+        payload = buffer.getvalue()
+        stats = {
+            'original_bytes': original_bytes,
+            'payload_bytes': len(payload),
+            'original_dimensions': f"{original_size[0]}x{original_size[1]}",
+            'dimensions': f"{img.width}x{img.height}"
+        }
+    return _data_url(payload, mime_type), stats
+
+
+def _data_url(payload, mime_type):
+    return f"data:{mime_type};base64,{base64.b64encode(payload).decode('utf-8')}"
+
+
+def _render_page_for_vision(page, max_edge=VISION_MAX_EDGE, quality=VISION_JPEG_QUALITY):
+    """Render a PDF page as a JPEG data URL with its long edge at most max_edge pixels"""
+    zoom = min(2.0, max_edge / max(page.rect.width, page.rect.height))
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    return _data_url(pix.tobytes("jpg", jpg_quality=quality), 'image/jpeg')
+
+
+def _margin_key(line):
+    """Normalize a header/footer line so page numbers and dates do not make it unique"""
+    return re.sub(r'\d+', '#', ' '.join(line.lower().split()))
+
+
+def _strip_repeated_margins(pages, margin_lines=PDF_MARGIN_LINES, min_share=PDF_MARGIN_MIN_SHARE):
+    """
+    Remove running headers and footers that repeat across pages
+    
+    Args:
+        pages (list): Text per page
+        
+    Returns:
+        tuple: (cleaned text per page, number of removed lines)
+    """
+    if len(pages) < 3:
+        return pages, 0
+    
+    page_lines = [page.split('\n') for page in pages]
+    margins = []
+    counts = Counter()
+    for lines in page_lines:
+        content = [i for i, line in enumerate(lines) if line.strip()]
+        # Short pages have no room for a header/footer band - never let the margins reach the body
+        band = min(margin_lines, len(content) // 4)
+        edge = set(content[:band] + content[len(content) - band:]) if band else set()
+        margins.append(edge)
+        counts.update({_margin_key(lines[i]) for i in edge})
+    
+    threshold = max(2, min_share * len(pages))
+    repeated = {key for key, count in counts.items() if count >= threshold}
+    if not repeated:
+        return pages, 0
+    
+    cleaned = []
+    removed = 0
+    for lines, edge in zip(page_lines, margins):
+        kept = [line for i, line in enumerate(lines) if i not in edge or _margin_key(line) not in repeated]
+        removed += len(lines) - len(kept)
+        cleaned.append('\n'.join(kept))
+    return cleaned, removed
+
+
+def _readable(source):
+    """Extractor input: file path (str) or in-memory upload (bytes) -> something the parsers can open"""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def _open_pdf(source):
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype='pdf')
+    return fitz.open(source)
+
+
+def _source_name(source):
+    return '<in-memory upload>' if isinstance(source, (bytes, bytearray)) else os.path.basename(source)
+
+
+class SpooledUpload:
+    """
+    An uploaded file, held in memory up to UPLOAD_SPOOL_MAX_BYTES and spilled to a
+    uniquely named temp file above that. Always release it with close() (or cleanup_files).
+    """
+    
+    def __init__(self, file_storage, upload_dir=UPLOAD_DIR, max_memory=UPLOAD_SPOOL_MAX_BYTES):
+        self.filename = file_storage.filename
+        self.content_type = file_storage.content_type
+        self.path = None
+        self._data = None
+        suffix = os.path.splitext(file_storage.filename or '')[1].lower()
+        
+        digest = hashlib.sha256()
+        spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        target = spool
+        size = 0
+        try:
+            while True:
+                chunk = file_storage.stream.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+                if target is spool and size > max_memory:
+                    # Spill to a named file (parsers and the process pool need a path, not an anonymous fd)
+                    os.makedirs(upload_dir, exist_ok=True)
+                    target = tempfile.NamedTemporaryFile(delete=False, dir=upload_dir, prefix='upload_', suffix=suffix)
+                    self.path = target.name
+                    spool.seek(0)
+                    target.write(spool.read())
+                    spool.close()
+                target.write(chunk)
+            if target is spool:
+                spool.seek(0)
+                self._data = spool.read()
+        except Exception:
+            self.close()
+            raise
+        finally:
+            target.close()
+        
+        self.size = size
+        self.content_hash = digest.hexdigest()
+    
+    @property
+    def in_memory(self):
+        return self.path is None
+    
+    @property
+    def source(self):
+        """What the extractors read: the bytes for in-memory uploads, the temp file path otherwise"""
+        return self._data if self.in_memory else self.path
+    
+    def save_to(self, destination):
+        """Write the upload to a permanent location"""
+        if self.in_memory:
+            with open(destination, 'wb') as target:
+                target.write(self._data)
+        else:
+            import shutil
+            shutil.copyfile(self.path, destination)
+    
+    def close(self):
+        self._data = None
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+
+def _extract_file(source, file_type):
+    """Process pool entry point (must be a picklable module-level function)"""
+    return document_processor.process_file(source, file_type)
+
+
+def _extract_pdf_pages(source):
+    """Process pool entry point for PDFs: page classification and rendering only, the Vision calls stay in the parent"""
+    return document_processor._classify_pdf_pages(source)
+
+
 class DocumentProcessor:
     """
     Process various document types and extract text content for AI analysis
@@ -29,17 +310,18 @@ class DocumentProcessor:
             'image/jpg',
             'image/png'
         ]
+        self.char_budget = EXTRACTION_CHAR_BUDGET
     
     def is_supported(self, file_type):
         """Check if file type is supported"""
         return file_type in self.supported_types
     
-    def process_file(self, file_path, file_type):
+    def process_file(self, source, file_type):
         """
         Process a file and extract text content based on file type
         
         Args:
-            file_path (str): Path to the file
+            source (str | bytes): Path to the file or the in-memory upload
             file_type (str): MIME type of the file
             
         Returns:
@@ -47,84 +329,178 @@ class DocumentProcessor:
         """
         try:
             if file_type == 'application/pdf':
-                return self._process_pdf(file_path)
+                return self._process_pdf(source)
             elif file_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-                return self._process_docx(file_path)
+                return self._process_docx(source)
             elif file_type == 'application/vnd.openxmlformats-officedocument.presentationml.presentation':
-                return self._process_pptx(file_path)
+                return self._process_pptx(source)
             elif file_type == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet':
-                return self._process_xlsx(file_path)
+                return self._process_xlsx(source)
             elif file_type == 'text/plain':
-                return self._process_txt(file_path)
-            elif file_type in ['image/jpeg', 'image/jpg', 'image/png']:
-                return self._process_image(file_path)
+                return self._process_txt(source)
+            elif file_type in IMAGE_TYPES:
+                return self._process_image(source)
             else:
                 raise ValueError(f"Unsupported file type: {file_type}")
                 
         except Exception as e:
-            logger.error(f"Error processing file {file_path}: {str(e)}")
+            logger.error(f"Error processing file {_source_name(source)}: {str(e)}")
             raise
     
-    def _process_pdf(self, file_path):
-        """Extract text from PDF file using PyMuPDF"""
+    def _log_truncated(self, source, truncated):
+        if truncated:
+            logger.info(f"Extraction of {_source_name(source)} stopped at {self.char_budget} characters")
+    
+    def _process_pdf(self, source):
+        """
+        Extract text from PDF file using PyMuPDF (page by page, up to the character budget)
+        
+        Text-layer pages are read directly; scanned pages (images without a text layer) are
+        rendered downscaled and read by the Vision API. Repeated headers and footers are dropped.
+        """
+        return self._finish_pdf(source, self._classify_pdf_pages(source))
+    
+    def _process_pdf_pooled(self, process_pool, source, timeout):
+        """Classify and render the pages in the process pool, then call the Vision API from this thread"""
+        pages = process_pool.submit(_extract_pdf_pages, source).result(timeout=timeout)
+        return self._finish_pdf(source, pages)
+    
+    def _classify_pdf_pages(self, source):
+        """
+        CPU-bound part of the PDF extraction (no network calls, safe for the process pool)
+        
+        Returns:
+            dict: cleaned text per text page, scanned page numbers with their rendered
+            data URLs (up to PDF_VISION_MAX_PAGES) and page statistics
+        """
+        try:
+            with _open_pdf(source) as doc:
+                page_count = len(doc)
+                text_pages = {}
+                scanned_pages = []
+                collected = 0
+                truncated = False
+                for page in doc:
+                    text = page.get_text("text")
+                    if len(text.strip()) < PDF_TEXT_MIN_CHARS and page.get_images():
+                        scanned_pages.append(page.number)
+                    elif text.strip():
+                        text_pages[page.number] = text
+                        collected += len(text)
+                    if collected >= self.char_budget:
+                        truncated = page.number < page_count - 1
+                        break
+                
+                renders = [_render_page_for_vision(doc[number]) for number in scanned_pages[:PDF_VISION_MAX_PAGES]]
+            
+            cleaned, removed_lines = _strip_repeated_margins(list(text_pages.values()))
+            return {
+                'page_count': page_count,
+                'text_pages': dict(zip(text_pages.keys(), cleaned)),
+                'scanned_pages': scanned_pages,
+                'renders': renders,
+                'removed_lines': removed_lines,
+                'truncated': truncated
+            }
+            
+        except Exception as e:
+            raise Exception(f"Failed to process PDF: {str(e)}")
+    
+    def _finish_pdf(self, source, pages):
+        """Read the rendered scanned pages with the Vision API and assemble the PDF result"""
         try:
-            doc = fitz.open(file_path)
-            text_content = ""
-            page_count = 0
+            scanned_pages = pages['scanned_pages']
+            if len(scanned_pages) > PDF_VISION_MAX_PAGES:
+                logger.info(f"{_source_name(source)}: {len(scanned_pages)} scanned pages, "
+                            f"only the first {PDF_VISION_MAX_PAGES} are sent to the Vision API")
             
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                text_content += page.get_text("text")  # Updated PyMuPDF API
-                page_count += 1
+            page_texts = dict(pages['text_pages'])
+            scanned_texts, unread_pages = self._read_scanned_pages(scanned_pages[:PDF_VISION_MAX_PAGES], pages['renders'])
+            page_texts.update(scanned_texts)
             
-            doc.close()
+            text_content, budget_hit = _collect_text(
+                (page_texts[number] + "\n" for number in sorted(page_texts)), self.char_budget
+            )
+            truncated = pages['truncated'] or budget_hit
+            self._log_truncated(source, truncated)
+            logger.info(f"PDF {_source_name(source)}: {len(pages['text_pages'])} text page(s), "
+                        f"{len(scanned_pages)} scanned, {pages['removed_lines']} header/footer line(s) removed")
             
             return {
                 'text': text_content.strip(),
-                'page_count': page_count,
+                'page_count': pages['page_count'],
+                'text_pages': len(pages['text_pages']),
+                'scanned_pages': len(scanned_pages),
+                'unread_pages': [number + 1 for number in unread_pages],
+                'vision_failed': bool(unread_pages),
                 'word_count': len(text_content.split()),
-                'file_type': 'PDF'
+                'file_type': 'PDF',
+                'truncated': truncated
             }
             
         except Exception as e:
             raise Exception(f"Failed to process PDF: {str(e)}")
     
-    def _process_docx(self, file_path):
+    def _read_scanned_pages(self, page_numbers, renders):
+        """
+        Vision API text for rendered scanned pages
+        
+        Returns:
+            tuple: ({page number: text}, page numbers that could not be read)
+        """
+        texts = {}
+        for start in range(0, len(renders), VISION_BATCH_SIZE):
+            batch = page_numbers[start:start + VISION_BATCH_SIZE]
+            answers, latency = self._vision_texts(renders[start:start + VISION_BATCH_SIZE])
+            logger.info(f"Vision API read {len(answers)} of {len(batch)} scanned page(s) in {latency * 1000:.0f}ms")
+            for position, text in answers.items():
+                texts[batch[position]] = f"[Scanned page {batch[position] + 1}]\n{text}"
+        missing = [number for number in page_numbers if number not in texts]
+        if missing:
+            logger.warning(f"Vision API could not read scanned page(s) {', '.join(str(n + 1) for n in missing)}")
+        return texts, missing
+    
+    def _iter_docx_chunks(self, doc, stats):
+        """Yield paragraph texts, then table rows"""
+        for paragraph in doc.paragraphs:
+            if paragraph.text.strip():
+                stats['paragraphs'] += 1
+                yield paragraph.text + "\n"
+        
+        for table in doc.tables:
+            for row in table.rows:
+                yield ''.join(cell.text + " " for cell in row.cells if cell.text.strip()) + "\n"
+    
+    def _process_docx(self, source):
         """Extract text from DOCX file using python-docx"""
         try:
-            doc = Document(file_path)
-            text_content = ""
-            paragraph_count = 0
-            
-            # Extract text from paragraphs
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_content += paragraph.text + "\n"
-                    paragraph_count += 1
-            
-            # Extract text from tables if any
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            text_content += cell.text + " "
-                    text_content += "\n"
+            doc = Document(_readable(source))
+            stats = {'paragraphs': 0}
+            text_content, truncated = _collect_text(self._iter_docx_chunks(doc, stats), self.char_budget)
+            self._log_truncated(source, truncated)
             
             return {
                 'text': text_content.strip(),
-                'paragraph_count': paragraph_count,
+                'paragraph_count': stats['paragraphs'],
                 'word_count': len(text_content.split()),
-                'file_type': 'Word Document'
+                'file_type': 'Word Document',
+                'truncated': truncated
             }
             
         except Exception as e:
             raise Exception(f"Failed to process DOCX: {str(e)}")
     
-    def _process_txt(self, file_path):
+    def _process_txt(self, source):
         """Extract text from plain text file"""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                text_content = file.read()
+            if isinstance(source, (bytes, bytearray)):
+                decoded = source.decode('utf-8', errors='ignore')
+                text_content, truncated = decoded[:self.char_budget], len(decoded) > self.char_budget
+            else:
+                with open(source, 'r', encoding='utf-8', errors='ignore') as file:
+                    text_content = file.read(self.char_budget)
+                    truncated = bool(file.read(1))
+            self._log_truncated(source, truncated)
             
             lines = text_content.split('\n')
             line_count = len([line for line in lines if line.strip()])
@@ -133,171 +509,311 @@ class DocumentProcessor:
                 'text': text_content.strip(),
                 'line_count': line_count,
                 'word_count': len(text_content.split()),
-                'file_type': 'Text File'
+                'file_type': 'Text File',
+                'truncated': truncated
             }
             
         except Exception as e:
             raise Exception(f"Failed to process TXT: {str(e)}")
     
-    def _process_pptx(self, file_path):
+    def _iter_pptx_slides(self, prs):
+        """Yield the text of one slide at a time"""
+        for slide in prs.slides:
+            parts = []
+            # Extract text from shapes and tables
+            for shape in slide.shapes:
+                if hasattr(shape, "has_table") and shape.has_table:
+                    for row in shape.table.rows:
+                        row_text = [cell.text.strip() for cell in row.cells]
+                        if any(row_text):  # Only add non-empty rows
+                            parts.append("\t".join(row_text) + "\n")
+                elif hasattr(shape, "has_text_frame") and shape.has_text_frame:
+                    if shape.text and shape.text.strip():
+                        parts.append(shape.text + "\n")
+
+            # Extract notes if available
+            if slide.has_notes_slide and slide.notes_slide.notes_text_frame:
+                notes_text = slide.notes_slide.notes_text_frame.text
+                if notes_text and notes_text.strip():
+                    parts.append(f"[Notes: {notes_text}]\n")
+            
+            # Add slide separator
+            parts.append("\n")
+            yield ''.join(parts)
+    
+    def _process_pptx(self, source):
         """Extract text from PowerPoint file using python-pptx"""
         try:
-            prs = Presentation(file_path)
-            text_content = ""
-            slide_count = 0
-            
-            for slide in prs.slides:
-                slide_count += 1
-                # Extract text from shapes and tables
-                for shape in slide.shapes:
-                    if hasattr(shape, "has_table") and shape.has_table:
-                        for row in shape.table.rows:
-                            row_text = [cell.text.strip() for cell in row.cells]
-                            if any(row_text):  # Only add non-empty rows
-                                text_content += "\t".join(row_text) + "\n"
-                    elif hasattr(shape, "has_text_frame") and shape.has_text_frame:
-                        if shape.text and shape.text.strip():
-                            text_content += shape.text + "\n"
-
-                # Extract notes if available
-                if slide.has_notes_slide and slide.notes_slide.notes_text_frame:
-                    notes_text = slide.notes_slide.notes_text_frame.text
-                    if notes_text and notes_text.strip():
-                        text_content += f"[Notes: {notes_text}]\n"
-                
-                # Add slide separator
-                text_content += "\n"
+            prs = Presentation(_readable(source))
+            slide_count = len(prs.slides)
+            text_content, truncated = _collect_text(self._iter_pptx_slides(prs), self.char_budget)
+            self._log_truncated(source, truncated)
             
             return {
                 'text': text_content.strip(),
                 'slide_count': slide_count,
                 'word_count': len(text_content.split()),
-                'file_type': 'PowerPoint'
+                'file_type': 'PowerPoint',
+                'truncated': truncated
             }
             
         except Exception as e:
             raise Exception(f"Failed to process PowerPoint: {str(e)}")
     
-    def _process_xlsx(self, file_path):
-        """Extract text from Excel file using openpyxl"""
-        try:
-            workbook = load_workbook(file_path, data_only=True)
-            text_content = ""
-            sheet_count = len(workbook.sheetnames)
+    def _iter_xlsx_rows(self, workbook):
+        """Yield a header per sheet followed by its rows (streamed from the read-only workbook)"""
+        for sheet_name in workbook.sheetnames:
+            sheet = workbook[sheet_name]
+            yield f"--- Sheet: {sheet_name} ---\n"
             
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                text_content += f"--- Sheet: {sheet_name} ---\n"
-                
-                for row in sheet.iter_rows(values_only=True):
-                    row_data = [str(cell) if cell is not None else '' for cell in row]
-                    row_text = ' | '.join(row_data)
-                    if row_text.strip():
-                        text_content += row_text + "\n"
-                
-                text_content += "\n"
+            for row in sheet.iter_rows(values_only=True):
+                row_text = ' | '.join(str(cell) if cell is not None else '' for cell in row)
+                if row_text.strip():
+                    yield row_text + "\n"
+            
+            yield "\n"
+    
+    def _process_xlsx(self, source):
+        """Extract text from Excel file using openpyxl (read-only streaming)"""
+        try:
+            workbook = load_workbook(_readable(source), read_only=True, data_only=True)
+            try:
+                sheet_count = len(workbook.sheetnames)
+                text_content, truncated = _collect_text(self._iter_xlsx_rows(workbook), self.char_budget)
+            finally:
+                workbook.close()
+            self._log_truncated(source, truncated)
             
             return {
                 'text': text_content.strip(),
                 'sheet_count': sheet_count,
                 'word_count': len(text_content.split()),
-                'file_type': 'Excel'
+                'file_type': 'Excel',
+                'truncated': truncated
             }
             
         except Exception as e:
             raise Exception(f"Failed to process Excel: {str(e)}")
     
-    def _process_image(self, file_path):
+    def _process_image(self, source):
         """Process image file using OpenAI Vision API"""
-        try:
-            # Read image and encode to base64
-            with open(file_path, 'rb') as image_file:
-                image_data = base64.b64encode(image_file.read()).decode('utf-8')
-            
-            # Determine image format from file extension
-            file_ext = os.path.splitext(file_path)[1].lower()
-            mime_type = 'image/jpeg' if file_ext in ['.jpg', '.jpeg'] else 'image/png'
-            
-            # Use OpenAI Vision API to analyze image
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Analyze this image and extract all text, product information, ingredients, nutritional data, or any recipe-related information visible. Provide a detailed description of what you see."
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:{mime_type};base64,{image_data}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=1000
-            )
-            
-            extracted_text = response.choices[0].message.content
-            
-            return {
-                'text': extracted_text,
-                'word_count': len(extracted_text.split()),
-                'file_type': 'Image (Vision API)'
-            }
+        return self._process_images([source])[0]
+    
+    def _process_images(self, sources):
+        """
+        Analyze images with the OpenAI Vision API in a single request
+        
+        Args:
+            sources (list): Image paths or bytes (callers chunk by VISION_BATCH_SIZE)
             
+        Returns:
+            list: One result dict per image in input order (placeholder result on failure)
+        """
+        prepared = []
+        for source in sources:
+            try:
+                prepared.append(_encode_for_vision(source))
+            except Exception as e:
+                logger.error(f"Could not prepare image {_source_name(source)} for Vision API: {str(e)}")
+                prepared.append(None)
+        
+        indices = [i for i, item in enumerate(prepared) if item is not None]
+        texts = {}
+        latency = 0.0
+        if indices:
+            texts, latency = self._vision_texts([prepared[i][0] for i in indices])
+            texts = {indices[position]: text for position, text in texts.items()}
+        
+        results = []
+        for i, source in enumerate(sources):
+            if i not in texts:
+                # Fallback to placeholder if Vision API fails
+                results.append({
+                    'text': '[IMAGE FILE - Could not analyze visual content]',
+                    'word_count': 0,
+                    'file_type': 'Image',
+                    'vision_failed': True
+                })
+                continue
+            stats = dict(prepared[i][1], latency_ms=round(latency * 1000), batch_size=len(indices))
+            logger.info(f"Vision API {_source_name(source)}: {stats['original_bytes']} -> "
+                        f"{stats['payload_bytes']} bytes ({stats['original_dimensions']} -> {stats['dimensions']}), "
+                        f"{stats['latency_ms']}ms, batch of {stats['batch_size']}")
+            results.append({
+                'text': texts[i],
+                'word_count': len(texts[i].split()),
+                'file_type': 'Image (Vision API)',
+                'vision_stats': stats
+            })
+        return results
+    
+    def _vision_texts(self, data_urls):
+        """
+        Read a batch of encoded images; images the batched answer did not cover are retried one by one
+        
+        Returns:
+            tuple: ({position: extracted text} for the images that could be read, latency in seconds)
+        """
+        texts = {}
+        latency = 0.0
+        try:
+            texts, latency = self._vision_request(data_urls)
         except Exception as e:
             logger.error(f"Vision API error: {str(e)}")
-            # Fallback to placeholder if Vision API fails
-            return {
-                'text': '[IMAGE FILE - Could not analyze visual content]',
-                'word_count': 0,
-                'file_type': 'Image'
-            }
+        
+        if len(data_urls) > 1:
+            for position, data_url in enumerate(data_urls):
+                if position in texts:
+                    continue
+                try:
+                    single_texts, single_latency = self._vision_request([data_url])
+                    texts[position] = single_texts[0]
+                    latency += single_latency
+                except Exception as e:
+                    logger.error(f"Vision API error: {str(e)}")
+        return texts, latency
+    
+    def _vision_request(self, data_urls):
+        """
+        Send one or more encoded images in one Vision API request
+        
+        Returns:
+            tuple: ({position: extracted text}, latency in seconds)
+        """
+        if len(data_urls) == 1:
+            content = [
+                {"type": "text", "text": VISION_PROMPT},
+                {"type": "image_url", "image_url": {"url": data_urls[0]}}
+            ]
+        else:
+            content = [{"type": "text", "text": VISION_BATCH_PROMPT.format(count=len(data_urls))}]
+            for position, data_url in enumerate(data_urls):
+                content.append({"type": "text", "text": f"Image {position}"})
+                content.append({"type": "image_url", "image_url": {"url": data_url}})
+        
+        request_args = {
+            'model': "gpt-4o",
+            'messages': [{"role": "user", "content": content}],
+            'max_tokens': VISION_MAX_TOKENS_PER_IMAGE * len(data_urls)
+        }
+        if len(data_urls) > 1:
+            request_args['response_format'] = {"type": "json_object"}
+        
+        start = time.perf_counter()
+        response = client.chat.completions.create(**request_args)
+        latency = time.perf_counter() - start
+        answer = response.choices[0].message.content
+        
+        if len(data_urls) == 1:
+            return {0: answer}, latency
+        
+        texts = {}
+        try:
+            for entry in json.loads(answer).get('images', []):
+                position = int(entry.get('index', -1))
+                if 0 <= position < len(data_urls) and entry.get('text'):
+                    texts[position] = str(entry['text'])
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Could not parse batched Vision API answer: {str(e)}")
+        return texts, latency
+    
+    def _image_batches(self, files_data):
+        """Indices of image files grouped into Vision API batches (empty if there is nothing to batch)"""
+        indices = [i for i, (_, file_type, _) in enumerate(files_data) if file_type in IMAGE_TYPES]
+        if len(indices) < 2:
+            return []
+        return [indices[start:start + VISION_BATCH_SIZE] for start in range(0, len(indices), VISION_BATCH_SIZE)]
     
-    def process_multiple_files(self, files_data):
+    def process_multiple_files(self, files_data, parallel=None, timeout=FILE_PROCESSING_TIMEOUT,
+                               content_hashes=None, refresh=False):
         """
         Process multiple files and combine their content
         
         Args:
-            files_data (list): List of tuples (file_path, file_type, original_name)
+            files_data (list): List of tuples (source, file_type, original_name); source is a
+                file path or the bytes of an in-memory upload
+            parallel (bool): Extract files concurrently (default: PARALLEL_EXTRACTION)
+            timeout (int): Per-file timeout in seconds for parallel extraction
+            content_hashes (list): Optional SHA-256 per file - extractions are cached by content
+            refresh (bool): Ignore cached extractions (fresh results are still stored)
             
         Returns:
-            dict: Combined processing results
+            dict: Combined processing results (file order is preserved)
         """
+        if parallel is None:
+            parallel = PARALLEL_EXTRACTION
+        hashes = content_hashes or [None] * len(files_data)
+        cache_model = f"chars{self.char_budget}"
+        
+        outcomes = [None] * len(files_data)
+        if not refresh:
+            for i, content_hash in enumerate(hashes):
+                cached = get_cached('extraction', content_hash, cache_model)
+                if cached is not None:
+                    outcomes[i] = (cached, None)
+        pending = [i for i, outcome in enumerate(outcomes) if outcome is None]
+        pending_files = [files_data[i] for i in pending]
+        
+        start = time.perf_counter()
+        if parallel and len(pending_files) > 1:
+            extracted = self._extract_parallel(pending_files, timeout)
+        else:
+            extracted = [None] * len(pending_files)
+            for batch in self._image_batches(pending_files):
+                batch_results = self._process_images([pending_files[i][0] for i in batch])
+                for i, result in zip(batch, batch_results):
+                    extracted[i] = (result, None)
+            for i, (file_path, file_type, original_name) in enumerate(pending_files):
+                if extracted[i] is not None:
+                    continue
+                try:
+                    extracted[i] = (self.process_file(file_path, file_type), None)
+                except Exception as e:
+                    extracted[i] = (None, e)
+        for i, outcome in zip(pending, extracted):
+            outcomes[i] = outcome
+            # Degraded results (Vision API could not read an image or scanned page) are not cached
+            if outcome[1] is None and not outcome[0].get('vision_failed'):
+                set_cached('extraction', hashes[i], outcome[0], cache_model)
+        logger.info(f"Extracted {len(pending_files)} of {len(files_data)} file(s) in "
+                    f"{time.perf_counter() - start:.2f}s "
+                    f"({'parallel' if parallel and len(pending_files) > 1 else 'sequential'}, "
+                    f"{len(files_data) - len(pending_files)} from cache)")
+        
         combined_text = ""
         file_summaries = []
         total_word_count = 0
         
-        for file_path, file_type, original_name in files_data:
-            try:
-                result = self.process_file(file_path, file_type)
-                
+        for (file_path, file_type, original_name), (result, error) in zip(files_data, outcomes):
+            if error is None:
                 # Add file separator
                 combined_text += f"\n\n--- Content from {original_name} ---\n\n"
                 combined_text += result['text']
                 
                 # Track file summary
-                file_summaries.append({
+                summary = {
                     'name': original_name,
                     'type': result['file_type'],
                     'word_count': result['word_count'],
+                    'truncated': result.get('truncated', False),
                     'processed_successfully': True
-                })
+                }
+                if 'vision_stats' in result:
+                    summary['vision_stats'] = result['vision_stats']
+                if result.get('vision_failed'):
+                    summary['vision_failed'] = True
+                file_summaries.append(summary)
                 
                 total_word_count += result['word_count']
                 
-            except Exception as e:
-                logger.error(f"Failed to process {original_name}: {str(e)}")
+            else:
+                logger.error(f"Failed to process {original_name}: {str(error)}")
                 file_summaries.append({
                     'name': original_name,
                     'type': 'Unknown',
                     'word_count': 0,
                     'processed_successfully': False,
-                    'error': str(e)
+                    'error': str(error)
                 })
         
         return {
@@ -305,9 +821,46 @@ class DocumentProcessor:
             'file_summaries': file_summaries,
             'total_word_count': total_word_count,
             'total_files': len(files_data),
-            'successful_files': len([f for f in file_summaries if f['processed_successfully']])
+            'successful_files': len([f for f in file_summaries if f['processed_successfully']]),
+            'degraded': any(f.get('vision_failed') for f in file_summaries)
         }
     
+    def _extract_parallel(self, files_data, timeout):
+        """
+        Extract all files concurrently and return [(result, error), ...] in input order.
+        The timeout counts from submission; a timed-out file is reported as failed
+        (a worker that is already running finishes in the background).
+        """
+        process_pool, thread_pool = _get_pools()
+        # futures[i] = (future, position in the batch result or None)
+        futures = [None] * len(files_data)
+        for batch in self._image_batches(files_data):
+            future = thread_pool.submit(self._process_images, [files_data[i][0] for i in batch])
+            for position, i in enumerate(batch):
+                futures[i] = (future, position)
+        for i, (file_path, file_type, original_name) in enumerate(files_data):
+            if futures[i] is not None:
+                continue
+            if file_type == 'application/pdf':
+                futures[i] = (thread_pool.submit(self._process_pdf_pooled, process_pool, file_path, timeout), None)
+            elif file_type in CPU_BOUND_TYPES:
+                futures[i] = (process_pool.submit(_extract_file, file_path, file_type), None)
+            else:
+                futures[i] = (thread_pool.submit(self.process_file, file_path, file_type), None)
+        
+        deadline = time.monotonic() + timeout
+        outcomes = []
+        for (future, position), (file_path, file_type, original_name) in zip(futures, files_data):
+            try:
+                result = future.result(timeout=max(0, deadline - time.monotonic()))
+                outcomes.append((result if position is None else result[position], None))
+            except FutureTimeoutError:
+                future.cancel()
+                outcomes.append((None, TimeoutError(f"Processing {original_name} timed out after {timeout}s")))
+            except Exception as e:
+                outcomes.append((None, e))
+        return outcomes
+    
     def save_uploaded_file(self, file_storage, upload_dir='/tmp/uploads'):
         """
         Save uploaded file to temporary directory
@@ -319,28 +872,56 @@ class DocumentProcessor:
         Returns:
             str: Path to saved file
         """
+        return self.save_uploaded_file_with_hash(file_storage, upload_dir)[0]
+    
+    def save_uploaded_file_with_hash(self, file_storage, upload_dir='/tmp/uploads'):
+        """
+        Save uploaded file to temporary directory, hashing it while it streams to disk
+        
+        Returns:
+            tuple: (path to saved file, SHA-256 hex digest of the content)
+        """
         try:
             # Create upload directory if it doesn't exist
             os.makedirs(upload_dir, exist_ok=True)
             
-            # Generate unique filename
-            filename = file_storage.filename
-            temp_filename = f"{tempfile.gettempprefix()}{filename}"
-            file_path = os.path.join(upload_dir, temp_filename)
+            # Generate unique filename (concurrent uploads of the same name must not collide)
+            suffix = os.path.splitext(secure_filename(file_storage.filename or ''))[1].lower()
+            fd, file_path = tempfile.mkstemp(dir=upload_dir, prefix='upload_', suffix=suffix)
+            os.close(fd)
             
             # Save file
-            file_storage.save(file_path)
+            try:
+                content_hash = save_and_hash(file_storage, file_path)
+            except Exception:
+                os.remove(file_path)
+                raise
             
-            return file_path
+            return file_path, content_hash
             
         except Exception as e:
             raise Exception(f"Failed to save uploaded file: {str(e)}")
     
+    def spool_upload(self, file_storage, upload_dir=UPLOAD_DIR):
+        """
+        Read an upload into memory (or a uniquely named temp file above UPLOAD_SPOOL_MAX_BYTES)
+        
+        Returns:
+            SpooledUpload: pass .source to process_file / process_multiple_files,
+            release it with cleanup_files([...])
+        """
+        try:
+            return SpooledUpload(file_storage, upload_dir)
+        except Exception as e:
+            raise Exception(f"Failed to save uploaded file: {str(e)}")
+    
     def cleanup_files(self, file_paths):
-        """Clean up temporary files"""
+        """Clean up temporary files (paths or SpooledUpload objects)"""
         for file_path in file_paths:
             try:
-                if os.path.exists(file_path):
+                if isinstance(file_path, SpooledUpload):
+                    file_path.close()
+                elif os.path.exists(file_path):
                     os.remove(file_path)
             except Exception as e:
                 logger.warning(f"Failed to cleanup file {file_path}: {str(e)}")
@@ -3,17 +3,56 @@ Excel Batch Processor
 Processes multiple Excel files containing recipe data and merges them based on specification numbers
 """
 
+import os
 import openpyxl
 import logging
 import re
+import time
+import threading
+import multiprocessing
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from nutriscore_mapper import get_nutriscore_image, extract_nutriscore_from_text
 
 logger = logging.getLogger(__name__)
 
+XLSX_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Workbooks of one batch are parsed in parallel (openpyxl is pure Python and holds the GIL)
+BATCH_PARSE_WORKERS = int(os.environ.get('BATCH_PARSE_WORKERS', min(4, os.cpu_count() or 1)))
+BATCH_PARSE_TIMEOUT = int(os.environ.get('BATCH_PARSE_TIMEOUT', 300))  # seconds for the whole batch
+
+# Fields compared when the same specification appears in several workbooks of one kind
+CONFLICT_FIELDS = {
+    'ingredients': ('ingredients',),
+    'nutritional': ('nutritional_info', 'nutri_score', 'category'),
+}
+
+_parse_pool = None
+_parse_pool_pid = None
+_parse_pool_lock = threading.Lock()
+
+
+def _get_parse_pool():
+    """Create the parse pool lazily, once per process (gunicorn preloads the app before forking)"""
+    global _parse_pool, _parse_pool_pid
+    with _parse_pool_lock:
+        if _parse_pool is None or _parse_pool_pid != os.getpid():
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _parse_pool = ProcessPoolExecutor(max_workers=BATCH_PARSE_WORKERS, mp_context=context)
+            _parse_pool_pid = os.getpid()
+        return _parse_pool
+
+
+def _parse_workbook_file(file_path):
+    """Process pool entry point (must be a picklable module-level function)"""
+    return ExcelBatchProcessor()._process_workbook(file_path)
+
 class ExcelBatchProcessor:
     def __init__(self):
         self.recipes_data = {}
+        self.conflicts = []
     
     def process_batch_files(self, excel_files):
         """
@@ -25,58 +64,129 @@ class ExcelBatchProcessor:
         Returns:
             dict: Dictionary with specification numbers as keys and recipe data as values
         """
+        workbooks = [(file_path, filename) for file_path, file_type, filename in excel_files if file_type == XLSX_TYPE]
+        parsed = self._parse_workbooks([file_path for file_path, _ in workbooks])
+        
+        # Several workbooks of the same kind are merged by specification number
+        self.conflicts = []
         ingredients_data = {}
         nutritional_data = {}
+        sources = {'ingredients': {}, 'nutritional': {}}
+        for (file_path, filename), (file_kind, recipes) in zip(workbooks, parsed):
+            if file_kind == 'ingredients':
+                self._merge_workbook(ingredients_data, recipes, file_kind, filename, sources[file_kind])
+            elif file_kind == 'nutritional':
+                self._merge_workbook(nutritional_data, recipes, file_kind, filename, sources[file_kind])
+            else:
+                logger.warning(f"Excel file {filename} is neither an ingredients nor a nutritional file - skipped")
         
-        for file_path, file_type, filename in excel_files:
-            if file_type == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet':
-                # Determine file type based on content
-                if self._is_ingredients_file(file_path):
-                    ingredients_data = self._parse_ingredients_excel(file_path)
-                elif self._is_nutritional_file(file_path):
-                    nutritional_data = self._parse_nutritional_excel(file_path)
+        if self.conflicts:
+            logger.warning(f"{len(self.conflicts)} conflicting specification(s) across workbooks")
         
         # Merge data based on specification numbers
         merged_recipes = self._merge_recipe_data(ingredients_data, nutritional_data)
         
         return merged_recipes
     
-    def _is_ingredients_file(self, file_path):
-        """Check if Excel file contains ingredients data"""
+    def _parse_workbooks(self, file_paths):
+        """Classify and parse all workbooks, in parallel when there is more than one"""
+        if len(file_paths) < 2 or BATCH_PARSE_WORKERS <= 1:
+            return [self._process_workbook(file_path) for file_path in file_paths]
+        
+        pool = _get_parse_pool()
+        futures = [pool.submit(_parse_workbook_file, file_path) for file_path in file_paths]
+        deadline = time.monotonic() + BATCH_PARSE_TIMEOUT
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=max(0, deadline - time.monotonic())))
+            except Exception as e:
+                logger.error(f"Error parsing Excel file in worker: {e}")
+                results.append((None, {}))
+        return results
+    
+    def _merge_workbook(self, target, recipes, file_kind, filename, sources):
+        """
+        Add one workbook's recipes to the data of its kind
+        A specification already seen with different data is reported as a conflict; the later file wins
+        """
+        for spec_num, recipe in recipes.items():
+            previous = target.get(spec_num)
+            if previous is not None:
+                differing = [field for field in CONFLICT_FIELDS[file_kind] if previous.get(field) != recipe.get(field)]
+                if differing:
+                    self.conflicts.append({
+                        'specification': spec_num,
+                        'type': file_kind,
+                        'fields': differing,
+                        'files': [sources[spec_num], filename],
+                        'used': filename
+                    })
+            target[spec_num] = recipe
+            sources[spec_num] = filename
+    
+    def _process_workbook(self, file_path):
+        """
+        Classify an Excel file and parse it, loading it as few times as possible
+        
+        The file is opened once in read-only (streaming) mode; nutritional files are
+        parsed from that workbook directly. Ingredients files need merged-cell ranges,
+        which only a full load provides, so they are loaded fully exactly once.
+        
+        Returns:
+            tuple: ('ingredients' | 'nutritional' | None, parsed recipes dict)
+        """
         try:
-            wb = openpyxl.load_workbook(file_path, data_only=True)
-            sheet = wb[wb.sheetnames[0]]
-            
-            # Check for "CompositionLevel" or "Ingredient List" in first column
-            for row in sheet.iter_rows(min_row=1, max_row=5, values_only=True):
-                if row[0] and 'CompositionLevel' in str(row[0]):
-                    return True
-                if row[0] and 'Ingredient' in str(row[0]):
-                    return True
-            
-            return False
+            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
         except Exception as e:
-            logger.error(f"Error checking ingredients file: {e}")
-            return False
-    
-    def _is_nutritional_file(self, file_path):
-        """Check if Excel file contains nutritional data"""
+            logger.error(f"Error opening Excel file: {e}")
+            return None, {}
+        
         try:
-            wb = openpyxl.load_workbook(file_path, data_only=True)
             sheet = wb[wb.sheetnames[0]]
+            # Read-only mode trusts the stored <dimension>, which ERP exports often get wrong (e.g. "A1")
+            sheet.reset_dimensions()
+            head_rows = list(sheet.iter_rows(min_row=1, max_row=5, values_only=True))
             
-            # Check for nutritional value headers like "Energy", "Fat", "Nutri Score"
-            first_row = list(sheet.iter_rows(min_row=1, max_row=1, values_only=True))[0]
-            nutritional_keywords = ['Energy', 'Fat', 'Protein', 'Nutri', 'Score']
-            
-            for cell in first_row:
-                if cell and any(keyword in str(cell) for keyword in nutritional_keywords):
-                    return True
-            
-            return False
+            if self._is_ingredients_file(head_rows):
+                file_kind = 'ingredients'
+            elif self._is_nutritional_file(head_rows):
+                return 'nutritional', self._parse_nutritional_sheet(sheet)
+            else:
+                return None, {}
         except Exception as e:
-            logger.error(f"Error checking nutritional file: {e}")
+            logger.error(f"Error reading Excel file: {e}")
+            return None, {}
+        finally:
+            wb.close()
+        
+        return file_kind, self._parse_ingredients_excel(file_path)
+    
+    def _is_ingredients_file(self, head_rows):
+        """Check if the first rows of an Excel file contain ingredients data"""
+        # Check for "CompositionLevel" or "Ingredient List" in first column
+        for row in head_rows:
+            if row and row[0] and 'CompositionLevel' in str(row[0]):
+                return True
+            if row and row[0] and 'Ingredient' in str(row[0]):
+                return True
+        
+        return False
+    
+    def _is_nutritional_file(self, head_rows):
+        """Check if the header row of an Excel file contains nutritional data"""
+        if not head_rows:
             return False
+        
+        # Check for nutritional value headers like "Energy", "Fat", "Nutri Score"
+        first_row = head_rows[0]
+        nutritional_keywords = ['Energy', 'Fat', 'Protein', 'Nutri', 'Score']
+        
+        for cell in first_row:
+            if cell and any(keyword in str(cell) for keyword in nutritional_keywords):
+                return True
+        
+        return False
     
     def _parse_ingredients_excel(self, file_path):
         """
@@ -203,9 +313,20 @@ class ExcelBatchProcessor:
         Each row represents a recipe with its nutritional data
         """
         try:
-            wb = openpyxl.load_workbook(file_path, data_only=True)
+            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        except Exception as e:
+            logger.error(f"Error parsing nutritional Excel: {e}")
+            return {}
+        try:
             sheet = wb[wb.sheetnames[0]]
-            
+            sheet.reset_dimensions()
+            return self._parse_nutritional_sheet(sheet)
+        finally:
+            wb.close()
+    
+    def _parse_nutritional_sheet(self, sheet):
+        """Parse the nutritional values sheet row by row (works on read-only worksheets)"""
+        try:
             recipes = {}
             
             # Get header row to identify columns
@@ -227,7 +348,7 @@ class ExcelBatchProcessor:
 
             # Parse each row (skip header)
             for row in sheet.iter_rows(min_row=2, values_only=True):
-                if not row[0]:  # Skip empty rows
+                if not row or not row[0]:  # Skip empty rows
                     continue
                 
                 # Extract specification number from first column
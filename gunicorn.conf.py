@@ -2,6 +2,8 @@
 bind = "0.0.0.0:5000"
 timeout = 180  # 3 minutes timeout for long AI processing
 keepalive = 5
+# Default sync worker: SSE streams (/api/analysis-jobs/<id>/stream) block a worker while open -
+# clients poll the job status instead, or set worker_class = "gthread" / "gevent"
 max_requests = 1000
 max_requests_jitter = 100
 preload_app = True
@@ -0,0 +1,55 @@
+"""Add research_metric table
+
+Revision ID: a3f1c8d92e47
+Revises: c5194d2a5f54
+Create Date: 2026-10-18 09:12:31.415926
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c8d92e47'
+down_revision = 'c5194d2a5f54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The base schema (product, user, trend, research_job, research_source, ...) is created by
+    # db.create_all() in app.py, not by this migration chain, and create_all also runs when
+    # `flask db upgrade` imports the app - so the table may already exist.
+    if sa.inspect(op.get_bind()).has_table('research_metric'):
+        return
+
+    # No foreign key to research_job.job_id: no migration creates research_job, so the constraint
+    # would make this revision fail on a database whose base tables come from elsewhere.
+    # Tables created by db.create_all() still get the model's constraint.
+    op.create_table('research_metric',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.String(length=36), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('ended_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_ms', sa.Integer(), nullable=True),
+        sa.Column('bytes_received', sa.Integer(), nullable=True),
+        sa.Column('item_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('research_metric', schema=None) as batch_op:
+        batch_op.create_index('idx_research_metric_job_id', ['job_id'], unique=False)
+        batch_op.create_index('idx_research_metric_kind_name', ['kind', 'name'], unique=False)
+        batch_op.create_index('idx_research_metric_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('research_metric', schema=None) as batch_op:
+        batch_op.drop_index('idx_research_metric_created_at')
+        batch_op.drop_index('idx_research_metric_kind_name')
+        batch_op.drop_index('idx_research_metric_job_id')
+
+    op.drop_table('research_metric')
@@ -164,6 +164,8 @@ class ResearchJob(db.Model):
     progress = db.Column(db.Integer, default=0)
     status_log = db.Column(db.Text)  # JSON array of status updates
     result_trend_id = db.Column(db.Integer, db.ForeignKey('trend.id'), nullable=True)
+    synthesized_report = db.Column(db.Text)  # JSON checkpoint after synthesis phase
+    final_report = db.Column(db.Text)  # JSON checkpoint after finalize phase (before PDF)
     error_message = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
@@ -184,6 +186,26 @@ class ResearchSource(db.Model):
     
     research_job = db.relationship('ResearchJob', backref='sources')
 
+class ResearchMetric(db.Model):
+    __tablename__ = 'research_metric'
+    __table_args__ = (
+        db.Index('idx_research_metric_job_id', 'job_id'),
+        db.Index('idx_research_metric_kind_name', 'kind', 'name'),
+        db.Index('idx_research_metric_created_at', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(36), db.ForeignKey('research_job.job_id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # phase, source
+    name = db.Column(db.String(100), nullable=False)  # plan, scrape, synthesis, finalize, pdf or source name
+    status = db.Column(db.String(50), default='success')  # success, error
+    started_at = db.Column(db.DateTime)
+    ended_at = db.Column(db.DateTime)
+    duration_ms = db.Column(db.Integer, default=0)
+    bytes_received = db.Column(db.Integer, default=0)
+    item_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class CustomRecipePage(db.Model):
     __tablename__ = 'custom_recipe_page'
     __table_args__ = (
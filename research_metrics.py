@@ -0,0 +1,80 @@
+"""
+Timing-Telemetrie für Deep Research Jobs
+- record_research_metric: speichert Dauer, Bytes und Anzahl Items pro Phase bzw. Quelle
+- summarize_research_metrics: p50/p95 pro Phase und Quelle über ein Zeitfenster
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from api_clients import _percentile
+
+RESEARCH_PHASES = ['plan', 'scrape', 'synthesis', 'finalize', 'pdf']
+
+
+def record_research_metric(job_id: str, kind: str, name: str, started: float, duration: float,
+                           status: str = 'success', bytes_received: int = 0, item_count: int = 0):
+    """
+    Fügt einen Timing-Eintrag zur laufenden DB-Session hinzu (Commit erfolgt durch den Aufrufer)
+
+    started: Startzeitpunkt als time.time()-Wert, duration: Sekunden
+    """
+    from app import db
+    from models import ResearchMetric
+
+    try:
+        started_at = datetime.utcfromtimestamp(started)
+        db.session.add(ResearchMetric(
+            job_id=job_id,
+            kind=kind,
+            name=name[:100],
+            status=status,
+            started_at=started_at,
+            ended_at=started_at + timedelta(seconds=duration),
+            duration_ms=int(duration * 1000),
+            bytes_received=bytes_received or 0,
+            item_count=item_count or 0
+        ))
+    except Exception as e:
+        logging.error(f"⚠️ Research-Metrik {kind}/{name} konnte nicht erfasst werden: {e}")
+
+
+def summarize_research_metrics(hours: int = 168, kind: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Aggregiert die Timing-Einträge der letzten `hours` Stunden
+
+    Returns:
+        {'phase': {name: stats}, 'source': {name: stats}} - Quellen sortiert nach p95 absteigend
+    """
+    from models import ResearchMetric
+
+    since = datetime.utcnow() - timedelta(hours=hours)
+    query = ResearchMetric.query.filter(ResearchMetric.created_at >= since)
+    if kind:
+        query = query.filter(ResearchMetric.kind == kind)
+
+    groups: Dict[tuple, list] = {}
+    for metric in query.all():
+        groups.setdefault((metric.kind, metric.name), []).append(metric)
+
+    summary: Dict[str, Dict[str, Any]] = {'phase': {}, 'source': {}}
+    for (metric_kind, name), metrics in groups.items():
+        durations = sorted(m.duration_ms or 0 for m in metrics)
+        errors = sum(1 for m in metrics if m.status != 'success')
+        summary.setdefault(metric_kind, {})[name] = {
+            'count': len(metrics),
+            'errors': errors,
+            'error_rate': round(errors / len(metrics), 3),
+            'p50_ms': _percentile(durations, 50),
+            'p95_ms': _percentile(durations, 95),
+            'max_ms': durations[-1],
+            'avg_bytes': int(sum(m.bytes_received or 0 for m in metrics) / len(metrics)),
+            'avg_items': round(sum(m.item_count or 0 for m in metrics) / len(metrics), 1)
+        }
+
+    summary['phase'] = {name: summary['phase'][name]
+                        for name in RESEARCH_PHASES if name in summary['phase']}
+    summary['source'] = dict(sorted(summary['source'].items(),
+                                    key=lambda item: item[1]['p95_ms'], reverse=True))
+    return summary
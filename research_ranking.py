@@ -0,0 +1,178 @@
+"""
+Deduplizierung und Relevanz-Ranking der gesammelten Research-Daten vor der Synthese
+- Dedupe über kanonische URL und nahezu identische Titel (Shingles + Jaccard)
+- BM25-Scoring gegen die Plan-Keywords
+- Packen der besten Einträge über alle Quellen in ein Token-Budget
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Any, Set
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Prompt-Budget für die Synthese (grobe Schätzung: 4 Zeichen pro Token)
+SYNTHESIS_TOKEN_BUDGET = 2500
+CHARS_PER_TOKEN = 4
+MAX_ITEMS_PER_SOURCE = 5        # Verhindert, dass eine Quelle das Budget allein füllt
+NEAR_DUPLICATE_THRESHOLD = 0.8  # Jaccard-Ähnlichkeit der Titel-Shingles
+SHINGLE_SIZE = 4                # Zeichen-Shingles (robust bei kurzen Titeln)
+DESCRIPTION_CHARS = 160
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Tracking-Parameter: exakt verglichen, nur utm_* per Präfix (sonst fielen z.B. 'reference' oder 'refid' weg)
+TRACKING_PARAMS = frozenset({'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref'})
+TRACKING_PREFIXES = ('utm_',)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def canonical_url(url: str) -> str:
+    """Normalisiert eine URL für den Vergleich (Host, Slash, Fragment, Tracking-Parameter)"""
+    if not url:
+        return ''
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted((k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+                   if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES))
+    path = parsed.path.rstrip('/') or '/'
+    return urlunparse(('', host, path, '', urlencode(query), ''))
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text or '').lower()) if len(t) > 1]
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    normalized = ' '.join(tokenize(text))
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def flatten_collected_data(collected_data: List[Dict]) -> List[Dict[str, Any]]:
+    """Macht aus den Quellen-Ergebnissen eine flache Liste einzelner Einträge"""
+    items = []
+    for source_index, source_data in enumerate(collected_data):
+        raw_results = source_data.get('raw_results') or [
+            {'title': finding} for finding in source_data.get('findings', [])
+        ]
+        for result in raw_results:
+            title = (result.get('title') or '').strip()
+            if not title:
+                continue
+            items.append({
+                'source': source_data.get('source', ''),
+                'source_url': source_data.get('url', ''),
+                'source_index': source_index,
+                'title': title,
+                'description': (result.get('description') or '').strip(),
+                'url': result.get('url', '')
+            })
+    return items
+
+
+def dedupe_items(items: List[Dict[str, Any]], threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[Dict[str, Any]]:
+    """Entfernt Einträge mit gleicher kanonischer URL oder nahezu identischem Titel (erster gewinnt)"""
+    seen_urls = set()
+    kept: List[Dict[str, Any]] = []
+    kept_shingles: List[Set[str]] = []
+
+    for item in items:
+        url_key = canonical_url(item.get('url', ''))
+        if url_key and url_key in seen_urls:
+            continue
+
+        title_shingles = shingles(item['title'])
+        if any(jaccard(title_shingles, other) >= threshold for other in kept_shingles):
+            continue
+
+        if url_key:
+            seen_urls.add(url_key)
+        kept.append(item)
+        kept_shingles.append(title_shingles)
+    return kept
+
+
+def bm25_scores(documents: List[List[str]], query: List[str]) -> List[float]:
+    """Okapi BM25 für tokenisierte Dokumente gegen eine tokenisierte Anfrage"""
+    if not documents:
+        return []
+    n = len(documents)
+    avg_len = sum(len(doc) for doc in documents) / n or 1.0
+    document_frequency = Counter()
+    for doc in documents:
+        document_frequency.update(set(doc))
+
+    query_terms = set(query)
+    scores = []
+    for doc in documents:
+        term_counts = Counter(doc)
+        score = 0.0
+        for term in query_terms:
+            tf = term_counts.get(term, 0)
+            if not tf:
+                continue
+            df = document_frequency[term]
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / avg_len))
+        scores.append(score)
+    return scores
+
+
+def item_text(item: Dict[str, Any]) -> str:
+    description = item.get('description', '')[:DESCRIPTION_CHARS]
+    return f"{item['title']} - {description}" if description else item['title']
+
+
+def rank_research_items(collected_data: List[Dict], keywords: List[str], description: str = '',
+                        token_budget: int = SYNTHESIS_TOKEN_BUDGET,
+                        max_per_source: int = MAX_ITEMS_PER_SOURCE) -> Dict[str, Any]:
+    """
+    Dedupliziert, bewertet und packt die gesammelten Einträge in das Token-Budget
+
+    Returns:
+        {'items': [...nach Score sortiert...], 'total': int, 'unique': int, 'tokens': int}
+    """
+    items = flatten_collected_data(collected_data)
+    unique_items = dedupe_items(items)
+
+    query = tokenize(' '.join(keywords or []))
+    if not query:
+        query = tokenize(description)
+    scores = bm25_scores([tokenize(item_text(item)) for item in unique_items], query)
+    for item, score in zip(unique_items, scores):
+        item['score'] = round(score, 4)
+
+    # Stabil sortieren: bei gleichem Score bleibt die ursprüngliche Quellen-Reihenfolge erhalten
+    ranked = sorted(unique_items, key=lambda item: item['score'], reverse=True)
+
+    selected = []
+    per_source = Counter()
+    used_tokens = 0
+    for item in ranked:
+        if per_source[item['source_index']] >= max_per_source:
+            continue
+        tokens = math.ceil(len(item_text(item)) / CHARS_PER_TOKEN)
+        if used_tokens + tokens > token_budget:
+            continue
+        selected.append(item)
+        per_source[item['source_index']] += 1
+        used_tokens += tokens
+
+    return {
+        'items': selected,
+        'total': len(items),
+        'unique': len(unique_items),
+        'tokens': used_tokens
+    }
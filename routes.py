@@ -4,7 +4,8 @@ from models import Product, ConceptSession, Trend, User, CustomRecipePage, Conte
 from utils.shelf_life_manager import get_shelf_life, get_all_categories, SHELF_LIFE_DATA
 from data.products import init_products
 from data.trends import init_trends
-from utils.pdf_generator import generate_concept_pdf
+from utils.pdf_generator import generate_concept_pdf, concept_pdf_path
+from utils.pdf_render_service import submit_render, wait_for_render, render as render_pdf
 from utils.email_sender import send_concept_email
 from utils.claim_calculator import calculate_nutritional_claims, merge_claims
 from translations import get_text, get_available_languages
@@ -14,9 +15,11 @@ import logging
 import re
 import os
 import time
+from types import SimpleNamespace
 from markupsafe import escape
 import bleach
 from werkzeug.utils import secure_filename
+from sqlalchemy.exc import SQLAlchemyError
 from openai import OpenAI
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -24,11 +27,15 @@ from PIL import Image
 import fitz  # PyMuPDF
 import base64
 import io
+import hashlib
 from document_processor import document_processor
 from ai_trend_analyzer import analyze_document_for_trend, improve_trend_description
 from functools import wraps
 from auth_config import get_msal_app, get_auth_url, acquire_token_by_code, get_logout_url, validate_config
-from utils.blob_storage import upload_file_to_blob
+from utils.blob_storage import upload_file_to_blob, upload_files_to_blob
+from utils.llm_cache import cached_completion
+from utils.upload_cache import combined_hash, get_cached, set_cached
+from utils.analysis_jobs import submit_job, get_job, get_job_updated_at, FINAL_STATES, ANALYSIS_JOB_POLL_INTERVAL
 
 def sanitize_input(input_string, max_length=100):
     """Sanitize user input to prevent XSS and injection attacks"""
@@ -67,82 +74,157 @@ def clean_claim_text(claim_text):
     clean_claim = re.sub(r'\s*\([^)]*\)\s*', '', claim_text).strip()
     return clean_claim
 
-def extract_images_from_document(file_path, file_extension, original_filename):
-    """Extracts images from documents and uploads them to Azure Blob Storage."""
+# Embedded images smaller than this (either side, in pixels) or lighter than this (bytes)
+# are logos, bullets and decorations - they are skipped
+EXTRACT_IMAGE_MIN_SIZE = int(os.environ.get('EXTRACT_IMAGE_MIN_SIZE', 64))
+EXTRACT_IMAGE_MIN_BYTES = int(os.environ.get('EXTRACT_IMAGE_MIN_BYTES', 2048))
+
+# Formats that are uploaded with their original bytes instead of being re-encoded
+PASSTHROUGH_IMAGE_FORMATS = {'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg'}
+
+
+def _is_decorative_image(width, height, size_bytes):
+    return (width < EXTRACT_IMAGE_MIN_SIZE or height < EXTRACT_IMAGE_MIN_SIZE
+            or size_bytes < EXTRACT_IMAGE_MIN_BYTES)
+
+
+def _pdf_image_payload(doc, xref):
+    """Returns (bytes, extension, width, height) for a PDF image xref, re-encoding only when needed"""
+    info = doc.extract_image(xref)
+    ext = (info.get('ext') or '').lower()
+    # Images with a soft mask (transparency) or exotic formats (jpx, jbig2, ...) must be composed to PNG
+    if info.get('image') and ext in PASSTHROUGH_IMAGE_FORMATS and not info.get('smask'):
+        return info['image'], ext, info.get('width', 0), info.get('height', 0)
+
+    pix = fitz.Pixmap(doc, xref)
+    if info.get('smask'):
+        pix = fitz.Pixmap(pix, fitz.Pixmap(doc, info['smask']))
+    if pix.n - pix.alpha >= 4:  # CMYK cannot be written as PNG
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    return pix.tobytes("png"), 'png', pix.width, pix.height
+
+
+def _collect_pdf_images(source, timestamp):
+    candidates = []
+    seen_xrefs = set()
+    seen_hashes = set()
+    doc = fitz.open(stream=source, filetype='pdf') if isinstance(source, bytes) else fitz.open(source)
+    with doc:
+        for page_num in range(len(doc)):
+            for img_index, img in enumerate(doc.get_page_images(page_num)):
+                xref = img[0]
+                # The same logo is referenced by the same xref on every page
+                if xref in seen_xrefs:
+                    continue
+                seen_xrefs.add(xref)
+
+                # img: (xref, smask, width, height, ...) - skip tiny images before decoding them
+                if img[2] < EXTRACT_IMAGE_MIN_SIZE or img[3] < EXTRACT_IMAGE_MIN_SIZE:
+                    continue
+
+                try:
+                    img_data, ext, width, height = _pdf_image_payload(doc, xref)
+                except Exception as img_error:
+                    logging.warning(f"Could not extract PDF image xref {xref}: {img_error}")
+                    continue
+
+                if _is_decorative_image(width, height, len(img_data)):
+                    continue
+                # Identical images embedded under different xrefs
+                digest = hashlib.sha1(img_data).hexdigest()
+                if digest in seen_hashes:
+                    continue
+                seen_hashes.add(digest)
+
+                candidates.append({
+                    'data': img_data,
+                    'filename': f"extracted_{timestamp}_{page_num}_{img_index}.{ext}",
+                    'content_type': PASSTHROUGH_IMAGE_FORMATS.get(ext, 'image/png'),
+                    'source': f'PDF Page {page_num + 1}',
+                    'dimensions': f'{width}x{height}'
+                })
+    return candidates
+
+
+def _collect_pptx_images(source, timestamp):
+    from pptx import Presentation
+    candidates = []
+    seen_hashes = set()
+    prs = Presentation(io.BytesIO(source) if isinstance(source, bytes) else source)
+    for slide_num, slide in enumerate(prs.slides):
+        for shape_num, shape in enumerate(slide.shapes):
+            if not hasattr(shape, 'image'):
+                continue
+            image = shape.image
+            image_bytes = image.blob
+
+            # Slide masters repeat the same picture on every slide
+            digest = hashlib.sha1(image_bytes).hexdigest()
+            if digest in seen_hashes:
+                continue
+            seen_hashes.add(digest)
+
+            width, height = image.size
+            if _is_decorative_image(width, height, len(image_bytes)):
+                continue
+
+            img_format = (image.ext or '').lower()
+            if img_format not in PASSTHROUGH_IMAGE_FORMATS:
+                # Re-encode only formats browsers and vision models cannot take directly (emf, wmf, tiff, ...)
+                img = Image.open(io.BytesIO(image_bytes))
+                img_byte_arr = io.BytesIO()
+                img.save(img_byte_arr, format='PNG')
+                image_bytes = img_byte_arr.getvalue()
+                img_format = 'png'
+                width, height = img.width, img.height
+
+            candidates.append({
+                'data': image_bytes,
+                'filename': f"extracted_{timestamp}_{slide_num}_{shape_num}.{img_format}",
+                'content_type': PASSTHROUGH_IMAGE_FORMATS[img_format],
+                'source': f'Slide {slide_num + 1}',
+                'dimensions': f'{width}x{height}'
+            })
+    return candidates
+
+
+def extract_images_from_document(source, file_extension, original_filename):
+    """Extracts images from documents (file path or in-memory upload) and uploads them to Azure Blob Storage."""
     extracted_images = {'all_images': []}
     
     try:
         timestamp = int(time.time())
+        candidates = []
         
         if file_extension == 'pdf':
             try:
-                doc = fitz.open(file_path)
-                for page_num in range(len(doc)):
-                    for img_index, img in enumerate(doc.get_page_images(page_num)):
-                        xref = img[0]
-                        pix = fitz.Pixmap(doc, xref)
-                        
-                        img_data = pix.tobytes("png")
-                        filename = f"extracted_{timestamp}_{page_num}_{img_index}.png"
-
-                        # Upload to blob storage
-                        image_url = upload_file_to_blob(io.BytesIO(img_data), filename, "image/png")
-
-                        if image_url:
-                            extracted_images['all_images'].append({
-                                'url': image_url,
-                                'filename': filename,
-                                'source': f'PDF Page {page_num + 1}',
-                                'dimensions': f'{pix.width}x{pix.height}',
-                                'index': len(extracted_images['all_images'])
-                            })
-                            logging.info(f"Uploaded extracted PDF image to blob storage: {filename}")
-                doc.close()
+                candidates = _collect_pdf_images(source, timestamp)
             except Exception as pdf_error:
                 logging.warning(f"Could not extract images from PDF: {pdf_error}")
                 
         elif file_extension in ['ppt', 'pptx']:
             try:
-                from pptx import Presentation
-                prs = Presentation(file_path)
-                for slide_num, slide in enumerate(prs.slides):
-                    for shape_num, shape in enumerate(slide.shapes):
-                        if hasattr(shape, 'image'):
-                            image_bytes = shape.image.blob
-                            img = Image.open(io.BytesIO(image_bytes))
-
-                            img_format = img.format.lower() if img.format else 'png'
-                            if img_format not in ['png', 'jpg', 'jpeg']:
-                                img_format = 'png'
-
-                            content_type = f"image/{img_format}"
-                            filename = f"extracted_{timestamp}_{slide_num}_{shape_num}.{img_format}"
-
-                            # Save image to a byte stream
-                            img_byte_arr = io.BytesIO()
-                            save_format = 'JPEG' if img_format == 'jpg' else 'PNG'
-                            if save_format == 'JPEG':
-                                img = img.convert('RGB')
-                            img.save(img_byte_arr, format=save_format)
-                            img_byte_arr.seek(0)
-
-                            # Upload to blob storage
-                            image_url = upload_file_to_blob(img_byte_arr, filename, content_type)
-
-                            if image_url:
-                                extracted_images['all_images'].append({
-                                    'url': image_url,
-                                    'filename': filename,
-                                    'source': f'Slide {slide_num + 1}',
-                                    'dimensions': f'{img.width}x{img.height}',
-                                    'index': len(extracted_images['all_images'])
-                                })
-                                logging.info(f"Uploaded extracted PowerPoint image to blob storage: {filename}")
-                                    
+                candidates = _collect_pptx_images(source, timestamp)
             except Exception as pptx_error:
                 logging.warning(f"Could not extract images from PowerPoint: {pptx_error}")
         
-        logging.info(f"Total images extracted and uploaded: {len(extracted_images['all_images'])}")
+        # Upload concurrently over the shared blob client; URLs come back in extraction order
+        urls = upload_files_to_blob([
+            (io.BytesIO(candidate['data']), candidate['filename'], candidate['content_type'])
+            for candidate in candidates
+        ])
+        for candidate, image_url in zip(candidates, urls):
+            if image_url:
+                extracted_images['all_images'].append({
+                    'url': image_url,
+                    'filename': candidate['filename'],
+                    'source': candidate['source'],
+                    'dimensions': candidate['dimensions'],
+                    'index': len(extracted_images['all_images'])
+                })
+        
+        logging.info(f"Total images extracted and uploaded: {len(extracted_images['all_images'])} "
+                     f"(from {original_filename})")
         
     except Exception as e:
         logging.error(f"Error extracting images from document: {e}")
@@ -1369,6 +1451,24 @@ def cocreation_drafts():
         flash('Error loading drafts', 'error')
         return redirect(url_for('index'))
 
+def _concept_snapshot(concept):
+    """Picklebare Kopie einer ConceptSession für den Render-Prozess-Pool"""
+    return SimpleNamespace(
+        session_id=concept.session_id,
+        client_name=concept.client_name,
+        client_email=concept.client_email,
+        product_config=concept.product_config,
+        created_at=concept.created_at
+    )
+
+
+def _ensure_concept_pdf(concept):
+    """Wartet auf ein laufendes Rendering; fehlt die Datei danach (z.B. anderer Worker-Prozess), neu rendern"""
+    wait_for_render(f"concept:{concept.session_id}")
+    if concept.pdf_path and not os.path.exists(concept.pdf_path):
+        render_pdf('concept', generate_concept_pdf, _concept_snapshot(concept), concept.pdf_path)
+
+
 @app.route('/cocreation/save_concept', methods=['POST'])
 @csrf.exempt
 @login_required
@@ -1433,8 +1533,10 @@ def save_concept():
 
         db.session.commit()
 
-        # Generate PDF
-        pdf_path = generate_concept_pdf(concept)
+        # Generate PDF im Render-Prozess-Pool - Download/E-Mail warten bei Bedarf auf das Ergebnis
+        pdf_path = concept_pdf_path(concept.session_id)
+        submit_render('concept', generate_concept_pdf, _concept_snapshot(concept), pdf_path,
+                      key=f"concept:{concept.session_id}")
         concept.pdf_path = pdf_path
         db.session.commit()
 
@@ -1473,6 +1575,7 @@ def send_concept_email_route():
             }), 400
 
         # Send email
+        _ensure_concept_pdf(concept)
         success = send_concept_email(concept)
 
         if success:
@@ -1502,6 +1605,7 @@ def download_pdf(session_id):
         return redirect(url_for('index'))
 
     try:
+        _ensure_concept_pdf(concept)
         return send_file(concept.pdf_path, as_attachment=True, 
                         download_name=f'bruggen_concept_{concept.client_name or "draft"}.pdf')
     except Exception as e:
@@ -1883,67 +1987,151 @@ def search_trends():
             'message': 'Search temporarily unavailable'
         }), 500
 
-@app.route('/api/trends/analyze', methods=['POST'])
-@csrf.exempt
+def _no_progress(message):
+    pass
+
+def _wants_async_analysis():
+    """Analyses run as background jobs when the client asks for it (async=true); otherwise synchronously"""
+    return request.form.get('async', 'false').lower() == 'true'
+
+def _in_app_context(work_fn):
+    """Runs a job function inside the application context (job threads start outside any request)"""
+    def run(*args, **kwargs):
+        with app.app_context():
+            return work_fn(*args, **kwargs)
+    return run
+
+def _job_accepted(job_id):
+    # Clients poll status_url by default; stream_url needs a threaded or gevent gunicorn worker
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('get_analysis_job', job_id=job_id),
+        'poll_interval': ANALYSIS_JOB_POLL_INTERVAL,
+        'stream_url': url_for('stream_analysis_job', job_id=job_id)
+    }), 202
+
+def _visible_job(job_id):
+    """Job for the current user or None (job ids are only shared with the user who started them)"""
+    job = get_job(job_id)
+    if job is None or (job.get('owner') and job['owner'] != session.get('user_email')):
+        return None
+    return job
+
+def _job_payload(job):
+    payload = {
+        'success': True,
+        'job_id': job['job_id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'progress': job['progress']
+    }
+    if job['status'] in FINAL_STATES:
+        payload['result'] = job['result']
+    return payload
+
+@app.route('/api/analysis-jobs/<job_id>', methods=['GET'])
 @login_required
-def analyze_trend_files():
-    """API endpoint for analyzing uploaded files and generating trend suggestions"""
+def get_analysis_job(job_id):
+    """Poll an analysis job; the result has the same shape as the synchronous endpoint's response"""
+    job = _visible_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify(_job_payload(job))
+
+@app.route('/api/analysis-jobs/<job_id>/stream')
+@login_required
+def stream_analysis_job(job_id):
+    """
+    SSE endpoint emitting analysis job status changes until the job finishes
+    
+    The stream holds a worker for up to 5 minutes - with the default sync gunicorn worker
+    clients should poll status_url instead; use the stream only with a threaded or gevent worker.
+    """
+    from flask import Response, stream_with_context
+    
+    if _visible_job(job_id) is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    def event_stream():
+        last_seen = None
+        deadline = time.monotonic() + 300  # 5 minutes
+        while time.monotonic() < deadline:
+            # Only the update timestamp is read per tick; the job itself only after a change
+            updated_at = get_job_updated_at(job_id)
+            if updated_at != last_seen:
+                job = get_job(job_id) if updated_at is not None else None
+                if job is None:
+                    yield f"data: {json.dumps({'type': 'error', 'message': 'Job not found or expired'})}\n\n"
+                    return
+                last_seen = updated_at
+                payload = _job_payload(job)
+                payload['type'] = 'complete' if job['status'] in FINAL_STATES else 'status'
+                yield f"data: {json.dumps(payload)}\n\n"
+                if job['status'] in FINAL_STATES:
+                    return
+            time.sleep(ANALYSIS_JOB_POLL_INTERVAL)
+        yield f"data: {json.dumps({'type': 'timeout', 'job_id': job_id})}\n\n"
+    
+    return Response(stream_with_context(event_stream()),
+                   mimetype='text/event-stream',
+                   headers={
+                       'Cache-Control': 'no-cache, no-transform',
+                       'X-Accel-Buffering': 'no',
+                       'Connection': 'keep-alive'
+                   })
+
+def _analyze_trend_uploads(files_data, uploads, content_hashes, force_refresh, progress=_no_progress):
+    """Trend analysis core for saved uploads - returns (response body, HTTP status)"""
     try:
-        if 'files' not in request.files:
-            return jsonify({'success': False, 'error': 'No files uploaded'}), 400
-        
-        files = request.files.getlist('files')
-        if not files or all(f.filename == '' for f in files):
-            return jsonify({'success': False, 'error': 'No files selected'}), 400
+        # Identical uploads reuse the stored analysis (force_refresh=true re-runs everything)
+        upload_hash = combined_hash(content_hashes)
+        cached_analysis = None if force_refresh else get_cached('trend_analysis', upload_hash, 'gpt-5')
         
-        # Process uploaded files
-        files_data = []
-        temp_file_paths = []
-        
-        for file in files:
-            if file and file.filename:
-                # Validate file type
-                file_type = file.content_type
-                if not document_processor.is_supported(file_type):
-                    return jsonify({
-                        'success': False, 
-                        'error': f'Unsupported file type: {file.filename}'
-                    }), 400
-                
-                # Save file temporarily
-                file_path = document_processor.save_uploaded_file(file)
-                temp_file_paths.append(file_path)
-                files_data.append((file_path, file_type, file.filename))
-        
-        if not files_data:
-            return jsonify({'success': False, 'error': 'No valid files found'}), 400
-        
-        # Process all files and extract text
-        processing_result = document_processor.process_multiple_files(files_data)
-        
-        if processing_result['successful_files'] == 0:
-            document_processor.cleanup_files(temp_file_paths)
-            return jsonify({
-                'success': False, 
-                'error': 'Failed to process any uploaded files'
-            }), 400
-        
-        # Analyze with AI if we have enough text
-        combined_text = processing_result['combined_text']
-        if len(combined_text.strip()) < 100:
-            document_processor.cleanup_files(temp_file_paths)
-            return jsonify({
-                'success': False, 
-                'error': 'Not enough text content found in uploaded files'
-            }), 400
-        
-        # Use AI to analyze the content
-        ai_analysis = analyze_document_for_trend(combined_text)
+        if cached_analysis is not None:
+            ai_analysis = cached_analysis['ai_analysis']
+            processing_stats = cached_analysis['processing_stats']
+        else:
+            # Process all files and extract text
+            progress('Extracting text')
+            processing_result = document_processor.process_multiple_files(
+                files_data, content_hashes=content_hashes, refresh=force_refresh
+            )
+            
+            if processing_result['successful_files'] == 0:
+                document_processor.cleanup_files(uploads)
+                return {
+                    'success': False, 
+                    'error': 'Failed to process any uploaded files'
+                }, 400
+            
+            # Analyze with AI if we have enough text
+            combined_text = processing_result['combined_text']
+            if len(combined_text.strip()) < 100:
+                document_processor.cleanup_files(uploads)
+                return {
+                    'success': False, 
+                    'error': 'Not enough text content found in uploaded files'
+                }, 400
+            
+            # Use AI to analyze the content
+            progress('Analyzing with AI')
+            ai_analysis = analyze_document_for_trend(combined_text, bypass_cache=force_refresh)
+            processing_stats = {
+                'total_files': processing_result['total_files'],
+                'successful_files': processing_result['successful_files'],
+                'total_words': processing_result['total_word_count']
+            }
+            # An analysis built on unreadable images or scanned pages is not reused
+            if not processing_result['degraded']:
+                set_cached('trend_analysis', upload_hash,
+                           {'ai_analysis': ai_analysis, 'processing_stats': processing_stats}, 'gpt-5')
         
         # Save PDF files permanently for trend creation
         saved_pdf_path = None
-        for temp_path, file_type, original_filename in files_data:
-            if file_type == 'application/pdf' and os.path.exists(temp_path):
+        for upload in uploads:
+            if upload.content_type == 'application/pdf':
                 # Create permanent PDF storage directory
                 pdfs_dir = os.path.join('static', 'pdfs')
                 os.makedirs(pdfs_dir, exist_ok=True)
@@ -1954,17 +2142,16 @@ def analyze_trend_files():
                 pdf_filename = f"trend_doc_{timestamp}_{unique_id}.pdf"
                 permanent_path = os.path.join(pdfs_dir, pdf_filename)
                 
-                # Copy PDF to permanent location
-                import shutil
-                shutil.copy2(temp_path, permanent_path)
+                # Write PDF to permanent location
+                upload.save_to(permanent_path)
                 saved_pdf_path = f"/static/pdfs/{pdf_filename}"
                 break  # Use first PDF found
         
         # Cleanup temporary files
-        document_processor.cleanup_files(temp_file_paths)
+        document_processor.cleanup_files(uploads)
         
         # Return analysis results
-        return jsonify({
+        return {
             'success': True,
             'title': ai_analysis.get('title', 'Generated Trend'),
             'description': ai_analysis.get('description', 'AI-generated trend description'),
@@ -1974,17 +2161,70 @@ def analyze_trend_files():
             'consumer_insights': ai_analysis.get('consumer_insights', 'Consumer insights analysis pending'),
             'pdf_path': saved_pdf_path,
             'confidence': ai_analysis.get('confidence', 0.8),
-            'processing_stats': {
-                'total_files': processing_result['total_files'],
-                'successful_files': processing_result['successful_files'],
-                'total_words': processing_result['total_word_count']
-            }
-        })
+            'processing_stats': processing_stats,
+            'cached': cached_analysis is not None
+        }, 200
+        
+    except Exception as e:
+        document_processor.cleanup_files(uploads)
+        logging.error(f"Trend analysis error: {str(e)}")
+        return {
+            'success': False,
+            'error': 'Analysis failed. Please try again.'
+        }, 500
+
+@app.route('/api/trends/analyze', methods=['POST'])
+@csrf.exempt
+@login_required
+def analyze_trend_files():
+    """API endpoint for analyzing uploaded files and generating trend suggestions"""
+    try:
+        if 'files' not in request.files:
+            return jsonify({'success': False, 'error': 'No files uploaded'}), 400
+        
+        files = request.files.getlist('files')
+        if not files or all(f.filename == '' for f in files):
+            return jsonify({'success': False, 'error': 'No files selected'}), 400
+        
+        force_refresh = request.form.get('force_refresh', 'false').lower() == 'true'
+        
+        # Process uploaded files
+        files_data = []
+        uploads = []
+        content_hashes = []
+        
+        for file in files:
+            if file and file.filename:
+                # Validate file type
+                file_type = file.content_type
+                if not document_processor.is_supported(file_type):
+                    return jsonify({
+                        'success': False, 
+                        'error': f'Unsupported file type: {file.filename}'
+                    }), 400
+                
+                # Keep the upload in memory (spilled to a unique temp file when large), hashed while reading
+                upload = document_processor.spool_upload(file)
+                uploads.append(upload)
+                content_hashes.append(upload.content_hash)
+                files_data.append((upload.source, file_type, file.filename))
+        
+        if not files_data:
+            return jsonify({'success': False, 'error': 'No valid files found'}), 400
+        
+        if _wants_async_analysis():
+            job_id = submit_job('trend_analysis', _in_app_context(_analyze_trend_uploads),
+                                files_data, uploads, content_hashes, force_refresh,
+                                owner=session.get('user_email'))
+            return _job_accepted(job_id)
+        
+        result, status_code = _analyze_trend_uploads(files_data, uploads, content_hashes, force_refresh)
+        return jsonify(result), status_code
         
     except Exception as e:
         # Cleanup files in case of error
-        if 'temp_file_paths' in locals():
-            document_processor.cleanup_files(temp_file_paths)
+        if 'uploads' in locals():
+            document_processor.cleanup_files(uploads)
         
         logging.error(f"Trend analysis error: {str(e)}")
         return jsonify({
@@ -2162,7 +2402,6 @@ def get_trend_details(trend_id):
 def start_deep_research():
     """Start a new deep research job"""
     import uuid
-    import threading
     from models import ResearchJob
     
     try:
@@ -2195,17 +2434,7 @@ def start_deep_research():
         db.session.commit()
         
         # Start job in background thread
-        def run_job():
-            from deep_research_worker import process_research_job
-            # Store updates in memory for SSE streaming
-            job_updates[job_id] = []
-            
-            for update in process_research_job(job_id, description, keywords, categories):
-                if job_id in job_updates:
-                    job_updates[job_id].append(update)
-        
-        thread = threading.Thread(target=run_job, daemon=True)
-        thread.start()
+        start_research_thread(job_id, description, keywords, categories, reset_updates=True)
         
         return jsonify({
             'success': True,
@@ -2225,6 +2454,32 @@ def start_deep_research():
 # Store job updates in memory for SSE
 job_updates = {}
 
+# Running research worker threads per job (in-memory, per process)
+research_threads = {}
+
+def start_research_thread(job_id, description, keywords, categories, reset_updates=False):
+    """Run process_research_job in a background thread and collect its updates for SSE"""
+    import threading
+    
+    if reset_updates or job_id not in job_updates:
+        job_updates[job_id] = []
+    
+    def run_job():
+        from deep_research_worker import process_research_job
+        
+        for update in process_research_job(job_id, description, keywords, categories):
+            if job_id in job_updates:
+                job_updates[job_id].append(update)
+    
+    thread = threading.Thread(target=run_job, daemon=True)
+    research_threads[job_id] = thread
+    thread.start()
+    return thread
+
+def is_research_running(job_id):
+    thread = research_threads.get(job_id)
+    return thread is not None and thread.is_alive()
+
 @app.route('/api/deep-research/plan/<job_id>', methods=['GET'])
 @login_required
 def get_research_plan(job_id):
@@ -2254,7 +2509,6 @@ def get_research_plan(job_id):
 @login_required
 def approve_research_plan(job_id):
     """Approve and optionally modify the research plan, then continue job"""
-    import threading
     from models import ResearchJob
     
     try:
@@ -2286,22 +2540,7 @@ def approve_research_plan(job_id):
         categories = json.loads(job.categories) if job.categories else []
         
         # Resume job in background thread
-        def resume_job():
-            from deep_research_worker import process_research_job
-            from app import app
-            
-            # Use app context for DB access
-            with app.app_context():
-                # Re-initialize updates if needed
-                if job_id not in job_updates:
-                    job_updates[job_id] = []
-                
-                for update in process_research_job(job_id, description, keywords, categories):
-                    if job_id in job_updates:
-                        job_updates[job_id].append(update)
-        
-        thread = threading.Thread(target=resume_job, daemon=True)
-        thread.start()
+        start_research_thread(job_id, description, keywords, categories)
         
         return jsonify({
             'success': True,
@@ -2314,6 +2553,73 @@ def approve_research_plan(job_id):
         traceback.print_exc()
         return jsonify({'success': False, 'error': 'Failed to approve plan'}), 500
 
+@app.route('/api/deep-research/resume/<job_id>', methods=['POST'])
+@csrf.exempt
+@login_required
+def resume_deep_research(job_id):
+    """Resume an interrupted research job from its last checkpoint"""
+    from models import ResearchJob
+    
+    try:
+        job = ResearchJob.query.filter_by(job_id=job_id).first()
+        if not job:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        
+        if not job.plan_approved or job.status in ('completed', 'waiting_approval'):
+            return jsonify({'success': False, 'error': f'Job cannot be resumed in status {job.status}'}), 400
+        
+        if is_research_running(job_id):
+            return jsonify({'success': False, 'error': 'Job is still running'}), 409
+        
+        job.status = 'processing_strategy'
+        job.error_message = None
+        db.session.commit()
+        
+        description = job.description
+        keywords = json.loads(job.keywords) if job.keywords else []
+        categories = json.loads(job.categories) if job.categories else []
+        
+        logging.info(f"Resuming research job {job_id} from checkpoint")
+        start_research_thread(job_id, description, keywords, categories, reset_updates=True)
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'message': 'Research job resuming from last checkpoint'
+        })
+        
+    except Exception as e:
+        logging.error(f"Resume deep research error: {str(e)}")
+        return jsonify({'success': False, 'error': 'Failed to resume research job'}), 500
+
+@app.route('/api/deep-research/cancel/<job_id>', methods=['POST'])
+@csrf.exempt
+@login_required
+def cancel_deep_research(job_id):
+    """Cancel a queued, waiting or running research job"""
+    from models import ResearchJob
+    from deep_research_worker import request_cancel
+    
+    try:
+        job = ResearchJob.query.filter_by(job_id=job_id).first()
+        if not job:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        
+        if job.status in ('completed', 'failed', 'cancelled'):
+            return jsonify({'success': False, 'error': f'Job already {job.status}'}), 400
+        
+        # DB status reaches workers in other processes, the token the in-process worker
+        job.status = 'cancelled'
+        db.session.commit()
+        request_cancel(job_id)
+        
+        logging.info(f"Cancellation requested for research job {job_id}")
+        return jsonify({'success': True, 'message': 'Research job cancelled'})
+        
+    except Exception as e:
+        logging.error(f"Cancel deep research error: {str(e)}")
+        return jsonify({'success': False, 'error': 'Failed to cancel research job'}), 500
+
 @app.route('/api/deep-research/stream/<job_id>')
 @login_required
 def stream_deep_research(job_id):
@@ -2346,7 +2652,7 @@ def stream_deep_research(job_id):
                 # Check if this is a completion or error message
                 try:
                     update_data = json.loads(updates[sent_count])
-                    if update_data.get('type') in ['complete', 'error']:
+                    if update_data.get('type') in ['complete', 'error', 'cancelled']:
                         # Clean up
                         if job_id in job_updates:
                             del job_updates[job_id]
@@ -2371,6 +2677,38 @@ def stream_deep_research(job_id):
                        'Connection': 'keep-alive'
                    })
 
+@app.route('/api/admin/pdf-render-stats', methods=['GET'])
+@master_required
+def get_pdf_render_stats():
+    """Render-time histogram per PDF kind (research report, concept) for this worker process"""
+    from utils.pdf_render_service import get_render_stats
+    
+    return jsonify({'success': True, 'pid': os.getpid(), 'stats': get_render_stats()})
+
+@app.route('/api/admin/research-metrics', methods=['GET'])
+@master_required
+def get_research_metrics():
+    """p50/p95 timing per research phase and per source over a time window"""
+    from research_metrics import summarize_research_metrics
+    
+    try:
+        hours = request.args.get('hours', 168, type=int)
+        kind = request.args.get('kind')
+        if hours <= 0:
+            return jsonify({'success': False, 'error': 'hours must be positive'}), 400
+        if kind and kind not in ('phase', 'source'):
+            return jsonify({'success': False, 'error': 'kind must be phase or source'}), 400
+        
+        return jsonify({
+            'success': True,
+            'window_hours': hours,
+            'metrics': summarize_research_metrics(hours, kind)
+        })
+        
+    except Exception as e:
+        logging.error(f"Get research metrics error: {str(e)}")
+        return jsonify({'success': False, 'error': 'Failed to load research metrics'}), 500
+
 @app.route('/api/generate-image', methods=['POST'])
 @csrf.exempt
 @login_required
@@ -2456,63 +2794,55 @@ def add_recipe():
 
     return render_template('add_recipe.html', recipes=recipes_with_flags, all_categories=all_categories, SHELF_LIFE_DATA=SHELF_LIFE_DATA)
 
-@app.route('/api/analyze-recipe', methods=['POST'])
-@csrf.exempt
-@master_required
-def analyze_recipe():
-    # Check for files in request - handle both single and multiple files
-    files = []
-    if 'recipe_file' in request.files:
-        files = request.files.getlist('recipe_file')
-    elif 'recipeFile' in request.files:
-        files = request.files.getlist('recipeFile')
-    elif 'file' in request.files:
-        files = request.files.getlist('file')
-    
-    if not files or all(f.filename == '' for f in files):
-        return jsonify({'success': False, 'error': 'No files uploaded'})
-
+def _recipe_analysis_error(error):
+    """Maps an analysis exception to the error body returned to the client"""
+    error_message = "An error occurred during AI analysis."
+    if "openai" in str(error).lower():
+        error_message = "OpenAI API error. Please check your API key and try again."
+    elif "json" in str(error).lower():
+        error_message = "Failed to parse AI response. Please try again."
+    elif "file" in str(error).lower():
+        error_message = "File processing error. Please check your file format."
+    return {'success': False, 'error': error_message}
+
+def _analyze_recipe_uploads(files_data, uploads, content_hashes, filenames_list, force_refresh,
+                            progress=_no_progress):
+    """Recipe analysis core for saved uploads - returns (response body, HTTP status)"""
     try:
-        # Process multiple files using DocumentProcessor
-        files_data = []
-        temp_file_paths = []
         extracted_images_all = []
-        filenames_list = []
         
-        for file in files:
-            if file and file.filename:
-                # Validate file type
-                file_type = file.content_type
-                if not document_processor.is_supported(file_type):
-                    return jsonify({
-                        'success': False,
-                        'error': f'Unsupported file type: {file.filename}. Supported: PDF, DOCX, PPTX, XLSX, TXT, JPG, PNG'
-                    }), 400
-                
-                # Save file temporarily
-                file_path = document_processor.save_uploaded_file(file)
-                temp_file_paths.append(file_path)
-                files_data.append((file_path, file_type, file.filename))
-                filenames_list.append(file.filename)
-                
-                # Extract images from each file
-                file_extension = os.path.splitext(file.filename.lower())[1][1:]  # Remove dot
-                images = extract_images_from_document(file_path, file_extension, file.filename)
-                if images.get('all_images'):
-                    extracted_images_all.extend(images['all_images'])
-        
-        if not files_data:
-            return jsonify({'success': False, 'error': 'No valid files found'}), 400
+        # Identical uploads are answered from the upload cache
+        upload_hash = combined_hash(content_hashes)
+        if not force_refresh:
+            cached_recipe = get_cached('analyze_recipe', upload_hash, 'gpt-4o')
+            if cached_recipe is not None:
+                document_processor.cleanup_files(uploads)
+                logging.info(f"Recipe analysis for {len(filenames_list)} file(s) served from upload cache")
+                return {'success': True, 'recipe_data': cached_recipe, 'cached': True}, 200
+        
+        # Extract images from each file (blob URLs are cached per file content)
+        progress('Extracting images')
+        for (source, file_type, original_name), content_hash in zip(files_data, content_hashes):
+            images = None if force_refresh else get_cached('images', content_hash)
+            if images is None:
+                file_extension = os.path.splitext(original_name.lower())[1][1:]  # Remove dot
+                images = extract_images_from_document(source, file_extension, original_name).get('all_images', [])
+                if images:
+                    set_cached('images', content_hash, images)
+            extracted_images_all.extend(images)
         
         # Process all files and extract text
-        processing_result = document_processor.process_multiple_files(files_data)
+        progress('Extracting text')
+        processing_result = document_processor.process_multiple_files(
+            files_data, content_hashes=content_hashes, refresh=force_refresh
+        )
         
         if processing_result['successful_files'] == 0:
-            document_processor.cleanup_files(temp_file_paths)
-            return jsonify({
+            document_processor.cleanup_files(uploads)
+            return {
                 'success': False,
                 'error': 'Failed to process any uploaded files'
-            }), 400
+            }, 400
         
         # Get combined text content
         file_content = processing_result['combined_text']
@@ -2549,7 +2879,7 @@ def analyze_recipe():
                 'recipe_number': '12345',
                 'extracted_images': []
             }
-            return jsonify({'success': True, 'recipe_data': recipe_data})
+            return {'success': True, 'recipe_data': recipe_data}, 200
             
         # Using gpt-4o for reliable document analysis
         openai_client = OpenAI(api_key=openai_api_key)
@@ -2738,24 +3068,35 @@ def analyze_recipe():
         """
 
         # Call OpenAI API with better error handling
+        analysis_cacheable = False
+        progress('Analyzing with AI')
         try:
             logging.info(f"Calling OpenAI API for recipe analysis of {filename}")
-            response = openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are an expert food technologist specializing in cereal and muesli products. Analyze recipe documents, extract structured data, and translate all German content to English. Maintain technical accuracy in food ingredient translations."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                max_completion_tokens=2000,
-                temperature=0.1
-            )
-
-            # Parse the AI response
-            if response and response.choices and len(response.choices) > 0:
-                ai_response = response.choices[0].message.content
-            else:
+            system_prompt = "You are an expert food technologist specializing in cereal and muesli products. Analyze recipe documents, extract structured data, and translate all German content to English. Maintain technical accuracy in food ingredient translations."
+
+            def call_openai():
+                response = openai_client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    response_format={"type": "json_object"},
+                    max_completion_tokens=2000,
+                    temperature=0.1
+                )
+                # Parse the AI response
+                if response and response.choices and len(response.choices) > 0:
+                    return response.choices[0].message.content
                 raise ValueError("Invalid response structure from OpenAI API")
+
+            # Identical documents are answered from the LLM cache (bypass with no_cache=true)
+            ai_response = cached_completion(
+                "analyze_recipe", "gpt-4o", system_prompt, prompt, call_openai,
+                params={"max_completion_tokens": 2000, "temperature": 0.1},
+                validate=json.loads,
+                bypass=force_refresh
+            )
             logging.info(f"AI response received: {ai_response}")  # Log full response for debugging
             
             if ai_response:
@@ -2878,6 +3219,7 @@ def analyze_recipe():
                 except Exception as claims_error:
                     logging.error(f"ERROR IN CLAIMS CALCULATION: {str(claims_error)}")
                     logging.error(f"Claims error traceback:", exc_info=True)
+                analysis_cacheable = not processing_result['degraded']
             else:
                 raise ValueError("No response from AI analysis")
                 
@@ -2885,10 +3227,10 @@ def analyze_recipe():
             logging.error(f"OpenAI API error: {str(openai_error)}")
             # Check if it's an API key issue
             if "api" in str(openai_error).lower() and ("key" in str(openai_error).lower() or "auth" in str(openai_error).lower()):
-                return jsonify({
+                return {
                     'success': False, 
                     'error': 'OpenAI API key not configured or invalid. Please check the OPENAI_API_KEY environment variable.'
-                })
+                }, 200
             
             # Provide a fallback response if AI fails
             fallback_nutritional_info = {
@@ -2921,29 +3263,89 @@ def analyze_recipe():
         # Add all extracted images to recipe data for user selection
         recipe_data['extracted_images'] = extracted_images.get('all_images', [])
         
+        # Only successful AI results on fully read documents are cached (never the fallback data)
+        if analysis_cacheable:
+            set_cached('analyze_recipe', upload_hash, recipe_data, 'gpt-4o')
+        
         # Cleanup temporary files
-        document_processor.cleanup_files(temp_file_paths)
+        document_processor.cleanup_files(uploads)
         
         logging.info(f"AI analysis completed for {len(filenames_list)} file(s)")
-        return jsonify({'success': True, 'recipe_data': recipe_data})
+        return {'success': True, 'recipe_data': recipe_data}, 200
 
     except Exception as e:
         logging.error(f"Recipe analysis error: {str(e)}")
         
         # Cleanup temporary files on error
-        if 'temp_file_paths' in locals():
-            document_processor.cleanup_files(temp_file_paths)
+        document_processor.cleanup_files(uploads)
         
-        # More specific error handling
-        error_message = "An error occurred during AI analysis."
-        if "openai" in str(e).lower():
-            error_message = "OpenAI API error. Please check your API key and try again."
-        elif "json" in str(e).lower():
-            error_message = "Failed to parse AI response. Please try again."
-        elif "file" in str(e).lower():
-            error_message = "File processing error. Please check your file format."
+        return _recipe_analysis_error(e), 200
+
+@app.route('/api/analyze-recipe', methods=['POST'])
+@csrf.exempt
+@master_required
+def analyze_recipe():
+    # Check for files in request - handle both single and multiple files
+    files = []
+    if 'recipe_file' in request.files:
+        files = request.files.getlist('recipe_file')
+    elif 'recipeFile' in request.files:
+        files = request.files.getlist('recipeFile')
+    elif 'file' in request.files:
+        files = request.files.getlist('file')
+    
+    if not files or all(f.filename == '' for f in files):
+        return jsonify({'success': False, 'error': 'No files uploaded'})
+
+    # force_refresh (or the older no_cache flag) bypasses the upload and LLM caches
+    force_refresh = (request.form.get('force_refresh', 'false').lower() == 'true' or
+                     request.form.get('no_cache', 'false').lower() == 'true')
+
+    try:
+        # Process multiple files using DocumentProcessor
+        files_data = []
+        uploads = []
+        content_hashes = []
+        filenames_list = []
         
-        return jsonify({'success': False, 'error': error_message})
+        for file in files:
+            if file and file.filename:
+                # Validate file type
+                file_type = file.content_type
+                if not document_processor.is_supported(file_type):
+                    return jsonify({
+                        'success': False,
+                        'error': f'Unsupported file type: {file.filename}. Supported: PDF, DOCX, PPTX, XLSX, TXT, JPG, PNG'
+                    }), 400
+                
+                # Keep the upload in memory (spilled to a unique temp file when large), hashed while reading
+                upload = document_processor.spool_upload(file)
+                uploads.append(upload)
+                content_hashes.append(upload.content_hash)
+                files_data.append((upload.source, file_type, file.filename))
+                filenames_list.append(file.filename)
+        
+        if not files_data:
+            return jsonify({'success': False, 'error': 'No valid files found'}), 400
+        
+        if _wants_async_analysis():
+            job_id = submit_job('analyze_recipe', _in_app_context(_analyze_recipe_uploads),
+                                files_data, uploads, content_hashes, filenames_list, force_refresh,
+                                owner=session.get('user_email'))
+            return _job_accepted(job_id)
+        
+        result, status_code = _analyze_recipe_uploads(files_data, uploads, content_hashes,
+                                                      filenames_list, force_refresh)
+        return jsonify(result), status_code
+
+    except Exception as e:
+        logging.error(f"Recipe analysis error: {str(e)}")
+        
+        # Cleanup temporary files on error
+        if 'uploads' in locals():
+            document_processor.cleanup_files(uploads)
+        
+        return jsonify(_recipe_analysis_error(e))
 
 @app.route('/api/upload-recipe-image', methods=['POST'])
 @csrf.exempt
@@ -3086,6 +3488,7 @@ def analyze_batch_recipes():
             'success': True,
             'recipes': recipes_list,
             'count': len(recipes_list),
+            'conflicts': batch_processor.conflicts,
             'message': f'Successfully processed {len(recipes_list)} recipes'
         })
         
@@ -3098,6 +3501,134 @@ def analyze_batch_recipes():
             'error': f'Batch analysis failed: {str(e)}'
         }), 500
 
+# Column limits of Product that bulk publishing validates up front (one bad row must not abort the batch)
+PRODUCT_FIELD_LIMITS = {
+    'name': 100, 'category': 50, 'recipe_number': 50, 'image_url': 200, 'nutri_score_image': 200,
+    'department': 100, 'customer': 200, 'market': 200, 'shelf_life': 100, 'product_type': 50
+}
+PUBLISH_BATCH_MAX_RECIPES = int(os.environ.get('PUBLISH_BATCH_MAX_RECIPES', 500))
+
+def _validate_recipe_data(data):
+    """Returns an error message for an unpublishable recipe payload, or None"""
+    if not isinstance(data, dict):
+        return 'Recipe must be a JSON object'
+    if not str(data.get('name') or '').strip():
+        return 'Recipe name is required'
+    for field, limit in PRODUCT_FIELD_LIMITS.items():
+        value = data.get(field)
+        if value is not None and len(str(value)) > limit:
+            return f'{field} is longer than {limit} characters'
+    for field in ('ingredients', 'allergens', 'claims'):
+        if data.get(field) is not None and not isinstance(data.get(field), list):
+            return f'{field} must be a list'
+    if data.get('nutritional_info') is not None and not isinstance(data.get('nutritional_info'), dict):
+        return 'nutritional_info must be an object'
+    return None
+
+def _build_product_from_data(data):
+    """Create (but do not add) a Product from a publish payload"""
+    new_product = Product()
+    new_product.name = data.get('name', 'Untitled Recipe')
+    # category is NOT NULL - an explicit null falls back to the default like a missing key
+    new_product.category = data.get('category') or 'Traditional Swiss Muesli'
+    new_product.description = data.get('description', '')
+
+    # Store ingredients as JSON - preserve nested structure with children
+    ingredients = data.get('ingredients', [])
+    
+    logging.debug(f"Storing {len(ingredients)} ingredients with nested structure preserved")
+    
+    new_product.ingredients = json.dumps(ingredients)
+
+    # Store nutritional info as JSON  
+    nutritional_info = data.get('nutritional_info', {})
+    new_product.nutritional_info = json.dumps(nutritional_info)
+
+    # Store allergens as JSON
+    allergens = data.get('allergens', [])
+    new_product.allergens = json.dumps(allergens)
+
+    # Store claims as JSON
+    claims = data.get('claims', [])
+    new_product.claims = json.dumps(claims)
+
+    # Store storage conditions
+    storage_conditions = data.get('storage_conditions', 'Store in a cool, dry place, protect from direct sunlight')
+    new_product.storage_conditions = storage_conditions
+
+    # Store shelf life
+    new_product.shelf_life = data.get('shelf_life')
+
+    # Store recipe number if extracted
+    recipe_number = data.get('recipe_number')
+    logging.debug(f"Publishing recipe with recipe_number from data: {recipe_number}")
+    if recipe_number:
+        new_product.recipe_number = recipe_number
+        logging.debug(f"Recipe number set to: {new_product.recipe_number}")
+    
+    # Determine product type based on recipe number or from data
+    product_type = data.get('product_type')
+    if not product_type and recipe_number:
+        # Auto-detect from recipe number: 4* = Productive, 1* = Development
+        import re
+        if re.match(r'^0*4', str(recipe_number)):
+            product_type = 'Productive'
+        else:
+            product_type = 'Development'
+    new_product.product_type = product_type or 'Development'
+    logging.debug(f"Product type set to: {new_product.product_type}")
+
+    # Store new business fields: Exclusive, Department, Customer, Market
+    exclusive = data.get('exclusive')
+    if exclusive == 'ja':
+        new_product.is_exclusive = True
+    elif exclusive == 'nein':
+        new_product.is_exclusive = False
+    else:
+        new_product.is_exclusive = None
+    
+    # Store department (read-only, from AI extraction)
+    new_product.department = data.get('department')
+    
+    # Mutual exclusivity: customer OR market, never both
+    customer_value = data.get('customer')
+    market_value = data.get('market')
+    
+    if customer_value:
+        new_product.customer = customer_value
+        new_product.market = None
+    elif market_value:
+        new_product.market = market_value
+        new_product.customer = None
+    else:
+        new_product.customer = None
+        new_product.market = None
+    
+    logging.debug(f"Business fields - Exclusive: {exclusive}, Department: {new_product.department}, Customer: {new_product.customer}, Market: {new_product.market}")
+
+    # Use uploaded image URL or default
+    image_url = data.get('image_url')
+    logging.debug(f"Publishing recipe with product image URL: {image_url}")
+    if image_url:
+        # Ensure the full URL path is stored
+        new_product.image_url = image_url
+        logging.debug(f"Using extracted/uploaded product image: {image_url}")
+    else:
+        new_product.image_url = '/static/images/product-placeholder.png'
+        logging.debug("Using fallback product image")
+
+    # Set nutri-score image if uploaded
+    nutri_score_image = data.get('nutri_score_image')
+    logging.debug(f"Publishing recipe with nutri-score image URL: {nutri_score_image}")
+    if nutri_score_image:
+        new_product.nutri_score_image = nutri_score_image
+        logging.debug(f"Using extracted/uploaded nutri-score image: {nutri_score_image}")
+    else:
+        new_product.nutri_score_image = None
+        logging.debug("No nutri-score image set")
+
+    return new_product
+
 @app.route('/api/publish-recipe', methods=['POST'])
 @csrf.exempt
 @master_required
@@ -3111,104 +3642,7 @@ def publish_recipe():
         recipe_id = f"recipe_{int(time.time())}_{uuid.uuid4().hex[:8]}"
 
         # Create new Product entry
-        new_product = Product()
-        new_product.name = data.get('name', 'Untitled Recipe')
-        new_product.category = data.get('category', 'Traditional Swiss Muesli')
-        new_product.description = data.get('description', '')
-
-        # Store ingredients as JSON - preserve nested structure with children
-        ingredients = data.get('ingredients', [])
-        
-        logging.info(f"Storing {len(ingredients)} ingredients with nested structure preserved")
-        
-        new_product.ingredients = json.dumps(ingredients)
-
-        # Store nutritional info as JSON  
-        nutritional_info = data.get('nutritional_info', {})
-        new_product.nutritional_info = json.dumps(nutritional_info)
-
-        # Store allergens as JSON
-        allergens = data.get('allergens', [])
-        new_product.allergens = json.dumps(allergens)
-
-        # Store claims as JSON
-        claims = data.get('claims', [])
-        new_product.claims = json.dumps(claims)
-
-        # Store storage conditions
-        storage_conditions = data.get('storage_conditions', 'Store in a cool, dry place, protect from direct sunlight')
-        new_product.storage_conditions = storage_conditions
-
-        # Store shelf life
-        new_product.shelf_life = data.get('shelf_life')
-
-        # Store recipe number if extracted
-        recipe_number = data.get('recipe_number')
-        logging.info(f"Publishing recipe with recipe_number from data: {recipe_number}")
-        if recipe_number:
-            new_product.recipe_number = recipe_number
-            logging.info(f"Recipe number set to: {new_product.recipe_number}")
-        
-        # Determine product type based on recipe number or from data
-        product_type = data.get('product_type')
-        if not product_type and recipe_number:
-            # Auto-detect from recipe number: 4* = Productive, 1* = Development
-            import re
-            if re.match(r'^0*4', str(recipe_number)):
-                product_type = 'Productive'
-            else:
-                product_type = 'Development'
-        new_product.product_type = product_type or 'Development'
-        logging.info(f"Product type set to: {new_product.product_type}")
-
-        # Store new business fields: Exclusive, Department, Customer, Market
-        exclusive = data.get('exclusive')
-        if exclusive == 'ja':
-            new_product.is_exclusive = True
-        elif exclusive == 'nein':
-            new_product.is_exclusive = False
-        else:
-            new_product.is_exclusive = None
-        
-        # Store department (read-only, from AI extraction)
-        new_product.department = data.get('department')
-        
-        # Mutual exclusivity: customer OR market, never both
-        customer_value = data.get('customer')
-        market_value = data.get('market')
-        
-        if customer_value:
-            new_product.customer = customer_value
-            new_product.market = None
-        elif market_value:
-            new_product.market = market_value
-            new_product.customer = None
-        else:
-            new_product.customer = None
-            new_product.market = None
-        
-        logging.info(f"Business fields - Exclusive: {exclusive}, Department: {new_product.department}, Customer: {new_product.customer}, Market: {new_product.market}")
-
-        # Use uploaded image URL or default
-        image_url = data.get('image_url')
-        logging.info(f"Publishing recipe with product image URL: {image_url}")
-        if image_url:
-            # Ensure the full URL path is stored
-            new_product.image_url = image_url
-            logging.info(f"Using extracted/uploaded product image: {image_url}")
-        else:
-            new_product.image_url = '/static/images/product-placeholder.png'
-            logging.info("Using fallback product image")
-
-        # Set nutri-score image if uploaded
-        nutri_score_image = data.get('nutri_score_image')
-        logging.info(f"Publishing recipe with nutri-score image URL: {nutri_score_image}")
-        if nutri_score_image:
-            new_product.nutri_score_image = nutri_score_image
-            logging.info(f"Using extracted/uploaded nutri-score image: {nutri_score_image}")
-        else:
-            new_product.nutri_score_image = None
-            logging.info("No nutri-score image set")
+        new_product = _build_product_from_data(data)
 
         # Add to database
         db.session.add(new_product)
@@ -3230,6 +3664,117 @@ def publish_recipe():
             'error': f'Publishing failed: {str(e)}'
         }), 500
 
+def _insert_products_with_fallback(products, recipes, results):
+    """
+    Insert products in one savepoint (one bulk INSERT); only if the database rejects a row,
+    retry recipe by recipe so the rejected ones are reported at their index.
+    
+    Returns the (index, product) pairs that were saved.
+    """
+    try:
+        with db.session.begin_nested():
+            db.session.add_all([product for _, product in products])
+        return products
+    except SQLAlchemyError as batch_error:
+        logging.warning(f"Batch publish: bulk insert rejected ({batch_error}), retrying recipe by recipe")
+    
+    saved = []
+    for index, _ in products:
+        # Fresh objects: the rolled-back ones may still carry ids from the failed flush
+        product = _build_product_from_data(recipes[index])
+        try:
+            with db.session.begin_nested():
+                db.session.add(product)
+        except SQLAlchemyError as db_error:
+            logging.warning(f"Batch publish: recipe {index} rejected by the database: {db_error}")
+            results.append({'index': index, 'success': False,
+                            'error': 'Recipe could not be saved (database constraint)'})
+            continue
+        saved.append((index, product))
+    return saved
+
+@app.route('/api/publish-recipes', methods=['POST'])
+@csrf.exempt
+@master_required
+def publish_recipes():
+    """
+    Create many recipes in one transaction (batch import)
+    
+    Body: {"recipes": [...], "atomic": false} - each recipe has the /api/publish-recipe payload.
+    Invalid recipes are reported per index; with atomic=true nothing is published if any is invalid
+    or rejected by the database.
+    """
+    try:
+        data = request.get_json(silent=True)
+        recipes = data.get('recipes') if isinstance(data, dict) else data
+        atomic = bool(data.get('atomic')) if isinstance(data, dict) else False
+        
+        if not isinstance(recipes, list) or not recipes:
+            return jsonify({'success': False, 'error': 'No recipes provided'}), 400
+        if len(recipes) > PUBLISH_BATCH_MAX_RECIPES:
+            return jsonify({
+                'success': False,
+                'error': f'Too many recipes in one batch (max {PUBLISH_BATCH_MAX_RECIPES})'
+            }), 400
+        
+        # Validate everything before touching the database
+        results = []
+        products = []
+        batch_id = f"{int(time.time())}_{uuid.uuid4().hex[:8]}"
+        for index, recipe_data in enumerate(recipes):
+            error = _validate_recipe_data(recipe_data)
+            if error is None:
+                try:
+                    products.append((index, _build_product_from_data(recipe_data)))
+                except Exception as build_error:
+                    error = str(build_error)
+            if error is not None:
+                results.append({'index': index, 'success': False, 'error': error})
+        
+        if atomic and results:
+            return jsonify({
+                'success': False,
+                'error': 'Batch contains invalid recipes - nothing was published',
+                'results': results
+            }), 400
+        
+        published = 0
+        if products:
+            if atomic:
+                # One INSERT round trip for the batch (flush assigns the ids)
+                db.session.add_all([product for _, product in products])
+                db.session.flush()
+            else:
+                products = _insert_products_with_fallback(products, recipes, results)
+            for index, product in products:
+                published += 1
+                results.append({
+                    'index': index,
+                    'success': True,
+                    'recipe_id': f"recipe_{batch_id}_{index}",
+                    'database_id': product.id
+                })
+            db.session.commit()
+        
+        results.sort(key=lambda result: result['index'])
+        logging.info(f"Batch publish: {published} of {len(recipes)} recipes created in one transaction")
+        
+        return jsonify({
+            'success': published > 0,
+            'published': published,
+            'failed': len(recipes) - published,
+            'results': results,
+            'message': f'{published} of {len(recipes)} recipes published'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Batch recipe publishing error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Publishing failed: {str(e)}'
+        }), 500
+
 @app.route('/api/delete-recipe/<int:recipe_id>', methods=['DELETE'])
 @csrf.exempt
 @login_required
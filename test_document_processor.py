@@ -0,0 +1,101 @@
+"""
+Tests for the document extraction helpers (header/footer stripping, page classification,
+character budget, upload spooling)
+"""
+
+import io
+import os
+
+# The module creates its OpenAI client at import time; no request is made in these tests
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+
+import fitz
+from werkzeug.datastructures import FileStorage
+
+from document_processor import DocumentProcessor, SpooledUpload, _collect_text, _strip_repeated_margins
+
+
+INGREDIENTS = ['oats', 'honey', 'almonds', 'raisins', 'spelt', 'barley', 'hazelnuts', 'cranberries']
+
+
+def _page(number, body_lines):
+    lines = ['ACME Foods - Product Specification'] + body_lines + [f'Page {number} of 5']
+    return '\n'.join(lines)
+
+
+def _body(number):
+    # Different wording per page - lines that only differ in their numbers count as repeated
+    return [f'{INGREDIENTS[(number + i) % 8].title()} from {INGREDIENTS[i]} farms, batch {number}{i}'
+            for i in range(8)]
+
+
+def test_repeated_header_and_footer_are_removed():
+    pages = [_page(n, _body(n)) for n in range(1, 6)]
+    cleaned, removed = _strip_repeated_margins(pages)
+    assert removed == 10
+    for n, page in enumerate(cleaned, start=1):
+        assert 'ACME Foods' not in page
+        assert 'of 5' not in page
+        assert _body(n)[0] in page
+
+
+def test_repeated_body_line_is_kept():
+    repeated = 'Allergen note: may contain traces of nuts'
+    pages = [_page(n, _body(n)[:4] + [repeated] + _body(n)[4:]) for n in range(1, 6)]
+    cleaned, _ = _strip_repeated_margins(pages)
+    assert all(repeated in page for page in cleaned)
+
+
+def test_short_pages_keep_all_lines():
+    pages = ['Title\nOats', 'Title\nHoney', 'Title\nAlmonds']
+    cleaned, removed = _strip_repeated_margins(pages)
+    assert removed == 0
+    assert cleaned == pages
+
+
+def test_collect_text_stops_at_budget():
+    text, truncated = _collect_text(iter(['abcd', 'efgh', 'ijkl']), 10)
+    assert text == 'abcdefghij'
+    assert truncated
+    assert _collect_text(iter(['abc', 'def']), 10) == ('abcdef', False)
+
+
+def test_pages_without_text_layer_are_classified_as_scanned():
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), 'Oat based muesli with honey clusters and roasted almonds.')
+    scanned = doc.new_page()
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 40), False)
+    pixmap.clear_with(200)
+    scanned.insert_image(fitz.Rect(72, 72, 272, 272), pixmap=pixmap)
+    doc.new_page()  # blank page: neither text nor image
+    pdf = doc.tobytes()
+
+    pages = DocumentProcessor()._classify_pdf_pages(pdf)
+    assert pages['page_count'] == 3
+    assert list(pages['text_pages']) == [0]
+    assert pages['scanned_pages'] == [1]
+    assert len(pages['renders']) == 1
+    assert pages['renders'][0].startswith('data:image/jpeg;base64,')
+
+
+def test_spooled_upload_spills_to_disk_and_close_removes_file(tmp_path):
+    content = b'x' * 64
+    upload = SpooledUpload(FileStorage(io.BytesIO(content), filename='recipe.txt'),
+                           upload_dir=str(tmp_path), max_memory=16)
+    assert not upload.in_memory
+    assert os.path.dirname(upload.source) == str(tmp_path)
+    with open(upload.source, 'rb') as spilled:
+        assert spilled.read() == content
+
+    path = upload.source
+    upload.close()
+    assert not os.path.exists(path)
+
+
+def test_small_upload_stays_in_memory(tmp_path):
+    upload = SpooledUpload(FileStorage(io.BytesIO(b'oats'), filename='recipe.txt'),
+                           upload_dir=str(tmp_path), max_memory=16)
+    assert upload.in_memory
+    assert upload.source == b'oats'
+    assert os.listdir(tmp_path) == []
+    upload.close()
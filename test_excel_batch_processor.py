@@ -0,0 +1,67 @@
+"""
+Tests for merging several workbooks of one kind in a batch (conflicts, later file wins)
+"""
+
+import openpyxl
+
+import excel_batch_processor
+from excel_batch_processor import ExcelBatchProcessor, XLSX_TYPE
+
+HEADER = ['Specification', 'Name', 'Full specification', '', '', '', '', 'Energy kJ', 'Energy kcal',
+          'Fat', 'Saturated fat', 'Carbohydrates', 'Sugars', 'Fiber', 'Protein', 'Salt', 'Nutri Score',
+          'Category']
+
+
+def _row(spec, name, fat, nutri_score='A', category='Muesli'):
+    return [spec, f'{spec} {name}', f'SPEC-{spec}', None, None, None, None, 1600, 380,
+            fat, 1.0, 60.0, 12.0, 8.0, 10.0, 0.1, nutri_score, category]
+
+
+def _nutritional_workbook(path, rows):
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+    wb.save(path)
+    return str(path)
+
+
+def test_two_nutritional_workbooks_report_conflicts_and_later_file_wins(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_batch_processor, 'BATCH_PARSE_WORKERS', 1)
+    first = _nutritional_workbook(tmp_path / 'first.xlsx', [
+        _row('1000001', 'Crunchy', fat=5.0),
+        _row('1000002', 'Classic', fat=7.0),
+    ])
+    second = _nutritional_workbook(tmp_path / 'second.xlsx', [
+        _row('1000001', 'Crunchy', fat=9.5, nutri_score='B'),
+        _row('1000002', 'Classic', fat=7.0),
+    ])
+    processor = ExcelBatchProcessor()
+    recipes = processor.process_batch_files([
+        (first, XLSX_TYPE, 'first.xlsx'),
+        (second, XLSX_TYPE, 'second.xlsx'),
+    ])
+
+    assert set(recipes) == {'1000001', '1000002'}
+    assert recipes['1000001']['nutritional_info']['fat'] == 9.5
+    assert recipes['1000001']['nutri_score'] == 'B'
+    assert processor.conflicts == [{
+        'specification': '1000001',
+        'type': 'nutritional',
+        'fields': ['nutritional_info', 'nutri_score'],
+        'files': ['first.xlsx', 'second.xlsx'],
+        'used': 'second.xlsx',
+    }]
+
+
+def test_identical_ingredients_are_not_a_conflict():
+    processor = ExcelBatchProcessor()
+    target, sources = {}, {}
+    same = {'name': 'Classic', 'ingredients': [{'name': 'Oats', 'percentage': 60}]}
+    processor._merge_workbook(target, {'1000002': dict(same)}, 'ingredients', 'a.xlsx', sources)
+    processor._merge_workbook(target, {'1000002': dict(same, name='Renamed')}, 'ingredients', 'b.xlsx', sources)
+
+    assert processor.conflicts == []
+    assert target['1000002']['name'] == 'Renamed'
+    assert sources['1000002'] == 'b.xlsx'
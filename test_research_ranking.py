@@ -0,0 +1,60 @@
+"""
+Tests for the research data ranking stage (dedupe, BM25, token budget)
+"""
+
+from research_ranking import canonical_url, dedupe_items, rank_research_items
+
+
+def _item(title, url='', source_index=0):
+    return {'source': f'S{source_index}', 'source_index': source_index, 'title': title,
+            'description': '', 'url': url}
+
+
+def test_canonical_url_ignores_tracking_and_formatting():
+    assert canonical_url('https://www.Example.com/a/?utm_source=x&b=2#top') == \
+        canonical_url('http://example.com/a?b=2')
+
+
+def test_canonical_url_keeps_parameters_that_only_start_like_tracking():
+    assert canonical_url('https://example.com/a?ref=rss') == canonical_url('https://example.com/a')
+    assert canonical_url('https://example.com/a?reference=1') != canonical_url('https://example.com/a?reference=2')
+    assert 'refid=7' in canonical_url('https://example.com/a?refid=7&utm_campaign=x')
+
+
+def test_dedupe_by_url_and_near_duplicate_title():
+    items = [
+        _item('Oat milk sales grow 20% in Germany', 'https://example.com/oat'),
+        _item('Different title, same article', 'https://www.example.com/oat/?utm_medium=rss'),
+        _item('Oat milk sales grow 20 % in Germany!', 'https://other.org/oat'),
+        _item('Protein bars gain market share', 'https://other.org/bars'),
+    ]
+    kept = dedupe_items(items)
+    assert [item['title'] for item in kept] == [
+        'Oat milk sales grow 20% in Germany',
+        'Protein bars gain market share',
+    ]
+
+
+def test_ranking_prefers_keyword_matches_across_sources():
+    collected = [
+        {'source': 'A', 'url': 'https://a.org', 'raw_results': [
+            {'title': 'Quarterly report on steel prices', 'url': 'https://a.org/1'},
+            {'title': 'Weather outlook for spring', 'url': 'https://a.org/2'},
+        ]},
+        {'source': 'B', 'url': 'https://b.org', 'raw_results': [
+            {'title': 'Oat based drinks boom among consumers', 'url': 'https://b.org/1'},
+        ]},
+    ]
+    ranking = rank_research_items(collected, ['oat', 'drinks'])
+    assert ranking['items'][0]['source'] == 'B'
+    assert ranking['total'] == 3
+
+
+def test_ranking_respects_token_budget_and_per_source_cap():
+    collected = [{'source': 'A', 'url': 'https://a.org', 'raw_results': [
+        {'title': f'Oat trend number {i} with a reasonably long headline', 'url': f'https://a.org/{i}'}
+        for i in range(20)
+    ]}]
+    ranking = rank_research_items(collected, ['oat'], token_budget=40, max_per_source=10)
+    assert ranking['tokens'] <= 40
+    assert 0 < len(ranking['items']) < 10
@@ -0,0 +1,61 @@
+"""
+Tests for the map-reduce helpers of the trend analyzer (chunking, local topic merge)
+"""
+
+import os
+
+# The module creates its OpenAI client at import time; no request is made in these tests
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+
+from ai_trend_analyzer import CHARS_PER_TOKEN, split_into_chunks, _merge_topic_lists
+
+MAX_TOKENS = 25
+MAX_CHARS = MAX_TOKENS * CHARS_PER_TOKEN
+
+
+def test_short_text_is_a_single_chunk():
+    assert split_into_chunks('Oat drinks keep growing.', MAX_TOKENS) == ['Oat drinks keep growing.']
+
+
+def test_chunks_respect_budget_and_keep_every_paragraph():
+    paragraphs = [f'Paragraph {i} about plant based protein trends.' for i in range(12)]
+    chunks = split_into_chunks('\n\n'.join(paragraphs), MAX_TOKENS)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= MAX_CHARS for chunk in chunks)
+    assert '\n\n'.join(chunks).split('\n\n') == paragraphs
+
+
+def test_oversized_paragraph_is_cut_at_line_breaks():
+    table = '\n'.join(f'row {i} | oats | 12.5 | 380 kcal' for i in range(20))
+    chunks = split_into_chunks(table, MAX_TOKENS)
+    assert all(len(chunk) <= MAX_CHARS for chunk in chunks)
+    assert all(chunk.startswith('row ') for chunk in chunks)
+    assert sum(chunk.count('row ') for chunk in chunks) == 20
+
+
+def test_section_marker_stays_with_its_content():
+    first = '--- Content from a.pdf ---\n\n' + 'Granola sales rise sharply this year.'
+    second = '--- Content from b.pdf ---\n\n' + 'Muesli bars move to less sugar overall.'
+    chunks = split_into_chunks(first + '\n\n' + second, MAX_TOKENS)
+    assert chunks[1].startswith('--- Content from b.pdf ---\nMuesli bars')
+    assert not any(chunk.strip() == '--- Content from b.pdf ---' for chunk in chunks)
+
+
+def test_trailing_bare_marker_is_kept():
+    text = 'Fermented foods are gaining shelf space. ' * 3 + '\n\n--- Content from empty.txt ---'
+    chunks = split_into_chunks(text, MAX_TOKENS)
+    assert chunks[-1].strip().endswith('--- Content from empty.txt ---')
+
+
+def test_merge_topic_lists_dedupes_and_ranks_by_frequency():
+    results = [
+        {'main_topics': ['Protein', 'Oats', None], 'keywords': ['vegan']},
+        {'main_topics': ['oats ', 'Fiber'], 'keywords': []},
+        {'main_topics': ['OATS', 'fiber', 'Sugar reduction']},
+    ]
+    merged = _merge_topic_lists(results, {'main_topics': 3, 'keywords': 5, 'industry_segments': 5})
+    assert merged == {
+        'main_topics': ['Oats', 'Fiber', 'Protein'],
+        'keywords': ['vegan'],
+        'industry_segments': [],
+    }
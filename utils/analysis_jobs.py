@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import uuid
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.llm_cache import PersistentCache
+
+# Hintergrund-Jobs für Dokumentanalysen (Rezept-Import, Trend-Analyse)
+# Die Arbeit läuft auf einem Thread-Pool (Extraktion, Blob-Uploads und LLM-Aufrufe warten überwiegend auf I/O),
+# der Job-Status liegt in SQLite, damit jeder gunicorn-Worker Polling- und SSE-Anfragen beantworten kann.
+ANALYSIS_JOB_WORKERS = int(os.environ.get('ANALYSIS_JOB_WORKERS', 4))
+ANALYSIS_JOB_TTL = int(os.environ.get('ANALYSIS_JOB_TTL', 6 * 3600))  # Sekunden
+ANALYSIS_JOB_PATH = os.environ.get('ANALYSIS_JOB_PATH', os.path.join(tempfile.gettempdir(), 'analysis_jobs.sqlite3'))
+# Jobs laufen im Thread-Pool des gunicorn-Workers - wird der Worker recycelt (max_requests, reload),
+# bleiben sie in SQLite 'queued'/'running'. Nach dieser Laufzeit meldet get_job sie als fehlgeschlagen.
+ANALYSIS_JOB_MAX_RUNTIME = int(os.environ.get('ANALYSIS_JOB_MAX_RUNTIME', 30 * 60))  # Sekunden
+ANALYSIS_JOB_POLL_INTERVAL = float(os.environ.get('ANALYSIS_JOB_POLL_INTERVAL', 1.0))  # Sekunden (SSE-Stream)
+
+FINAL_STATES = ('completed', 'failed')
+
+_jobs = PersistentCache(ANALYSIS_JOB_PATH, ANALYSIS_JOB_TTL, 10000, table='analysis_jobs')
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Thread-Pool lazy und pro Prozess erstellen (gunicorn lädt die App vor dem Fork)"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=ANALYSIS_JOB_WORKERS, thread_name_prefix='analysis-job')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _save(job):
+    job['updated_at'] = time.time()
+    _jobs.set(job['job_id'], json.dumps(job, ensure_ascii=False),
+              {'kind': job['kind'], 'updated_at': job['updated_at']})
+
+
+def get_job(job_id):
+    """Gibt den Job-Status als dict zurück oder None (unbekannt bzw. abgelaufen)"""
+    # Rein lesend (bis auf das einmalige Markieren hängengebliebener Jobs): Polling darf keine
+    # Schreibtransaktionen auslösen, die mit update_job konkurrieren
+    stored = _jobs.peek(job_id)
+    if not stored:
+        return None
+    job = json.loads(stored[0])
+    if job['status'] not in FINAL_STATES and _is_stale(job):
+        # Einmalig festschreiben, damit Polling und SSE-Stream einen Endzustand sehen
+        logging.warning(f"Analyse-Job {job_id} [{job['kind']}] nach {ANALYSIS_JOB_MAX_RUNTIME}s ohne Ergebnis "
+                        f"als fehlgeschlagen markiert (Worker neu gestartet?)")
+        job.update(status='failed', status_code=504, progress='Failed',
+                   result={'success': False, 'error': 'Analysis did not finish in time. Please try again.'})
+        _save(job)
+    return job
+
+
+def _is_stale(job):
+    started = job.get('started_at') or job['created_at']
+    return time.time() - started > ANALYSIS_JOB_MAX_RUNTIME
+
+
+def get_job_updated_at(job_id):
+    """Zeitpunkt der letzten Statusänderung oder None - billig genug für eine Polling-Schleife"""
+    stored = _jobs.peek(job_id, with_value=False)
+    return stored[1].get('updated_at') if stored else None
+
+
+def update_job(job_id, **fields):
+    job = get_job(job_id)
+    if job is None:
+        return
+    job.update(fields)
+    _save(job)
+
+
+def submit_job(kind, work_fn, *args, owner=None):
+    """
+    Startet eine Analyse im Hintergrund und gibt die Job-ID zurück.
+
+    work_fn(*args, progress=callback) muss (Antwort-dict, HTTP-Status) zurückgeben -
+    dieselbe Antwort, die der synchrone Endpunkt liefern würde.
+    """
+    job_id = str(uuid.uuid4())
+    now = time.time()
+    _save({
+        'job_id': job_id,
+        'kind': kind,
+        'owner': owner,
+        'status': 'queued',
+        'progress': 'Queued',
+        'result': None,
+        'status_code': None,
+        'created_at': now
+    })
+
+    def progress(message):
+        update_job(job_id, progress=message)
+
+    def run():
+        start = time.perf_counter()
+        update_job(job_id, status='running', progress='Started', started_at=time.time())
+        try:
+            result, status_code = work_fn(*args, progress=progress)
+            state = 'completed' if status_code < 400 and result.get('success', True) else 'failed'
+            update_job(job_id, status=state, result=result, status_code=status_code, progress='Done')
+            logging.info(f"✅ Analyse-Job {job_id} [{kind}] {state} in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            logging.error(f"Analyse-Job {job_id} [{kind}] fehlgeschlagen: {e}")
+            update_job(job_id, status='failed', status_code=500, progress='Failed',
+                       result={'success': False, 'error': 'Analysis failed. Please try again.'})
+
+    _get_executor().submit(run)
+    logging.info(f"📥 Analyse-Job {job_id} [{kind}] eingereiht")
+    return job_id
@@ -1,25 +1,50 @@
 import os
 import re
+import time
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 from azure.storage.blob import BlobServiceClient, ContentSettings
 import logging
 
 # Konfiguration abrufen
 AZURE_STORAGE_CONNECTION_STRING = os.environ.get('AZURE_STORAGE_CONNECTION_STRING')
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get('AZURE_STORAGE_CONTAINER_NAME')
+BLOB_UPLOAD_WORKERS = int(os.environ.get('BLOB_UPLOAD_WORKERS', 4))
+RECIPE_IMAGE_INDEX_TTL = int(os.environ.get('RECIPE_IMAGE_INDEX_TTL', 120))  # Sekunden
+
+# Der BlobServiceClient ist threadsicher und hält einen HTTP-Verbindungspool - einmal pro Prozess erstellen
+_blob_service_client = None
+_blob_service_client_pid = None
+_blob_service_client_lock = threading.Lock()
+
+# Rezeptnummer -> neuestes Bild (last_modified, Blob-Name), aus einem einzigen Container-Listing
+_recipe_image_index = None
+_recipe_image_index_built_at = 0.0
+_recipe_image_index_lock = threading.Lock()
+
+RECIPE_IMAGE_PATTERN = re.compile(r".*\.(png|jpg)$", re.IGNORECASE)
+RECIPE_NUMBER_TOKEN = re.compile(r"\b\d+\b")
 
 logging.basicConfig(level=logging.INFO)
 
 def get_blob_service_client():
-    """Erstellt und gibt einen BlobServiceClient zurück."""
+    """Gibt den (pro Prozess gecachten) BlobServiceClient zurück."""
+    global _blob_service_client, _blob_service_client_pid
     if not AZURE_STORAGE_CONNECTION_STRING or not AZURE_STORAGE_CONTAINER_NAME:
         logging.error("Azure Storage Konfiguration (Connection String oder Container Name) ist nicht gesetzt.")
         return None
-    try:
-        blob_service_client = BlobServiceClient.from_connection_string(AZURE_STORAGE_CONNECTION_STRING)
-        return blob_service_client
-    except Exception as e:
-        logging.error(f"Fehler beim Erstellen des BlobServiceClient: {e}")
-        return None
+    with _blob_service_client_lock:
+        # gunicorn lädt die App vor dem Fork - Verbindungen nicht zwischen Prozessen teilen
+        if _blob_service_client is not None and _blob_service_client_pid == os.getpid():
+            return _blob_service_client
+        try:
+            _blob_service_client = BlobServiceClient.from_connection_string(AZURE_STORAGE_CONNECTION_STRING)
+            _blob_service_client_pid = os.getpid()
+            return _blob_service_client
+        except Exception as e:
+            logging.error(f"Fehler beim Erstellen des BlobServiceClient: {e}")
+            return None
 
 def upload_file_to_blob(file_stream, file_name, content_type):
     """Lädt einen Dateistream in den Azure Blob Storage hoch."""
@@ -41,11 +66,26 @@ def upload_file_to_blob(file_stream, file_name, content_type):
         blob_client.set_http_headers(content_settings=ContentSettings(content_type=content_type))
 
         logging.info(f"Datei {file_name} erfolgreich in Azure Blob Storage hochgeladen.")
+        _add_to_recipe_image_index(file_name, datetime.now(timezone.utc))
         return blob_client.url
     except Exception as e:
         logging.error(f"Fehler beim Hochladen der Datei {file_name} nach Azure Blob Storage: {e}")
         return None
 
+def upload_files_to_blob(uploads, max_workers=BLOB_UPLOAD_WORKERS):
+    """
+    Lädt mehrere Dateien parallel über einen begrenzten Thread-Pool hoch.
+
+    uploads: Liste von (file_stream, file_name, content_type)
+    Gibt die URLs in Eingabereihenfolge zurück (None bei fehlgeschlagenem Upload).
+    """
+    if not uploads:
+        return []
+    if max_workers <= 1 or len(uploads) == 1:
+        return [upload_file_to_blob(*upload) for upload in uploads]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(uploads)), thread_name_prefix='blob-upload') as executor:
+        return list(executor.map(lambda upload: upload_file_to_blob(*upload), uploads))
+
 def get_blob_url_if_exists(file_name):
     """Überprüft, ob ein Blob existiert und gibt dessen URL zurück."""
     blob_service_client = get_blob_service_client()
@@ -64,39 +104,72 @@ def get_blob_url_if_exists(file_name):
         logging.error(f"Fehler beim Überprüfen des Blobs {file_name}: {e}")
         return None
 
-def find_latest_image_for_recipe(spec_num):
+def _add_to_recipe_image_index(blob_name, last_modified, index=None):
+    """Trägt ein Bild unter allen Rezeptnummern ein, die als ganzes Wort im Namen vorkommen"""
+    if not RECIPE_IMAGE_PATTERN.match(blob_name):
+        return
+    with _recipe_image_index_lock:
+        target = index if index is not None else _recipe_image_index
+        if target is None:
+            return
+        for spec_num in set(RECIPE_NUMBER_TOKEN.findall(blob_name)):
+            current = target.get(spec_num)
+            if current is None or last_modified > current[0]:
+                target[spec_num] = (last_modified, blob_name)
+
+def get_recipe_image_index(force_refresh=False):
     """
-    Finds the most recently updated image for a given recipe specification number.
-    Searches for blobs containing the spec_num as a whole word, ending in .png or .jpg.
+    Gibt den Index Rezeptnummer -> (last_modified, Blob-Name) des neuesten Bildes zurück.
+    Der Index entsteht aus einem einzigen list_blobs() und wird RECIPE_IMAGE_INDEX_TTL Sekunden gecacht.
     """
+    global _recipe_image_index, _recipe_image_index_built_at
+    with _recipe_image_index_lock:
+        if (not force_refresh and _recipe_image_index is not None
+                and time.monotonic() - _recipe_image_index_built_at < RECIPE_IMAGE_INDEX_TTL):
+            return _recipe_image_index
+
     blob_service_client = get_blob_service_client()
     if not blob_service_client:
-        return None, None
+        return None
 
     try:
+        start = time.perf_counter()
         container_client = blob_service_client.get_container_client(AZURE_STORAGE_CONTAINER_NAME)
-        blobs = container_client.list_blobs()
-
-        candidate_blobs = []
-        # Regex to find the spec_num as a whole word, case-insensitive for extensions
-        pattern = re.compile(r".*\b" + re.escape(spec_num) + r"\b.*\.(png|jpg)$", re.IGNORECASE)
-
-        for blob in blobs:
-            if pattern.match(blob.name):
-                candidate_blobs.append(blob)
-
-        if not candidate_blobs:
-            logging.info(f"Kein passendes Bild für Rezeptnummer {spec_num} gefunden.")
-            return None, None
+        index = {}
+        blob_count = 0
+        for blob in container_client.list_blobs():
+            blob_count += 1
+            _add_to_recipe_image_index(blob.name, blob.last_modified, index)
+    except Exception as e:
+        logging.error(f"Fehler beim Aufbau des Bild-Index: {e}")
+        return None
 
-        # Sort blobs by last_modified timestamp in descending order and pick the newest
-        latest_blob = sorted(candidate_blobs, key=lambda b: b.last_modified, reverse=True)[0]
+    with _recipe_image_index_lock:
+        _recipe_image_index = index
+        _recipe_image_index_built_at = time.monotonic()
+    logging.info(f"Bild-Index aufgebaut: {len(index)} Rezeptnummern aus {blob_count} Blobs in {time.perf_counter() - start:.2f}s")
+    return index
 
-        blob_client = container_client.get_blob_client(latest_blob.name)
-        logging.info(f"Neuestes passendes Bild für Rezeptnummer {spec_num} gefunden: {latest_blob.name}")
+def find_latest_image_for_recipe(spec_num):
+    """
+    Finds the most recently updated image for a given recipe specification number.
+    Matches blobs containing the spec_num as a whole word, ending in .png or .jpg,
+    using the cached container index (one listing per RECIPE_IMAGE_INDEX_TTL).
+    """
+    index = get_recipe_image_index()
+    if index is None:
+        return None, None
 
-        return blob_client.url, latest_blob.name
+    entry = index.get(str(spec_num))
+    if entry is None:
+        logging.info(f"Kein passendes Bild für Rezeptnummer {spec_num} gefunden.")
+        return None, None
 
-    except Exception as e:
-        logging.error(f"Fehler bei der Suche nach dem neuesten Bild für Rezeptnummer {spec_num}: {e}")
+    blob_service_client = get_blob_service_client()
+    if not blob_service_client:
         return None, None
+
+    latest_name = entry[1]
+    blob_client = blob_service_client.get_blob_client(container=AZURE_STORAGE_CONTAINER_NAME, blob=latest_name)
+    logging.info(f"Neuestes passendes Bild für Rezeptnummer {spec_num} gefunden: {latest_name}")
+    return blob_client.url, latest_name
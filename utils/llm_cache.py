@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import tempfile
+import threading
+
+from utils.research_replay import replay_mode, replay_llm
+
+# Konfiguration abrufen
+LLM_CACHE_PATH = os.environ.get('LLM_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'llm_cache.sqlite3'))
+LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', 7 * 24 * 3600))  # Sekunden
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 2000))
+LLM_CACHE_DISABLED = os.environ.get('LLM_CACHE_DISABLED', '0') == '1'
+
+
+class PersistentCache:
+    """Lokaler SQLite-Key-Value-Cache mit TTL und LRU-Begrenzung der Eintragsanzahl."""
+
+    def __init__(self, path, ttl, max_entries, table='cache'):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.table = table
+        self.lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, meta TEXT, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key):
+        """Gibt (value, meta) zurück oder None, wenn nicht vorhanden bzw. abgelaufen."""
+        now = time.time()
+        with self.lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    f"SELECT value, meta, created_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                value, meta, created_at = row
+                if now - created_at > self.ttl:
+                    conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    conn.commit()
+                    return None
+                conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+                return value, json.loads(meta) if meta else {}
+            except sqlite3.Error as e:
+                logging.error(f"Cache-Lesefehler ({self.path}): {e}")
+                return None
+
+    def peek(self, key, with_value=True):
+        """Wie get(), aber rein lesend (accessed_at bleibt unverändert) - für häufiges Status-Polling."""
+        columns = "value, meta, created_at" if with_value else "NULL, meta, created_at"
+        with self.lock:
+            try:
+                row = self._connect().execute(
+                    f"SELECT {columns} FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logging.error(f"Cache-Lesefehler ({self.path}): {e}")
+                return None
+        if row is None or time.time() - row[2] > self.ttl:
+            return None
+        return row[0], json.loads(row[1]) if row[1] else {}
+
+    def set(self, key, value, meta=None):
+        """Speichert einen Eintrag und entfernt bei Überschreitung die am längsten ungenutzten."""
+        now = time.time()
+        with self.lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, meta, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, json.dumps(meta) if meta else None, now, now)
+                )
+                conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl,))
+                conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+                    "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logging.error(f"Cache-Schreibfehler ({self.path}): {e}")
+
+    def delete(self, key):
+        with self.lock:
+            try:
+                conn = self._connect()
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                conn.commit()
+            except sqlite3.Error as e:
+                logging.error(f"Cache-Löschfehler ({self.path}): {e}")
+
+
+_llm_cache = PersistentCache(LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES, table='llm_responses')
+
+# Statistiken pro Aufrufstelle: {call_site: {'hits', 'misses', 'saved_seconds'}}
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def make_cache_key(model, system_prompt, user_prompt, params=None):
+    """Inhaltsadressierter Schlüssel aus Modell, System-Prompt, Prompt-Hash und Parametern."""
+    user_hash = hashlib.sha256((user_prompt or '').encode('utf-8')).hexdigest()
+    material = json.dumps({
+        'model': model,
+        'system': system_prompt or '',
+        'user': user_hash,
+        'params': params or {}
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def _record(call_site, hit, saved_seconds=0.0):
+    with _stats_lock:
+        stats = _stats.setdefault(call_site, {'hits': 0, 'misses': 0, 'saved_seconds': 0.0})
+        if hit:
+            stats['hits'] += 1
+            stats['saved_seconds'] += saved_seconds
+        else:
+            stats['misses'] += 1
+        return dict(stats)
+
+
+def lookup_completion(call_site, model, system_prompt, user_prompt, params=None, bypass=False):
+    """Gibt die gecachte Antwort zurück (und zählt den Hit) oder None."""
+    if bypass or LLM_CACHE_DISABLED or replay_mode() != 'off':
+        return None
+
+    cached = _llm_cache.get(make_cache_key(model, system_prompt, user_prompt, params))
+    if cached is None:
+        return None
+    value, meta = cached
+    stats = _record(call_site, True, meta.get('latency', 0.0))
+    logging.info(f"💾 LLM-Cache Hit [{call_site}]: {meta.get('latency', 0.0):.1f}s gespart "
+                 f"({stats['hits']}/{stats['hits'] + stats['misses']} Hits, "
+                 f"gesamt {stats['saved_seconds']:.1f}s gespart)")
+    return value
+
+
+def store_completion(call_site, model, system_prompt, user_prompt, value, latency, params=None,
+                     validate=None, bypass=False):
+    """Zählt den Miss und speichert eine (gültige) Antwort im Cache."""
+    if bypass or LLM_CACHE_DISABLED or replay_mode() != 'off':
+        return
+    _record(call_site, False)
+
+    if value is None:
+        return
+    if validate is not None:
+        try:
+            validate(value)
+        except Exception:
+            return
+    _llm_cache.set(make_cache_key(model, system_prompt, user_prompt, params), value,
+                   {'call_site': call_site, 'model': model, 'latency': round(latency, 3)})
+
+
+def cached_completion(call_site, model, system_prompt, user_prompt, call_fn, params=None,
+                      validate=None, bypass=False):
+    """
+    Gibt die Textantwort eines LLM-Aufrufs zurück - aus dem Cache oder über call_fn().
+
+    call_fn: Funktion ohne Argumente, die den Antworttext liefert
+    validate: optionale Prüfung des Textes (z.B. json.loads); nur gültige Antworten werden gecacht
+    bypass: Cache für diesen Aufruf überspringen (zusätzlich global via LLM_CACHE_DISABLED=1)
+
+    Im Record/Replay-Modus (RESEARCH_REPLAY_MODE) wird der Cache übersprungen und der Aufruf
+    über utils.research_replay aufgezeichnet bzw. abgespielt.
+    """
+    value = lookup_completion(call_site, model, system_prompt, user_prompt, params, bypass)
+    if value is not None:
+        return value
+
+    start = time.perf_counter()
+    value = replay_llm(call_site, model, system_prompt, user_prompt, params, call_fn)
+    store_completion(call_site, model, system_prompt, user_prompt, value, time.perf_counter() - start,
+                     params, validate, bypass)
+    return value
+
+
+def get_cache_stats():
+    """Liefert Hit/Miss-Zähler und gesparte Latenz pro Aufrufstelle."""
+    with _stats_lock:
+        return {site: dict(stats) for site, stats in _stats.items()}
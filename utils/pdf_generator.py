@@ -3,36 +3,24 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Tabl
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from reportlab.pdfgen import canvas
 from reportlab.platypus.doctemplate import PageTemplate, BaseDocTemplate
 from reportlab.platypus.frames import Frame
 import json
 import os
+import tempfile
 from datetime import datetime
 from io import BytesIO
 import urllib.request
 
-def generate_concept_pdf(concept_session):
-    """Generate a PDF concept summary matching the Live Preview layout exactly - side-by-side cards"""
-    
-    # Create directory if it doesn't exist
-    pdf_dir = 'static/pdfs'
-    os.makedirs(pdf_dir, exist_ok=True)
-    
-    # Generate filename
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f'concept_{concept_session.session_id}_{timestamp}.pdf'
-    filepath = os.path.join(pdf_dir, filename)
-    
-    # Create PDF document
-    doc = SimpleDocTemplate(filepath, pagesize=A4, 
-                          leftMargin=0.75*inch, rightMargin=0.75*inch, 
-                          topMargin=0.75*inch, bottomMargin=0.75*inch)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Custom styles matching Brüggen branding
+# Styles are built once per process instead of on every render call
+_sample_styles = getSampleStyleSheet()
+
+
+def _build_concept_styles():
+    """Custom styles matching Brüggen branding"""
+    styles = _sample_styles
     title_style = ParagraphStyle(
         'BruggenTitle',
         parent=styles['Heading1'],
@@ -42,7 +30,7 @@ def generate_concept_pdf(concept_session):
         spaceAfter=10,
         fontName='Helvetica-Bold'
     )
-    
+
     subtitle_style = ParagraphStyle(
         'BruggenSubtitle',
         parent=styles['Heading2'],
@@ -52,7 +40,7 @@ def generate_concept_pdf(concept_session):
         spaceAfter=20,
         fontName='Helvetica-Bold'
     )
-    
+
     header_style = ParagraphStyle(
         'SectionHeader',
         parent=styles['Heading2'],
@@ -62,7 +50,7 @@ def generate_concept_pdf(concept_session):
         spaceAfter=10,
         fontName='Helvetica-Bold'
     )
-    
+
     card_header_style = ParagraphStyle(
         'CardHeader',
         parent=styles['Heading3'],
@@ -72,7 +60,7 @@ def generate_concept_pdf(concept_session):
         spaceAfter=8,
         fontName='Helvetica-Bold'
     )
-    
+
     normal_style = ParagraphStyle(
         'CustomNormal',
         parent=styles['Normal'],
@@ -81,7 +69,7 @@ def generate_concept_pdf(concept_session):
         spaceAfter=6,
         fontName='Helvetica'
     )
-    
+
     product_title_style = ParagraphStyle(
         'ProductTitle',
         parent=styles['Heading3'],
@@ -92,6 +80,148 @@ def generate_concept_pdf(concept_session):
         fontName='Helvetica-Bold'
     )
     
+    bold_label_style = ParagraphStyle('BoldLabel', parent=normal_style, fontName='Helvetica-Bold')
+    
+    unapproved_style = ParagraphStyle(
+        'UnapprovedIngredient',
+        parent=normal_style,
+        textColor=colors.HexColor('#dc3545'),  # Bootstrap danger red
+        fontName='Helvetica-Bold'
+    )
+    
+    return {
+        'title': title_style,
+        'subtitle': subtitle_style,
+        'header': header_style,
+        'card_header': card_header_style,
+        'normal': normal_style,
+        'product_title': product_title_style,
+        'bold_label': bold_label_style,
+        'unapproved': unapproved_style
+    }
+
+
+def _build_research_styles():
+    """Styles for the deep research report"""
+    styles = _sample_styles
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#661c31'),
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ),
+        'company': ParagraphStyle(
+            'CompanyStyle',
+            parent=styles['Normal'],
+            fontSize=14,
+            textColor=colors.HexColor('#661c31'),
+            spaceAfter=10,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ),
+        'header': ParagraphStyle(
+            'CustomHeader',
+            parent=styles['Heading2'],
+            fontSize=16,
+            textColor=colors.HexColor('#661c31'),
+            spaceAfter=12,
+            spaceBefore=20,
+            fontName='Helvetica-Bold'
+        ),
+        'body': ParagraphStyle(
+            'CustomBody',
+            parent=styles['BodyText'],
+            fontSize=11,
+            alignment=TA_JUSTIFY,
+            spaceAfter=12,
+            leading=16,
+            fontName='Helvetica'
+        ),
+        'footnote': ParagraphStyle(
+            'FootnoteStyle',
+            parent=styles['Normal'],
+            fontSize=9,
+            textColor=colors.HexColor('#555555'),
+            spaceAfter=6,
+            leftIndent=20,
+            fontName='Helvetica'
+        ),
+        'metadata': ParagraphStyle(
+            'MetadataStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.HexColor('#666666'),
+            alignment=TA_CENTER,
+            spaceAfter=10
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=9,
+            textColor=colors.HexColor('#666666'),
+            alignment=TA_CENTER
+        )
+    }
+
+
+CONCEPT_STYLES = _build_concept_styles()
+RESEARCH_STYLES = _build_research_styles()
+
+
+def concept_pdf_path(session_id):
+    """Target path for a new concept PDF (static/pdfs/concept_<session>_<timestamp>.pdf)"""
+    pdf_dir = 'static/pdfs'
+    os.makedirs(pdf_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return os.path.join(pdf_dir, f'concept_{session_id}_{timestamp}.pdf')
+
+
+def _build_atomically(doc, story, filepath):
+    """
+    Build the PDF into a temp file next to filepath and move it into place, so filepath
+    only ever exists as a complete PDF (other worker processes serve it by path)
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(filepath) or '.', prefix='.rendering_', suffix='.pdf')
+    os.close(fd)
+    try:
+        os.chmod(temp_path, 0o644)  # mkstemp creates 0600; the PDFs are served as static files
+        doc.filename = temp_path
+        doc.build(story)
+        os.replace(temp_path, filepath)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def generate_concept_pdf(concept_session, filepath=None):
+    """
+    Generate a PDF concept summary matching the Live Preview layout exactly - side-by-side cards
+
+    concept_session: ConceptSession or any object with the same attributes (e.g. a picklable
+    snapshot for the render process pool); filepath defaults to concept_pdf_path()
+    """
+    if filepath is None:
+        filepath = concept_pdf_path(concept_session.session_id)
+    
+    # Create PDF document
+    doc = SimpleDocTemplate(filepath, pagesize=A4, 
+                          leftMargin=0.75*inch, rightMargin=0.75*inch, 
+                          topMargin=0.75*inch, bottomMargin=0.75*inch)
+    story = []
+    
+    title_style = CONCEPT_STYLES['title']
+    subtitle_style = CONCEPT_STYLES['subtitle']
+    header_style = CONCEPT_STYLES['header']
+    card_header_style = CONCEPT_STYLES['card_header']
+    normal_style = CONCEPT_STYLES['normal']
+    product_title_style = CONCEPT_STYLES['product_title']
+    bold_label_style = CONCEPT_STYLES['bold_label']
+    
     # Header with Brüggen branding
     story.append(Paragraph("H. & J. Brüggen KG", title_style))
     story.append(Paragraph("Innovation Concept Summary", subtitle_style))
@@ -152,7 +282,7 @@ def generate_concept_pdf(concept_session):
     
     # Base ingredients section with unapproved raw material marking
     if config.get('baseIngredients'):
-        recipe_details.append(Paragraph("<b>Base Ingredients:</b>", ParagraphStyle('BoldLabel', parent=normal_style, fontName='Helvetica-Bold')))
+        recipe_details.append(Paragraph("<b>Base Ingredients:</b>", bold_label_style))
         if isinstance(config['baseIngredients'], list):
             for ingredient in config['baseIngredients']:
                 # Check if ingredient is a structured object or just a string
@@ -161,13 +291,7 @@ def generate_concept_pdf(concept_session):
                     # Check for unapproved raw material status
                     if ingredient.get('status') == 'unapproved_raw_material':
                         # Red color style for unapproved ingredients
-                        unapproved_style = ParagraphStyle(
-                            'UnapprovedIngredient',
-                            parent=normal_style,
-                            textColor=colors.HexColor('#dc3545'),  # Bootstrap danger red
-                            fontName='Helvetica-Bold'
-                        )
-                        recipe_details.append(Paragraph(f"• {ing_name} <font color='#dc3545'><b>[UNAPPROVED RAW MATERIAL]</b></font>", unapproved_style))
+                        recipe_details.append(Paragraph(f"• {ing_name} <font color='#dc3545'><b>[UNAPPROVED RAW MATERIAL]</b></font>", CONCEPT_STYLES['unapproved']))
                     else:
                         recipe_details.append(Paragraph(f"• {ing_name}", normal_style))
                 else:
@@ -179,7 +303,7 @@ def generate_concept_pdf(concept_session):
     
     # Base nutritional claims
     if config.get('baseClaims'):
-        recipe_details.append(Paragraph("<b>Nutritional Claims:</b>", ParagraphStyle('BoldLabel', parent=normal_style, fontName='Helvetica-Bold')))
+        recipe_details.append(Paragraph("<b>Nutritional Claims:</b>", bold_label_style))
         if isinstance(config['baseClaims'], list):
             for claim in config['baseClaims']:
                 recipe_details.append(Paragraph(f"• {claim}", normal_style))
@@ -189,7 +313,7 @@ def generate_concept_pdf(concept_session):
     
     # Base certifications
     if config.get('baseCertifications'):
-        recipe_details.append(Paragraph("<b>Certifications:</b>", ParagraphStyle('BoldLabel', parent=normal_style, fontName='Helvetica-Bold')))
+        recipe_details.append(Paragraph("<b>Certifications:</b>", bold_label_style))
         if isinstance(config['baseCertifications'], list):
             for cert in config['baseCertifications']:
                 recipe_details.append(Paragraph(f"• {cert}", normal_style))
@@ -202,28 +326,28 @@ def generate_concept_pdf(concept_session):
     
     # Custom ingredients
     if config.get('customIngredients') and config['customIngredients']:
-        current_config.append(Paragraph("<b>Additional Ingredients:</b>", ParagraphStyle('BoldLabel', parent=normal_style, fontName='Helvetica-Bold')))
+        current_config.append(Paragraph("<b>Additional Ingredients:</b>", bold_label_style))
         for ingredient in config['customIngredients']:
             current_config.append(Paragraph(f"• {ingredient}", normal_style))
         current_config.append(Spacer(1, 10))
     
     # Additional nutritional claims
     if config.get('nutritionalClaims') and config['nutritionalClaims']:
-        current_config.append(Paragraph("<b>Additional Claims:</b>", ParagraphStyle('BoldLabel', parent=normal_style, fontName='Helvetica-Bold')))
+        current_config.append(Paragraph("<b>Additional Claims:</b>", bold_label_style))
         for claim in config['nutritionalClaims']:
             current_config.append(Paragraph(f"• {claim}", normal_style))
         current_config.append(Spacer(1, 10))
     
     # Additional certifications
     if config.get('certifications') and config['certifications']:
-        current_config.append(Paragraph("<b>Additional Certifications:</b>", ParagraphStyle('BoldLabel', parent=normal_style, fontName='Helvetica-Bold')))
+        current_config.append(Paragraph("<b>Additional Certifications:</b>", bold_label_style))
         for cert in config['certifications']:
             current_config.append(Paragraph(f"• {cert}", normal_style))
         current_config.append(Spacer(1, 10))
     
     # Packaging
     if config.get('packaging'):
-        current_config.append(Paragraph("<b>Packaging:</b>", ParagraphStyle('BoldLabel', parent=normal_style, fontName='Helvetica-Bold')))
+        current_config.append(Paragraph("<b>Packaging:</b>", bold_label_style))
         current_config.append(Paragraph(f"• {config['packaging']}", normal_style))
     
     # Create the side-by-side table layout
@@ -326,8 +450,155 @@ def generate_concept_pdf(concept_session):
     story.append(Paragraph(contact_info, normal_style))
     
     # Build PDF
-    doc.build(story)
+    _build_atomically(doc, story, filepath)
     
     return filepath
 
 
+def generate_research_report_pdf(report_data, pdf_path):
+    """Generiert einen professionellen PDF-Report (Deep Research) mit Fließtext und Fußnoten"""
+    doc = SimpleDocTemplate(pdf_path, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm,
+                           leftMargin=2.5*cm, rightMargin=2.5*cm)
+    story = []
+    
+    # Header with Company Info
+    story.append(Paragraph("H. & J. Brüggen KG", RESEARCH_STYLES['company']))
+    story.append(Paragraph("The World of Cereals", RESEARCH_STYLES['metadata']))
+    story.append(Spacer(1, 0.5*cm))
+    story.append(Paragraph(f"Generiert am: {datetime.now().strftime('%d.%m.%Y')}", RESEARCH_STYLES['metadata']))
+    story.append(Spacer(1, 1*cm))
+    
+    # Report Title
+    report_title = report_data.get('title', 'Deep Research Report')
+    story.append(Paragraph(report_title, RESEARCH_STYLES['title']))
+    story.append(Spacer(1, 1*cm))
+    
+    # Introduction
+    if 'introduction' in report_data and report_data['introduction']:
+        story.append(Paragraph("<b>Einleitung</b>", RESEARCH_STYLES['header']))
+        intro_text = report_data['introduction']
+        story.append(Paragraph(intro_text, RESEARCH_STYLES['body']))
+        story.append(Spacer(1, 0.5*cm))
+    
+    # Main Content
+    if 'main_content' in report_data and report_data['main_content']:
+        story.append(PageBreak())
+        story.append(Paragraph("<b>Hauptanalyse</b>", RESEARCH_STYLES['header']))
+        main_text = report_data['main_content']
+        # Split long text into paragraphs if it contains line breaks
+        if '\n\n' in main_text:
+            paragraphs = main_text.split('\n\n')
+            for para in paragraphs:
+                if para.strip():
+                    story.append(Paragraph(para.strip(), RESEARCH_STYLES['body']))
+        else:
+            story.append(Paragraph(main_text, RESEARCH_STYLES['body']))
+        story.append(Spacer(1, 0.5*cm))
+    
+    # Market Analysis
+    if 'market_analysis' in report_data and report_data['market_analysis']:
+        story.append(PageBreak())
+        story.append(Paragraph("<b>Marktanalyse</b>", RESEARCH_STYLES['header']))
+        market_text = report_data['market_analysis']
+        if '\n\n' in market_text:
+            paragraphs = market_text.split('\n\n')
+            for para in paragraphs:
+                if para.strip():
+                    story.append(Paragraph(para.strip(), RESEARCH_STYLES['body']))
+        else:
+            story.append(Paragraph(market_text, RESEARCH_STYLES['body']))
+        story.append(Spacer(1, 0.5*cm))
+    
+    # Consumer Insights
+    if 'consumer_insights' in report_data and report_data['consumer_insights']:
+        story.append(PageBreak())
+        story.append(Paragraph("<b>Consumer Insights</b>", RESEARCH_STYLES['header']))
+        insights_text = report_data['consumer_insights']
+        if isinstance(insights_text, str):
+            if '\n\n' in insights_text:
+                paragraphs = insights_text.split('\n\n')
+                for para in paragraphs:
+                    if para.strip():
+                        story.append(Paragraph(para.strip(), RESEARCH_STYLES['body']))
+            else:
+                story.append(Paragraph(insights_text, RESEARCH_STYLES['body']))
+        story.append(Spacer(1, 0.5*cm))
+    
+    # Future Outlook
+    if 'future_outlook' in report_data and report_data['future_outlook']:
+        story.append(PageBreak())
+        story.append(Paragraph("<b>Zukunftsausblick</b>", RESEARCH_STYLES['header']))
+        future_text = report_data['future_outlook']
+        if '\n\n' in future_text:
+            paragraphs = future_text.split('\n\n')
+            for para in paragraphs:
+                if para.strip():
+                    story.append(Paragraph(para.strip(), RESEARCH_STYLES['body']))
+        else:
+            story.append(Paragraph(future_text, RESEARCH_STYLES['body']))
+        story.append(Spacer(1, 0.5*cm))
+    
+    # Conclusion
+    if 'conclusion' in report_data and report_data['conclusion']:
+        story.append(PageBreak())
+        story.append(Paragraph("<b>Fazit</b>", RESEARCH_STYLES['header']))
+        conclusion_text = report_data['conclusion']
+        if '\n\n' in conclusion_text:
+            paragraphs = conclusion_text.split('\n\n')
+            for para in paragraphs:
+                if para.strip():
+                    story.append(Paragraph(para.strip(), RESEARCH_STYLES['body']))
+        else:
+            story.append(Paragraph(conclusion_text, RESEARCH_STYLES['body']))
+        story.append(Spacer(1, 0.5*cm))
+    
+    # Footnotes Section
+    if 'footnotes' in report_data and report_data['footnotes']:
+        story.append(PageBreak())
+        story.append(Paragraph("<b>Fußnoten</b>", RESEARCH_STYLES['header']))
+        story.append(Spacer(1, 0.3*cm))
+        
+        footnotes = report_data['footnotes']
+        for footnote in footnotes:
+            if isinstance(footnote, dict):
+                num = footnote.get('number', '?')
+                source = footnote.get('source_name', 'Unbekannte Quelle')
+                url = footnote.get('source_url', '')
+                context = footnote.get('context', '')
+                
+                footnote_text = f"<b>[{num}]</b> {source}"
+                if context:
+                    footnote_text += f" - {context}"
+                if url:
+                    footnote_text += f"<br/>&nbsp;&nbsp;&nbsp;&nbsp;<i>{url}</i>"
+                
+                story.append(Paragraph(footnote_text, RESEARCH_STYLES['footnote']))
+        story.append(Spacer(1, 0.5*cm))
+    
+    # Sources Section
+    story.append(PageBreak())
+    story.append(Paragraph("<b>Quellenverzeichnis</b>", RESEARCH_STYLES['header']))
+    story.append(Spacer(1, 0.3*cm))
+    
+    sources_list = report_data.get('sources', [])
+    if sources_list:
+        for i, source in enumerate(sources_list, 1):
+            if isinstance(source, dict):
+                source_name = source.get('name', 'Unbekannte Quelle')
+                source_url = source.get('url', '')
+                source_text = f"<b>[{i}]</b> {source_name}"
+                if source_url:
+                    source_text += f"<br/>&nbsp;&nbsp;&nbsp;&nbsp;<i>{source_url}</i>"
+                story.append(Paragraph(source_text, RESEARCH_STYLES['footnote']))
+    else:
+        story.append(Paragraph("Keine Quellen verfügbar.", RESEARCH_STYLES['body']))
+    
+    story.append(Spacer(1, 1*cm))
+    
+    # Footer
+    story.append(Paragraph(f"© {datetime.now().year} H. & J. Brüggen KG - The World of Cereals", RESEARCH_STYLES['footer']))
+    
+    # Build PDF
+    _build_atomically(doc, story, pdf_path)
+    
+    return pdf_path
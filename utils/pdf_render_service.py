@@ -0,0 +1,139 @@
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+# PDF-Rendering außerhalb der Web- und Research-Threads
+# ReportLab-Builds sind reines Python (CPU-gebunden, halten den GIL) - sie laufen daher
+# in einem Prozess-Pool. PDF_RENDER_WORKERS=0 rendert inline im aufrufenden Thread.
+PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', 2))
+PDF_RENDER_TIMEOUT = int(os.environ.get('PDF_RENDER_TIMEOUT', 120))  # Sekunden
+
+# Obergrenzen der Histogramm-Buckets in Sekunden
+RENDER_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 30)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+# Laufende Renderings: {key: Future}
+_pending = {}
+_pending_lock = threading.Lock()
+
+# Render-Statistik pro Dokumentart: {kind: {'count', 'buckets', 'total', 'max', 'errors'}}
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _get_pool():
+    """Prozess-Pool lazy und pro Prozess erstellen (gunicorn lädt die App vor dem Fork)"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # forkserver: Worker starten aus einem schlanken Prozess statt aus dem Web-Prozess mit seinen Threads
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=PDF_RENDER_WORKERS, mp_context=context)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _timed_render(render_fn, args):
+    """Läuft im Worker-Prozess: gibt (Ergebnis, Renderdauer) zurück"""
+    start = time.perf_counter()
+    result = render_fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _record(kind, duration, error=False):
+    with _stats_lock:
+        stats = _stats.setdefault(kind, {
+            'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0,
+            'buckets': [0] * (len(RENDER_BUCKETS) + 1)
+        })
+        if error:
+            stats['errors'] += 1
+            return
+        stats['count'] += 1
+        stats['total'] += duration
+        stats['max'] = max(stats['max'], duration)
+        index = next((i for i, bound in enumerate(RENDER_BUCKETS) if duration <= bound), len(RENDER_BUCKETS))
+        stats['buckets'][index] += 1
+
+
+def submit_render(kind, render_fn, *args, key=None):
+    """
+    Startet ein Rendering im Prozess-Pool und gibt ein Future zurück.
+
+    render_fn muss eine Modul-Funktion sein, args müssen picklebar sein (keine ORM-Objekte).
+    Mit key kann das Rendering später über wait_for_render() abgewartet werden.
+    """
+    if PDF_RENDER_WORKERS <= 0:
+        from concurrent.futures import Future
+        future = Future()
+        try:
+            future.set_result(_timed_render(render_fn, args))
+        except Exception as e:
+            future.set_exception(e)
+    else:
+        future = _get_pool().submit(_timed_render, render_fn, args)
+
+    def _done(done_future):
+        if key is not None:
+            with _pending_lock:
+                if _pending.get(key) is done_future:
+                    del _pending[key]
+        error = done_future.exception()
+        if error is not None:
+            logging.error(f"PDF-Rendering [{kind}] fehlgeschlagen: {error}")
+            _record(kind, 0.0, error=True)
+            return
+        duration = done_future.result()[1]
+        _record(kind, duration)
+        logging.info(f"📄 PDF [{kind}] gerendert in {duration:.2f}s")
+
+    if key is not None:
+        with _pending_lock:
+            _pending[key] = future
+    future.add_done_callback(_done)
+    return future
+
+
+def render(kind, render_fn, *args, timeout=PDF_RENDER_TIMEOUT):
+    """Rendert im Prozess-Pool und wartet auf das Ergebnis (der wartende Thread hält keinen GIL)"""
+    result, _ = submit_render(kind, render_fn, *args).result(timeout=timeout)
+    return result
+
+
+def wait_for_render(key, timeout=PDF_RENDER_TIMEOUT):
+    """Wartet auf ein laufendes Rendering; True, wenn keins läuft oder es erfolgreich war"""
+    with _pending_lock:
+        future = _pending.get(key)
+    if future is None:
+        return True
+    try:
+        future.result(timeout=timeout)
+        return True
+    except FutureTimeoutError:
+        logging.warning(f"PDF-Rendering {key} nach {timeout}s noch nicht fertig")
+        return False
+    except Exception:
+        return False
+
+
+def get_render_stats():
+    """Render-Zeit-Histogramm und Kennzahlen pro Dokumentart"""
+    labels = [f"<={bound}s" for bound in RENDER_BUCKETS] + [f">{RENDER_BUCKETS[-1]}s"]
+    with _stats_lock:
+        return {
+            kind: {
+                'count': stats['count'],
+                'errors': stats['errors'],
+                'avg_ms': round(stats['total'] / stats['count'] * 1000, 1) if stats['count'] else 0,
+                'max_ms': round(stats['max'] * 1000, 1),
+                'histogram': dict(zip(labels, stats['buckets']))
+            }
+            for kind, stats in _stats.items()
+        }
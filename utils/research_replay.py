@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Record/Replay für Datenquellen- und LLM-Aufrufe des Deep Research Systems
+#   RESEARCH_REPLAY_MODE=record  -> echte Aufrufe, Antworten werden als Cassettes gespeichert
+#   RESEARCH_REPLAY_MODE=replay  -> Antworten kommen aus den Cassettes (kein Netzwerk, keine API-Keys)
+# Künstliche Latenz im Replay: RESEARCH_REPLAY_LATENCY (fix, Sekunden) plus
+# RESEARCH_REPLAY_LATENCY_SCALE * aufgezeichnete Latenz (1.0 = Originaltiming)
+# Ist RESEARCH_REPLAY_SERVER gesetzt, laufen HTTP-Replays über diesen lokalen Stand-in-Server.
+
+# Parameter, die nie in Cassettes oder Schlüssel eingehen
+SECRET_PARAMS = ('api_key', 'apikey', 'key', 'token', 'access_token')
+# Header, die nach dem Dekodieren des Bodys nicht mehr stimmen
+SKIP_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length', 'connection')
+
+
+def replay_mode():
+    return os.environ.get('RESEARCH_REPLAY_MODE', 'off').lower()
+
+
+def cassette_dir():
+    return os.environ.get('RESEARCH_CASSETTE_DIR', 'cassettes')
+
+
+def replay_server_url():
+    return os.environ.get('RESEARCH_REPLAY_SERVER')
+
+
+def replay_delay(recorded_latency):
+    fixed = float(os.environ.get('RESEARCH_REPLAY_LATENCY', 0))
+    scale = float(os.environ.get('RESEARCH_REPLAY_LATENCY_SCALE', 0))
+    return max(0.0, fixed + scale * (recorded_latency or 0.0))
+
+
+def _public_params(params):
+    if not params:
+        return []
+    items = params.items() if isinstance(params, dict) else params
+    return sorted((str(k), str(v)) for k, v in items if str(k).lower() not in SECRET_PARAMS)
+
+
+def http_key(method, url, params=None, body=None):
+    """Schlüssel eines HTTP-Requests (ohne Secrets)."""
+    material = json.dumps({
+        'method': method.upper(),
+        'url': url,
+        'params': _public_params(params),
+        'body': body
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def _path(kind, key):
+    return os.path.join(cassette_dir(), kind, f"{key}.json")
+
+
+def _write(kind, key, entry):
+    path = _path(kind, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _read(kind, key):
+    try:
+        with open(_path(kind, key), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_http(key, method, url, params, status, headers, body, latency):
+    _write('http', key, {
+        'method': method.upper(),
+        'url': url,
+        'params': _public_params(params),
+        'status': status,
+        'headers': {k: v for k, v in (headers or {}).items() if k.lower() not in SKIP_HEADERS},
+        'body': base64.b64encode(body or b'').decode('ascii'),
+        'latency': round(latency, 4)
+    })
+
+
+def load_http(key):
+    """Gibt (status, headers, body, recorded_latency) zurück oder None."""
+    entry = _read('http', key)
+    if entry is None:
+        logging.warning(f"Replay: keine HTTP-Aufnahme für {key[:12]}")
+        return None
+    return entry['status'], entry['headers'], base64.b64decode(entry['body']), entry.get('latency', 0.0)
+
+
+def replay_llm(call_site, model, system_prompt, user_prompt, params, call_fn):
+    """Führt einen LLM-Aufruf aus, zeichnet ihn auf oder spielt ihn ab (je nach Modus)."""
+    mode = replay_mode()
+    if mode == 'off':
+        return call_fn()
+
+    from utils.llm_cache import make_cache_key
+
+    key = make_cache_key(model, system_prompt, user_prompt, params)
+    if mode == 'replay':
+        entry = _read('llm', key)
+        if entry is None:
+            raise RuntimeError(f"Replay: keine LLM-Aufnahme für {call_site} ({key[:12]})")
+        time.sleep(replay_delay(entry.get('latency')))
+        return entry['response']
+
+    start = time.perf_counter()
+    value = call_fn()
+    _write('llm', key, {
+        'call_site': call_site,
+        'model': model,
+        'response': value,
+        'latency': round(time.perf_counter() - start, 4)
+    })
+    return value
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        key = self.path.rsplit('/', 1)[-1]
+        cassette = load_http(key)
+        if cassette is None:
+            self.send_error(404, 'No recording')
+            return
+        status, headers, body, latency = cassette
+        time.sleep(replay_delay(latency))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """Lokaler Stand-in-Server, der HTTP-Cassettes unter /cassette/<key> ausliefert."""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _ReplayHandler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
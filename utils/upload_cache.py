@@ -0,0 +1,65 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+
+from utils.llm_cache import PersistentCache
+
+# Ergebnis-Cache für hochgeladene Dokumente, inhaltsadressiert über SHA-256
+# Gespeichert werden extrahierter Text pro Datei, Blob-URLs extrahierter Bilder pro Datei
+# und das KI-Ergebnis pro Upload-Kombination (Schlüssel enthält Modell und Cache-Version)
+UPLOAD_CACHE_PATH = os.environ.get('UPLOAD_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'upload_cache.sqlite3'))
+UPLOAD_CACHE_TTL = int(os.environ.get('UPLOAD_CACHE_TTL', 30 * 24 * 3600))  # Sekunden
+UPLOAD_CACHE_MAX_ENTRIES = int(os.environ.get('UPLOAD_CACHE_MAX_ENTRIES', 5000))
+UPLOAD_CACHE_DISABLED = os.environ.get('UPLOAD_CACHE_DISABLED', '0') == '1'
+UPLOAD_CACHE_VERSION = 2  # Erhöhen, wenn sich Extraktion oder Prompts ändern
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_upload_cache = PersistentCache(UPLOAD_CACHE_PATH, UPLOAD_CACHE_TTL, UPLOAD_CACHE_MAX_ENTRIES, table='upload_results')
+
+
+def copy_and_hash(stream, target, chunk_size=HASH_CHUNK_SIZE):
+    """Kopiert einen Stream blockweise in target und berechnet dabei den SHA-256"""
+    digest = hashlib.sha256()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        target.write(chunk)
+    return digest.hexdigest()
+
+
+def save_and_hash(file_storage, file_path, chunk_size=HASH_CHUNK_SIZE):
+    """Schreibt einen Upload blockweise auf die Platte und berechnet dabei den SHA-256"""
+    with open(file_path, 'wb') as target:
+        return copy_and_hash(file_storage.stream, target, chunk_size)
+
+
+def combined_hash(content_hashes):
+    """Schlüssel für eine Upload-Kombination (Reihenfolge zählt - sie bestimmt den kombinierten Text)"""
+    return hashlib.sha256('|'.join(content_hashes).encode('utf-8')).hexdigest()
+
+
+def _key(kind, content_hash, model):
+    return f"{kind}:v{UPLOAD_CACHE_VERSION}:{model or '-'}:{content_hash}"
+
+
+def get_cached(kind, content_hash, model=None):
+    """Gibt das gespeicherte Ergebnis zurück oder None"""
+    if UPLOAD_CACHE_DISABLED or not content_hash:
+        return None
+    cached = _upload_cache.get(_key(kind, content_hash, model))
+    if cached is None:
+        return None
+    logging.info(f"💾 Upload-Cache Hit [{kind}] {content_hash[:12]}")
+    return json.loads(cached[0])
+
+
+def set_cached(kind, content_hash, value, model=None):
+    if UPLOAD_CACHE_DISABLED or not content_hash or value is None:
+        return
+    _upload_cache.set(_key(kind, content_hash, model), json.dumps(value, ensure_ascii=False),
+                      {'kind': kind, 'model': model})